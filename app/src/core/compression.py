@@ -0,0 +1,66 @@
+from threading import Lock
+from typing import Dict, Any
+import os
+import zlib
+
+
+# Текстовые форматы хорошо сжимаются deflate; список продолжает helpers.get_file_type
+COMPRESSIBLE_EXTENSIONS = {
+    '.txt', '.csv', '.tsv', '.log', '.json', '.xml', '.html', '.htm', '.css', '.js',
+    '.py', '.sql', '.md', '.ini', '.cfg', '.conf', '.yaml', '.yml', '.svg', '.rtf',
+    '.c', '.h', '.cpp', '.java', '.php', '.sh', '.bat', '.tex', '.po', '.ndjson',
+}
+# Уже сжатые данные: deflate только тратит процессор
+COMPRESSED_EXTENSIONS = {
+    '.zip', '.rar', '.7z', '.gz', '.tgz', '.bz2', '.xz', '.zst', '.jpg', '.jpeg', '.png',
+    '.gif', '.webp', '.mp3', '.mp4', '.avi', '.mkv', '.mov', '.ogg', '.flac', '.pdf',
+    '.docx', '.xlsx', '.pptx', '.jar', '.apk', '.iso',
+}
+
+
+def supports_mode_z(features: Dict[str, str]) -> bool:
+    # FEAT отдает строку "MODE Z"
+    return 'Z' in features.get('MODE', '').upper().split()
+
+
+def should_compress(filename: str, file_size: int, min_size: int = 64 * 1024) -> bool:
+    ext = os.path.splitext(filename)[1].lower()
+    if ext in COMPRESSED_EXTENSIONS:
+        return False
+    # Мелкие файлы не окупают лишний обмен MODE Z / MODE S
+    return ext in COMPRESSIBLE_EXTENSIONS and file_size >= min_size
+
+
+def compressor(level: int = 6):
+    return zlib.compressobj(max(1, min(9, int(level))))
+
+
+def decompressor():
+    return zlib.decompressobj()
+
+
+class CompressionStats:
+    def __init__(self):
+        self._lock = Lock()
+        self.files = 0
+        self.raw_bytes = 0
+        self.wire_bytes = 0
+
+    def record(self, raw_bytes: int, wire_bytes: int) -> None:
+        with self._lock:
+            self.files += 1
+            self.raw_bytes += raw_bytes
+            self.wire_bytes += wire_bytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self.files = self.raw_bytes = self.wire_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'files': self.files,
+                'raw_bytes': self.raw_bytes,
+                'wire_bytes': self.wire_bytes,
+                'ratio': self.raw_bytes / self.wire_bytes if self.wire_bytes else 0.0
+            }
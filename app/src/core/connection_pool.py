@@ -0,0 +1,151 @@
+from ftplib import FTP, error_perm
+from threading import Condition
+from contextlib import contextmanager
+from typing import Callable, List, Tuple, Dict, Optional, Iterator
+import time
+from src.utils.debug import debug_log
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+    def __init__(self, factory: Callable[[], FTP], size: int = 4,
+                 health_check_interval: float = 15.0,
+                 acquire_timeout: float = 60.0):
+        self.factory = factory
+        self.size = max(1, int(size))
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+
+        self._idle: List[Tuple[FTP, float]] = []
+        self._in_use = 0
+        self._cond = Condition()
+        self._closed = False
+        self._stats: Dict[str, int] = {
+            'created': 0,
+            'reused': 0,
+            'discarded': 0,
+            'waits': 0
+        }
+
+    def acquire(self, timeout: Optional[float] = None) -> FTP:
+        if timeout is None:
+            timeout = self.acquire_timeout
+        deadline = time.monotonic() + timeout
+
+        while True:
+            ftp, last_used = self._checkout(deadline)
+
+            if ftp is None:
+                try:
+                    ftp = self.factory()
+                except Exception:
+                    self._release_slot()
+                    raise
+                with self._cond:
+                    self._stats['created'] += 1
+                debug_log("DEBUG: ConnectionPool: Создано новое соединение")
+                return ftp
+
+            # Долго простаивавшее соединение могло быть закрыто сервером
+            if time.monotonic() - last_used > self.health_check_interval:
+                if not self._is_alive(ftp):
+                    debug_log("DEBUG: ConnectionPool: Соединение не прошло проверку, пересоздаем")
+                    self._discard(ftp)
+                    continue
+
+            with self._cond:
+                self._stats['reused'] += 1
+            return ftp
+
+    def release(self, ftp: FTP, broken: bool = False) -> None:
+        with self._cond:
+            if not broken and not self._closed:
+                self._idle.append((ftp, time.monotonic()))
+                self._in_use -= 1
+                self._cond.notify()
+                return
+        self._discard(ftp)
+
+    @contextmanager
+    def connection(self, timeout: Optional[float] = None) -> Iterator[FTP]:
+        ftp = self.acquire(timeout)
+        broken = False
+        try:
+            yield ftp
+        except error_perm:
+            raise
+        except BaseException:
+            # После сетевой ошибки или прерванной передачи состояние
+            # управляющего соединения неизвестно, повторно его не используем
+            broken = True
+            raise
+        finally:
+            self.release(ftp, broken)
+
+    def close(self) -> None:
+        with self._cond:
+            self._closed = True
+            idle = self._idle
+            self._idle = []
+            self._cond.notify_all()
+
+        for ftp, _ in idle:
+            self._close_quietly(ftp)
+
+    def stats(self) -> Dict[str, int]:
+        with self._cond:
+            stats = self._stats.copy()
+            stats['size'] = self.size
+            stats['idle'] = len(self._idle)
+            stats['in_use'] = self._in_use
+            return stats
+
+    def _checkout(self, deadline: float) -> Tuple[Optional[FTP], float]:
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise ConnectionError("Пул соединений закрыт")
+                if self._idle:
+                    ftp, last_used = self._idle.pop()
+                    self._in_use += 1
+                    return ftp, last_used
+                if self._in_use < self.size:
+                    self._in_use += 1
+                    return None, 0.0
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise PoolTimeout("Нет свободных соединений в пуле")
+                self._stats['waits'] += 1
+                self._cond.wait(remaining)
+
+    def _release_slot(self) -> None:
+        with self._cond:
+            self._in_use -= 1
+            self._cond.notify()
+
+    def _discard(self, ftp: FTP) -> None:
+        self._close_quietly(ftp)
+        with self._cond:
+            self._stats['discarded'] += 1
+        self._release_slot()
+
+    def _is_alive(self, ftp: FTP) -> bool:
+        try:
+            ftp.voidcmd("NOOP")
+            return True
+        except Exception:
+            return False
+
+    @staticmethod
+    def _close_quietly(ftp: FTP) -> None:
+        try:
+            ftp.quit()
+        except Exception:
+            try:
+                ftp.close()
+            except Exception:
+                pass
@@ -1,33 +1,77 @@
-from ftplib import FTP, FTP_TLS, error_perm
+from ftplib import FTP, FTP_TLS, error_perm, error_temp, error_reply, error_proto
 import os
-from threading import Lock, Thread
-from typing import Optional, Tuple, List, Dict, Any, Callable
+from threading import Lock, Thread, Event
+from contextlib import contextmanager
+from typing import Optional, Tuple, List, Dict, Any, Callable, Iterator
 from datetime import datetime, timezone
 import humanize
 import time
 from queue import Queue
 import socket
-import sys
+import ssl
+import posixpath
 from src.core.settings import Settings
-
-
-def debug_log(message: str):
-    print(message, file=sys.stderr, flush=True)
+from src.core.connection_pool import ConnectionPool, PoolTimeout
+from src.core.remote_cache import DirectoryCache
+from src.core.tree_transfer import TreeDownloader, TreeUploader
+from src.core.sync import DirectorySync, SyncPlan
+from src.core.tree_delete import TreeDeleter
+from src.core.segmented import SegmentedDownloader
+from src.core.transfer_queue import TransferPaused
+from src.core.transfer_tuner import TransferTuner
+from src.core.remote_copy import RemoteCopier
+from src.core.search_index import SearchIndex, IndexCrawler, SearchResult
+from src.core.metadata_store import MetadataStore
+from src.core.integrity import HASH_NAMES, select_hash, new_digest, file_digest, remote_hash, same_hash
+from src.core.ftps import SessionFTP_TLS, TLSSessionCache, create_tls_context
+from src.core.compression import CompressionStats, supports_mode_z, should_compress, compressor, decompressor
+from concurrent.futures import ThreadPoolExecutor
+from src.core.resume import (UploadStateStore, part_path, download_offset,
+                              save_download_state, clear_download_state)
+from src.core.listing import RemoteEntry, parse_features, parse_mlsd, parse_mlsd_line, parse_mlsd_time, parse_list, iter_mlsd, iter_list, format_timestamp
+from src.utils.debug import debug_log
 
 
 class FTPClient:
-    def __init__(self):
+    MIN_SEGMENT_SIZE = 8 * 1024 * 1024
+    MAX_LINK_PROBES = 100
+
+    def __init__(self, settings: Optional[Settings] = None):
         self.ftp = None
         self.ftp_lock = Lock()
         self.monitor_thread = None
         self.stop_monitor = False
-        self.settings = Settings()
+        self.settings = settings or Settings()
         self.current_remote_dir = "/"
         self.connection_params = None
         self.monitor_running = False
-        self.remote_cache = {}
-
-    def connect(self, host: str, port: int, user: str, password: str) -> Tuple[bool, str]:
+        self.remote_cache = DirectoryCache(
+            ttl=self.settings.get('cache_ttl', 30),
+            max_entries=self.settings.get('cache_max_dirs', 256)
+        )
+        self.pool = None
+        self.features: Dict[str, str] = {}
+        self.upload_states = UploadStateStore()
+        self.tuner_lock = Lock()
+        self._tree_lock = Lock()
+        self._active_trees = 0
+        self._tuner_changed = False
+        self.fxp_supported: Optional[bool] = None
+        self.search_index = SearchIndex()
+        self.indexer: Optional[IndexCrawler] = None
+        self.metadata = MetadataStore(max_age_days=self.settings.get('metadata_cache_days', 30))
+        self.compression = CompressionStats()
+        self.tls_sessions = TLSSessionCache()
+        self.tls_context: Optional[ssl.SSLContext] = None
+        # Вызывается из фонового потока, когда перепроверка сохраненного списка завершилась:
+        # (путь, изменился ли список)
+        self.on_listing_revalidated: Optional[Callable[[str, bool], None]] = None
+        self._revalidating: set = set()
+        self._revalidate_lock = Lock()
+        self._revalidator: Optional[ThreadPoolExecutor] = None
+
+    def connect(self, host: str, port: int, user: str, password: str,
+                tls: str = 'none') -> Tuple[bool, str]:
         debug_log("\nDEBUG: FTPClient: Начало подключения")
         try:
             with self.ftp_lock:
@@ -39,18 +83,37 @@ class FTPClient:
                         pass
                     self.ftp = None
 
+                self._close_pool()
+                self.stop_indexing()
+                # Результаты прежнего сервера не должны попасть в кэш под ключом нового
+                self._stop_revalidation()
+                self.metadata.flush()
+                self.search_index.clear()
+                self.remote_cache.clear()
+                self.remote_cache.ttl = self.settings.get('cache_ttl', 30)
+                self.compression.clear()
+                self.tls_sessions.clear()
+                self.tls_context = None
+                if tls != 'none':
+                    self.tls_context = create_tls_context(self.settings.get('tls_verify', True))
+
                 debug_log("DEBUG: FTPClient: Создаем новое подключение")
-                self.ftp = FTP()
-                self.ftp.connect(host, port)
-                self.ftp.login(user, password)
-                self.ftp.encoding = self.settings.get('encoding', 'utf-8')
+                self.ftp = self._open_connection(host, port, user, password, tls)
+                self.features = self._negotiate_features(self.ftp)
+                # FXP между защищенными соединениями требует SSCN/CPSV, которые есть не везде
+                self.fxp_supported = None if tls == 'none' else False
 
                 self.connection_params = {
                     'host': host,
                     'port': port,
                     'user': user,
-                    'password': password
+                    'password': password,
+                    'tls': tls
                 }
+                self.pool = ConnectionPool(
+                    self._create_session,
+                    size=self.settings.get('pool_size', 4)
+                )
 
                 debug_log("DEBUG: FTPClient: Подключение успешно установлено")
                 return True, "Успешное подключение"
@@ -60,15 +123,96 @@ class FTPClient:
             self.connection_params = None
             return False, str(e)
 
+    def _open_connection(self, host: str, port: int, user: str, password: str,
+                         tls: str = 'none') -> FTP:
+        if tls == 'none':
+            ftp = FTP()
+        else:
+            ftp = SessionFTP_TLS(self.tls_context, self.tls_sessions, implicit=tls == 'implicit')
+        ftp.connect(host, port)
+        ftp.login(user, password)
+        if tls != 'none':
+            # PBSZ 0 + PROT P: каналы данных тоже шифруются
+            ftp.prot_p()
+            ftp.remember_session()
+        ftp.encoding = self.settings.get('encoding', 'utf-8')
+        return ftp
+
+    def _negotiate_features(self, ftp: FTP) -> Dict[str, str]:
+        try:
+            features = parse_features(ftp.sendcmd('FEAT'))
+        except Exception as e:
+            debug_log(f"DEBUG: FTPClient: Сервер не поддерживает FEAT: {str(e)}")
+            return {}
+
+        debug_log(f"DEBUG: FTPClient: Возможности сервера: {', '.join(sorted(features))}")
+        if 'UTF8' in features and ftp.encoding.lower().replace('-', '') == 'utf8':
+            try:
+                ftp.sendcmd('OPTS UTF8 ON')
+            except Exception:
+                pass
+        return features
+
+    def supports(self, feature: str) -> bool:
+        return feature.upper() in self.features
+
+    @property
+    def hash_command(self) -> Optional[Tuple[str, str]]:
+        return select_hash(self.features)
+
+    def _create_session(self) -> FTP:
+        params = self.connection_params
+        if not params:
+            raise ConnectionError("Нет сохраненных параметров подключения")
+        return self._open_connection(**params)
+
+    def _close_pool(self) -> None:
+        if self.pool:
+            debug_log("DEBUG: FTPClient: Закрываем пул соединений")
+            self.pool.close()
+            self.pool = None
+
+    def _remote_path(self, name: str) -> str:
+        if name.startswith('/'):
+            return name
+        return posixpath.join(self.get_current_directory(), name)
+
     def reconnect(self) -> Tuple[bool, str]:
         if not self.connection_params:
             return False, "Нет сохраненных параметров подключения"
 
-        return self.connect(**self.connection_params)
+        if not self.pool:
+            return self.connect(**self.connection_params)
+
+        # Пул и кэш сохраняем: передачи на пуле переподключаются сами и докачиваются
+        debug_log("DEBUG: FTPClient: Переподключение управляющего соединения")
+        try:
+            with self.ftp_lock:
+                if self.ftp:
+                    try:
+                        self.ftp.close()
+                    except Exception:
+                        pass
+                self.ftp = self._open_connection(**self.connection_params)
+                self.features = self._negotiate_features(self.ftp)
+                try:
+                    self.ftp.cwd(self.current_remote_dir)
+                except error_perm:
+                    pass
+            return True, "Соединение восстановлено"
+        except Exception as e:
+            debug_log(f"DEBUG: FTPClient: Ошибка переподключения: {str(e)}")
+            return False, str(e)
 
     def disconnect(self) -> None:
         debug_log("\nDEBUG: FTPClient: Начало отключения")
         self.monitor_running = False
+        self._close_pool()
+        self.stop_indexing()
+        self._stop_revalidation()
+        self.metadata.flush()
+        self.upload_states.flush()
+        self._save_block_sizes()
 
         with self.ftp_lock:
             if self.ftp:
@@ -83,167 +227,776 @@ class FTPClient:
                     self.connection_params = None
                     debug_log("DEBUG: FTPClient: Отключение завершено")
 
-    def _get_file_list(self) -> List[Tuple[str, bool]]:
-        file_list = []
-        self.ftp.retrlines('LIST', file_list.append)
-        items = []
-        for line in file_list:
-            parts = line.split(maxsplit=8)
-            if len(parts) < 9:
-                continue
-            perm = parts[0]
-            name = parts[8].strip()
-            if name in ('.', '..'):
-                continue
-            is_dir = perm.startswith('d')
-            items.append((name, is_dir))
-        return items
+    def _list_dir(self, conn: FTP, path: str, use_cache: bool = True) -> List[RemoteEntry]:
+        if use_cache:
+            entries = self._cached_listing(path)
+            if entries is not None:
+                return entries
+
+        lines = []
+        if self.supports('MLST'):
+            conn.retrlines(f'MLSD {path}', lines.append)
+            entries = parse_mlsd(lines)
+        else:
+            conn.cwd(path)
+            conn.retrlines('LIST', lines.append)
+            entries = parse_list(lines)
+
+        entries = self._resolve_links(conn, path, entries)
+        self._store_listing(path, entries)
+        return entries
+
+    def _list_dir_strict(self, conn: FTP, path: str) -> List[RemoteEntry]:
+        # Для обходов, которые что-то удаляют или переносят: некоторые серверы (pyftpdlib)
+        # в MLSD показывают ссылку на папку как type=dir, а в LIST - честно как 'l'.
+        # Папки из MLSD сверяем с LIST, чтобы обход не ушел по ссылке
+        entries = self._list_dir(conn, path, use_cache=False)
+        if not self.supports('MLST') or not any(entry.is_dir and not entry.is_link for entry in entries):
+            return entries
+
+        lines = []
+        conn.cwd(path)
+        conn.retrlines('LIST', lines.append)
+        links = {entry.name for entry in iter_list(lines) if entry.is_link}
+        if not links:
+            return entries
+        debug_log(f"DEBUG: FTPClient: В {path} ссылки, которые MLSD показал как папки: {', '.join(sorted(links))}")
+        return [entry._replace(is_link=True) if entry.name in links else entry for entry in entries]
+
+    def _resolve_links(self, conn: FTP, path: str, entries: List[RemoteEntry]) -> List[RemoteEntry]:
+        # По списку не видно, куда ведет ссылка, если цель не оканчивается на '/':
+        # ссылку, в которую можно перейти CWD, считаем папкой
+        links = [i for i, entry in enumerate(entries) if entry.is_link and not entry.is_dir]
+        if not links:
+            return entries
+        if len(links) > self.MAX_LINK_PROBES:
+            debug_log(f"DEBUG: FTPClient: {len(links)} ссылок в {path}, проверяем первые {self.MAX_LINK_PROBES}")
+            links = links[:self.MAX_LINK_PROBES]
+
+        entries = list(entries)
+        home = conn.pwd()
+        try:
+            for i in links:
+                try:
+                    conn.cwd(posixpath.join(path, entries[i].name))
+                except error_perm:
+                    continue
+                entries[i] = entries[i]._replace(is_dir=True, size=-1)
+        finally:
+            conn.cwd(home)
+        return entries
+
+    def _store_listing(self, path: str, entries: List[RemoteEntry]) -> None:
+        self.remote_cache.put(path, entries)
+        # Каждый полученный список заодно обновляет поисковый индекс и сохраняется на диск
+        self.search_index.update_directory(path, [self._index_entry(entry) for entry in entries])
+        self._persist_listing(path, entries)
+
+    def _persist_listing(self, path: str, entries: List[RemoteEntry]) -> None:
+        server = self._server_key()
+        if server and self.settings.get('metadata_cache', True):
+            self.metadata.put(server, path, entries)
+
+    def _cached_listing(self, path: str) -> Optional[List[RemoteEntry]]:
+        entries = self.remote_cache.get(path)
+        if entries is not None:
+            return entries
+
+        server = self._server_key()
+        if not server or not self.settings.get('metadata_cache', True):
+            return None
+        stored = self.metadata.get(server, path)
+        if stored is None:
+            return None
+
+        # Показываем последний известный список сразу и перепроверяем его в фоне
+        listed_at, entries = stored
+        debug_log(f"DEBUG: FTPClient: Список {path} из сохраненного кэша "
+                  f"({int(time.time() - listed_at)} с назад), перепроверяем")
+        self.remote_cache.put(path, entries)
+        self._schedule_revalidation(path, entries)
+        return entries
+
+    def is_revalidating(self, path: str) -> bool:
+        with self._revalidate_lock:
+            return path in self._revalidating
+
+    def _schedule_revalidation(self, path: str, known: List[RemoteEntry]) -> None:
+        with self._revalidate_lock:
+            if path in self._revalidating:
+                return
+            self._revalidating.add(path)
+            if self._revalidator is None:
+                self._revalidator = ThreadPoolExecutor(max_workers=1, thread_name_prefix='revalidate')
+            self._revalidator.submit(self._revalidate, path, known, self._server_key())
+
+    def _stop_revalidation(self) -> None:
+        with self._revalidate_lock:
+            revalidator, self._revalidator = self._revalidator, None
+            self._revalidating.clear()
+        if revalidator is not None:
+            # Текущая перепроверка завершится сама на закрытом пуле, очередь отменяем
+            revalidator.shutdown(wait=False, cancel_futures=True)
+
+    def _revalidate(self, path: str, known: List[RemoteEntry], server: Optional[str]) -> None:
+        try:
+            if not self.pool:
+                return
+            with self.pool.connection() as conn:
+                # Ссылки на папки разрешаем так же, как при обычном чтении, иначе
+                # сравнение с сохраненным списком всегда находило бы отличия
+                entries = self._resolve_links(conn, path, list(self._stream_listing(conn, path)))
+        except Exception as e:
+            debug_log(f"DEBUG: FTPClient: Не удалось перепроверить {path}: {str(e)}")
+            return
+        finally:
+            with self._revalidate_lock:
+                self._revalidating.discard(path)
+
+        if not self.pool or self._server_key() != server:
+            return
+        self._store_listing(path, entries)
+        changed = entries != known
+        if changed:
+            debug_log(f"DEBUG: FTPClient: Список {path} изменился на сервере")
+        if self.on_listing_revalidated:
+            self.on_listing_revalidated(path, changed)
+
+    def _server_key(self) -> Optional[str]:
+        params = self.connection_params
+        if not params:
+            return None
+        return f"{params['user']}@{params['host']}:{params['port']}"
+
+    @staticmethod
+    def _index_entry(entry: RemoteEntry) -> Tuple[str, bool, int, float]:
+        # Ссылки на папки не обходим, чтобы не зациклиться
+        return entry.name, entry.is_dir and not entry.is_link, entry.size, entry.modified
+
+    def start_indexing(self) -> None:
+        if not self.settings.get('search_index', True) or not self.connection_params:
+            return
+
+        self.stop_indexing()
+        server = self._server_key()
+        persist = self.settings.get('metadata_cache', True)
+
+        def preload():
+            if not persist:
+                return
+            for path, entries in self.metadata.listings(server):
+                # Уже полученные в этой сессии списки свежее сохраненных
+                if not self.search_index.has_directory(path):
+                    self.search_index.update_directory(path, [self._index_entry(entry) for entry in entries])
+            debug_log(f"DEBUG: FTPClient: Индекс загружен из кэша, записей: {len(self.search_index)}")
+
+        # Обход идет по отдельному соединению, чтобы не занимать пул и не мешать навигации
+        session = {}
+
+        def list_dir(path):
+            conn = session.get('conn')
+            if conn is None:
+                conn = session['conn'] = self._create_session()
+            try:
+                entries = self._resolve_links(conn, path, list(self._stream_listing(conn, path)))
+            except error_perm:
+                raise
+            except Exception:
+                session.pop('conn', None)
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+                raise
+            # В кэш в памяти не кладем, чтобы обход не вытеснял списки, нужные навигации
+            self._persist_listing(path, entries)
+            return [self._index_entry(entry) for entry in entries]
+
+        def close():
+            conn = session.pop('conn', None)
+            if conn is not None:
+                try:
+                    conn.quit()
+                except Exception:
+                    conn.close()
+
+        self.indexer = IndexCrawler(self.search_index, list_dir, close, on_done=self.metadata.flush,
+                                    preload=preload)
+        self.indexer.start(self.get_current_directory())
+
+    def stop_indexing(self) -> None:
+        if self.indexer is None:
+            return
+        self.indexer.stop()
+        self.indexer = None
+
+    def search_files(self, pattern: str, root: Optional[str] = None, case_sensitive: bool = False,
+                     limit: int = 1000) -> List[SearchResult]:
+        return self.search_index.search(pattern, root, case_sensitive, limit)
+
+    def invalidate_cache(self, path: Optional[str] = None, tree: bool = False) -> None:
+        path = self._remote_path(path) if path else self.get_current_directory()
+        if tree:
+            self.remote_cache.invalidate_tree(path)
+        else:
+            self.remote_cache.invalidate(path)
+        self._forget_listing(path, tree)
+
+    def _forget_listing(self, path: str, tree: bool = False) -> None:
+        # Сохраненный на диск список иначе отдавался бы после истечения кэша в памяти
+        server = self._server_key()
+        if not server:
+            return
+        self.metadata.remove(server, path, tree)
+        if tree:
+            # Вместе с папкой устаревает и список родителя, как в DirectoryCache.invalidate_tree
+            self.metadata.remove(server, posixpath.dirname(path.rstrip('/')) or '/')
+
+    def update_settings(self, settings: Dict[str, Any]) -> None:
+        self.settings.update(settings)
+        self.remote_cache.ttl = self.settings.get('cache_ttl', 30)
+
+    def _stat(self, conn: FTP, path: str) -> Optional[RemoteEntry]:
+        if self.supports('MLST'):
+            try:
+                response = conn.sendcmd(f'MLST {path}')
+            except error_perm:
+                return None
+            for line in response.splitlines()[1:]:
+                if line.startswith(' '):
+                    entry = parse_mlsd_line(line[1:])
+                    if entry is not None:
+                        return entry._replace(name=posixpath.basename(entry.name.rstrip('/')) or entry.name)
+            return None
 
-    def list_files(self) -> List[Tuple[str, str, str, str]]:
-        if not self.ftp:
+        try:
+            conn.cwd(path)
+            return RemoteEntry(name=posixpath.basename(path), is_dir=True)
+        except error_perm:
+            pass
+        try:
+            conn.voidcmd('TYPE I')
+            return RemoteEntry(name=posixpath.basename(path), is_dir=False, size=conn.size(path))
+        except error_perm:
+            return None
+
+    def list_files(self, count_children: bool = False, refresh: bool = False,
+                   path: Optional[str] = None) -> List[Tuple[str, str, str, str, int, float]]:
+        if not self.ftp or not self.pool:
             return []
 
         items = []
         try:
-            with self.ftp_lock:
-                file_list = []
-                self.ftp.retrlines('LIST', file_list.append)
-
-                for line in file_list:
-                    try:
-                        parts = line.split(maxsplit=8)
-                        if len(parts) < 9:
-                            continue
-
-                        name = parts[8].strip()
-                        if name in ('.', '..'):
-                            continue
-
-                        perm = parts[0]
-                        is_dir = perm.startswith('d')
-
-                        if is_dir:
-                            try:
-                                current_dir = self.ftp.pwd()
-                                self.ftp.cwd(name)
-                                dir_items = []
-                                self.ftp.retrlines('NLST', dir_items.append)
-                                size = f"{len(dir_items)} элем."
-                                self.ftp.cwd(current_dir)
-                            except:
-                                size = "Нет доступа"
-                        else:
-                            try:
-                                size = humanize.naturalsize(int(parts[4]))
-                            except:
-                                size = parts[4]
-
-                        time_str = ' '.join(parts[5:8])
-                        modified = self._parse_ftp_time(time_str)
-
-                        items.append((name, size, "Папка" if is_dir else "Файл", modified))
-                    except:
-                        continue
-        except:
-            pass
+            current_dir = path or self.get_current_directory()
+            with self.pool.connection() as conn:
+                for entry in self._list_dir(conn, current_dir, use_cache=not refresh):
+                    items.append(self._entry_row(current_dir, entry, conn if count_children else None))
+        except Exception as e:
+            debug_log(f"DEBUG: FTPClient: Ошибка получения списка файлов: {str(e)}")
 
         return items
 
-    def download_file(self, remote_file: str, local_path: str,
-                      progress_callback=None) -> Tuple[bool, str]:
-        if not self.ftp:
-            return False, "Нет подключения"
-
+    def iter_list_files(self, path: Optional[str] = None, refresh: bool = False,
+                        chunk_size: int = 500) -> Iterator[List[Tuple[str, str, str, str, int, float]]]:
+        # Отдает список порциями по мере поступления данных LIST/MLSD, не дожидаясь конца передачи.
+        # Если потребитель прекращает чтение, соединение закрывается, а не возвращается в пул
+        if not self.ftp or not self.pool:
+            return
+
+        current_dir = path or self.get_current_directory()
+        if not refresh:
+            entries = self._cached_listing(current_dir)
+            if entries is not None:
+                for start in range(0, len(entries), chunk_size):
+                    yield [self._entry_row(current_dir, entry) for entry in entries[start:start + chunk_size]]
+                return
+
+        conn = self.pool.acquire()
+        broken = True
+        stream = self._stream_listing(conn, current_dir)
+        entries = []
         try:
-            file_size = self.ftp.size(remote_file)
-            buffer_size = self.settings.get('buffer_size', 8192)
-
-            with self.ftp_lock:
-                with open(local_path, 'wb') as f:
-                    bytes_received = 0
+            chunk = []
+            flushed = time.monotonic()
+            for entry in stream:
+                entries.append(entry)
+                chunk.append(self._entry_row(current_dir, entry))
+                # Первые строки отдаем сразу, даже если порция не набралась
+                if len(chunk) >= chunk_size or time.monotonic() - flushed > 0.2:
+                    yield chunk
+                    chunk = []
+                    flushed = time.monotonic()
+            if chunk:
+                yield chunk
+            # Строки уже показаны, но в кэш и индекс ссылки на папки попадают как папки
+            entries = self._resolve_links(conn, current_dir, entries)
+            broken = False
+        finally:
+            stream.close()
+            self.pool.release(conn, broken)
+
+        self._store_listing(current_dir, entries)
+
+    def _stream_listing(self, conn: FTP, path: str) -> Iterator[RemoteEntry]:
+        if self.supports('MLST'):
+            command, parse = f'MLSD {path}', iter_mlsd
+        else:
+            conn.cwd(path)
+            command, parse = 'LIST', iter_list
+
+        conn.sendcmd('TYPE A')
+        with conn.transfercmd(command) as sock, sock.makefile('r', encoding=conn.encoding) as fp:
+            yield from parse(line.rstrip('\r\n') for line in fp)
+            self._unwrap_data_socket(sock)
+        conn.voidresp()
+
+    def _entry_row(self, current_dir: str, entry: RemoteEntry,
+                   conn: Optional[FTP] = None) -> Tuple[str, str, str, str, int, float]:
+        # Кроме текста для таблицы отдаем исходные размер и время - по ним сортирует список
+        raw_size = entry.size
+        if entry.is_dir:
+            path = posixpath.join(current_dir, entry.name)
+            found, count = self.get_cached_child_count(path)
+            if found:
+                size = self.format_child_count(count)
+            elif conn is not None:
+                count = self._count_directory(conn, path)
+                size = self.format_child_count(count)
+            else:
+                count = None
+                size = ""
+            raw_size = -1 if count is None else count
+        elif entry.size >= 0:
+            size = humanize.naturalsize(entry.size)
+        else:
+            size = ""
+
+        return (entry.name, size, "Папка" if entry.is_dir else "Файл",
+                format_timestamp(entry.modified), raw_size, entry.modified)
+
+    def _count_directory(self, conn: FTP, path: str) -> Optional[int]:
+        try:
+            names = conn.nlst(path)
+            count = sum(1 for name in names if posixpath.basename(name) not in ('.', '..'))
+        except error_perm:
+            count = None
+        self.remote_cache.put_count(path, count)
+        return count
+
+    def get_cached_child_count(self, path: str) -> Tuple[bool, Optional[int]]:
+        return self.remote_cache.get_count(path)
+
+    @staticmethod
+    def format_child_count(count: Optional[int]) -> str:
+        if count is None:
+            return "Нет доступа"
+        return f"{count} элем."
+
+    def count_children(self, paths: List[str],
+                       callback: Callable[[str, Optional[int]], None],
+                       cancel_event: Optional[Event] = None) -> Optional[Thread]:
+        if not self.pool or not paths:
+            return None
+
+        def worker():
+            try:
+                with self.pool.connection() as conn:
+                    for path in paths:
+                        if cancel_event is not None and cancel_event.is_set():
+                            return
+                        found, count = self.get_cached_child_count(path)
+                        if not found:
+                            count = self._count_directory(conn, path)
+                        callback(path, count)
+            except Exception as e:
+                debug_log(f"DEBUG: FTPClient: Ошибка подсчета элементов: {str(e)}")
+
+        thread = Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
 
-                    def callback(block):
-                        nonlocal bytes_received
-                        bytes_received += len(block)
-                        f.write(block)
-                        if progress_callback:
-                            progress_callback(bytes_received, file_size)
+    def download_file(self, remote_file: str, local_path: str,
+                      progress_callback=None, file_size: Optional[int] = None) -> Tuple[bool, str]:
+        if not self.ftp or not self.pool:
+            return False, "Нет подключения"
 
-                    self.ftp.retrbinary(f'RETR {remote_file}', callback, buffer_size)
+        remote_path = self._remote_path(remote_file)
+        return self._retry_transfer(
+            lambda: self._download_once(remote_path, local_path, progress_callback, file_size),
+            remote_path)
 
-                downloaded_size = os.path.getsize(local_path)
-                if downloaded_size != file_size:
-                    os.remove(local_path)
-                    return False, "Ошибка скачивания: размер файла не совпадает"
+    def _download_once(self, remote_path: str, local_path: str,
+                       progress_callback, file_size: Optional[int]) -> Tuple[bool, str]:
+        resume = self.settings.get('resume_transfers', True)
+        partial = part_path(local_path)
+        segments = 0
 
-                return True, "Файл успешно скачан"
+        try:
+            if file_size is None:
+                with self.pool.connection() as conn:
+                    conn.voidcmd('TYPE I')
+                    file_size = conn.size(remote_path)
+
+            # Сжимаемый файл выгоднее качать одним потоком MODE Z, чем сегментами без сжатия
+            if not self._use_compression(remote_path, file_size, 0):
+                segments = self._segment_count(file_size)
+            if segments:
+                clear_download_state(local_path)
+                success, message = SegmentedDownloader(self, segments).run(
+                    remote_path, partial, file_size, progress_callback)
+                if not success:
+                    clear_download_state(local_path)
+                    return False, message
+            else:
+                digest = self._retrieve(remote_path, local_path, progress_callback, file_size)
+        except Exception:
+            # Без докачки недокачанный файл бесполезен
+            if not resume or segments:
+                clear_download_state(local_path)
+            raise
+
+        if os.path.getsize(partial) != file_size:
+            clear_download_state(local_path)
+            return False, "Ошибка скачивания: размер файла не совпадает"
+
+        if segments:
+            # Сегменты пишутся не по порядку, хеш считаем по готовому файлу
+            digest = self._start_digest(partial, file_size)
+        if digest is not None:
+            with self.pool.connection() as conn:
+                verified, message = self._check_digest(conn, remote_path, digest)
+            if verified is False:
+                clear_download_state(local_path)
+                return False, message
+
+        os.replace(partial, local_path)
+        clear_download_state(local_path, keep_part=True)
+        return True, "Файл успешно скачан"
+
+    def _retrieve(self, remote_path: str, local_path: str, progress_callback, file_size: int):
+        partial = part_path(local_path)
+
+        with self.pool.connection() as conn:
+            conn.voidcmd('TYPE I')
+            offset = 0
+            if self.settings.get('resume_transfers', True):
+                modified = self._remote_mtime(conn, remote_path)
+                offset = download_offset(local_path, remote_path, file_size, modified)
+                save_download_state(local_path, remote_path, file_size, modified)
+            if offset:
+                debug_log(f"DEBUG: Докачка {remote_path} с позиции {offset}")
+
+            # Хеш считается по ходу приема, повторно файл не читается
+            digest = self._start_digest(partial, offset)
+            tuner = self._create_tuner(file_size)
+            with self._transfer_mode(conn, self._use_compression(remote_path, file_size, offset)) as compressed:
+                inflater = decompressor() if compressed else None
+                wire_bytes = 0
+                with open(partial, 'ab' if offset else 'wb') as f:
+                    bytes_received = offset
+                    with conn.transfercmd(f'RETR {remote_path}', rest=offset or None) as sock:
+                        tuner.tune_socket(sock, receive=True)
+                        while True:
+                            data = sock.recv(tuner.block_size)
+                            if inflater is not None:
+                                # Пустой data - конец потока, дописываем остаток распаковки
+                                block = inflater.decompress(data) if data else inflater.flush()
+                            else:
+                                block = data
+                            if block:
+                                f.write(block)
+                                if digest is not None:
+                                    digest.update(block)
+                                bytes_received += len(block)
+                                if progress_callback:
+                                    progress_callback(bytes_received, file_size)
+                            if not data:
+                                break
+                            wire_bytes += len(data)
+                            tuner.record(len(data), sock, receive=True)
+                        self._unwrap_data_socket(sock)
+                    conn.voidresp()
+                if inflater is not None:
+                    if not inflater.eof:
+                        raise EOFError("Поток MODE Z оборвался")
+                    self._record_compression(remote_path, bytes_received, wire_bytes)
+            self._remember_tuner(tuner)
+        return digest
+
+    def _segment_count(self, file_size: int) -> int:
+        threshold = self.settings.get('segment_threshold', 64 * 1024 * 1024)
+        if not threshold or file_size < threshold or not self.supports('REST'):
+            return 0
+
+        # Сегменты берем только из свободных соединений пула, чтобы не ждать другие передачи
+        stats = self.pool.stats()
+        segments = min(self.settings.get('segment_count', 4),
+                       stats['size'] - stats['in_use'],
+                       file_size // self.MIN_SEGMENT_SIZE)
+        return segments if segments >= 2 else 0
+
+    def _remote_mtime(self, conn: FTP, path: str) -> float:
+        # 0.0 - сервер не дал MDTM; download_offset тогда от докачки отказывается
+        try:
+            return parse_mlsd_time(conn.sendcmd(f'MDTM {path}')[4:].strip())
+        except error_perm:
+            return 0.0
+
+    def _use_compression(self, path: str, file_size: int, offset: int) -> bool:
+        # Докачка идет в режиме S: REST в MODE Z серверы понимают по-разному
+        return (not offset and self.settings.get('compress_transfers', True)
+                and supports_mode_z(self.features)
+                and should_compress(path, file_size, self.settings.get('compress_min_size', 64 * 1024)))
+
+    @contextmanager
+    def _transfer_mode(self, conn: FTP, compressed: bool) -> Iterator[bool]:
+        # MODE действует на все передачи соединения, включая списки каталогов,
+        # поэтому в пул соединение возвращается в режиме S
+        if compressed:
+            try:
+                conn.voidcmd('MODE Z')
+            except error_perm as e:
+                debug_log(f"DEBUG: FTPClient: Сервер отклонил MODE Z: {str(e)}")
+                compressed = False
+        if not compressed:
+            yield False
+            return
+        try:
+            yield True
+        except error_perm:
+            conn.voidcmd('MODE S')
+            raise
+        conn.voidcmd('MODE S')
+
+    def _record_compression(self, path: str, raw_bytes: int, wire_bytes: int) -> None:
+        self.compression.record(raw_bytes, wire_bytes)
+        if wire_bytes:
+            debug_log(f"DEBUG: FTPClient: MODE Z {path}: {raw_bytes} -> {wire_bytes} байт "
+                      f"(сжатие {raw_bytes / wire_bytes:.1f}x)")
+
+    def _start_digest(self, local_path: str, offset: int):
+        command = self.hash_command
+        if command is None or not self.settings.get('verify_integrity', True):
+            return None
+        digest = new_digest(command[1])
+        if offset:
+            # При докачке уже имеющееся начало файла хешируем с диска
+            file_digest(local_path, command[1], limit=offset, digest=digest)
+        return digest
+
+    def _check_digest(self, conn: FTP, remote_path: str, digest) -> Tuple[Optional[bool], str]:
+        # None - проверить не удалось (сервер отказал в хеше именно этого файла)
+        command = self.hash_command
+        name = HASH_NAMES[command[1]]
+        try:
+            expected = remote_hash(conn, command, remote_path)
+        except (error_perm, IndexError) as e:
+            debug_log(f"DEBUG: FTPClient: Не удалось получить {name} для {remote_path}: {str(e)}")
+            return None, f"Контрольная сумма недоступна: {str(e)}"
+
+        actual = digest.hexdigest()
+        if same_hash(expected, actual):
+            debug_log(f"DEBUG: FTPClient: {name} {remote_path} совпадает")
+            return True, f"Контрольная сумма {name} совпадает"
+        debug_log(f"DEBUG: FTPClient: {name} {remote_path} не совпадает: {actual} != {expected}")
+        return False, f"Контрольная сумма {name} не совпадает: локально {actual}, на сервере {expected}"
+
+    def verify_files(self, files: List[Tuple[str, str]]) -> Dict[str, Tuple[Optional[bool], str]]:
+        # Сверка уже переданных пар (локальный путь, удаленный путь): локальные хеши
+        # и запросы к серверу идут параллельно по соединениям пула
+        command = self.hash_command
+        if not self.pool or command is None:
+            return {remote: (None, "Сервер не поддерживает контрольные суммы") for _, remote in files}
+
+        def check(pair: Tuple[str, str]) -> Tuple[Optional[bool], str]:
+            local_path, remote_file = pair
+            try:
+                digest = file_digest(local_path, command[1])
+                with self.pool.connection() as conn:
+                    return self._check_digest(conn, self._remote_path(remote_file), digest)
+            except Exception as e:
+                return None, str(e)
+
+        with ThreadPoolExecutor(max_workers=self.settings.get('pool_size', 4),
+                                thread_name_prefix='verify') as executor:
+            return dict(zip((remote for _, remote in files), executor.map(check, files)))
+
+    def _retry_transfer(self, action: Callable[[], Tuple[bool, str]], name: str) -> Tuple[bool, str]:
+        attempts = 1
+        if self.settings.get('resume_transfers', True):
+            attempts += max(0, int(self.settings.get('reconnect_attempts', 3)))
+        delay = self.settings.get('retry_delay', 2)
+
+        attempt = 1
+        while True:
+            try:
+                return action()
+            except TransferPaused as e:
+                # Соединение уже вернулось в пул, ждем возобновления и продолжаем с места остановки
+                self.upload_states.flush()
+                debug_log(f"DEBUG: Передача {name} приостановлена")
+                e.wait()
+            except InterruptedError:
+                self.upload_states.flush()
+                return False, "Передача отменена"
+            except (error_perm, PermissionError, FileNotFoundError, IsADirectoryError) as e:
+                return False, str(e)
+            except PoolTimeout:
+                # Пул занят другими передачами - это не обрыв связи, попытку не расходуем
+                if not self.pool:
+                    return False, "Нет подключения"
+                debug_log(f"DEBUG: Нет свободного соединения для {name}, ждем")
+            except (OSError, EOFError, error_temp, error_reply, error_proto) as e:
+                # Обрыв связи: повторяем, передача продолжится с места разрыва.
+                # Состояние дозагрузки сохраняем сразу - программа может и не дожить до повтора
+                self.upload_states.flush()
+                if attempt == attempts or not self.pool:
+                    return False, str(e)
+                debug_log(f"DEBUG: Обрыв передачи {name}: {str(e)}, повтор {attempt} из {attempts - 1}")
+                time.sleep(delay * attempt)
+                attempt += 1
+            except Exception as e:
+                return False, str(e)
+
+    def download_tree(self, remote_dir: str, local_dir: str,
+                      progress_callback=None) -> Tuple[bool, str]:
+        if not self.ftp or not self.pool:
+            return False, "Нет подключения"
 
-        except Exception as e:
-            if os.path.exists(local_path):
-                os.remove(local_path)
-            return False, str(e)
+        with self._tree_workers() as workers:
+            downloader = TreeDownloader(self, workers=workers)
+            return downloader.run(self._remote_path(remote_dir), local_dir, progress_callback)
+
+    @contextmanager
+    def _tree_workers(self) -> Iterator[int]:
+        # Дерево оставляет одно соединение пула под чтение списков папок, а деревья,
+        # запущенные одновременно (например, заданиями очереди), делят остальные между собой
+        with self._tree_lock:
+            self._active_trees += 1
+            active = self._active_trees
+        try:
+            yield max(1, (self.pool.size - 1) // active)
+        finally:
+            with self._tree_lock:
+                self._active_trees -= 1
 
     def upload_file(self, local_path: str, remote_file: str,
                     progress_callback=None) -> Tuple[bool, str]:
-        if not self.ftp:
+        if not self.ftp or not self.pool:
             return False, "Нет подключения"
 
-        try:
-            file_size = os.path.getsize(local_path)
-            buffer_size = self.settings.get('buffer_size', 8192)
+        remote_path = self._remote_path(remote_file)
+        return self._retry_transfer(
+            lambda: self._upload_once(local_path, remote_path, progress_callback),
+            remote_path)
+
+    def _upload_once(self, local_path: str, remote_path: str, progress_callback) -> Tuple[bool, str]:
+        file_size = os.path.getsize(local_path)
+        resume = self.settings.get('resume_transfers', True)
+        params = self.connection_params or {}
+        key = f"{params.get('user')}@{params.get('host')}:{params.get('port')}{remote_path}"
+        parent, name = posixpath.split(remote_path)
+
+        with self.pool.connection() as conn:
+            conn.voidcmd('TYPE I')
+            offset = 0
+            if resume:
+                try:
+                    remote_size = conn.size(remote_path)
+                except error_perm:
+                    remote_size = 0
+                offset = self.upload_states.offset(key, local_path, remote_size or 0)
+                self.upload_states.put(key, local_path)
+
+            command, rest = f'STOR {remote_path}', None
+            if offset:
+                debug_log(f"DEBUG: Дозагрузка {remote_path} с позиции {offset}")
+                if self.supports('REST'):
+                    rest = offset
+                else:
+                    command = f'APPE {remote_path}'
 
-            with self.ftp_lock:
+            digest = self._start_digest(local_path, offset)
+            tuner = self._create_tuner(file_size)
+            with self._transfer_mode(conn, self._use_compression(local_path, file_size, offset)) as compressed:
+                deflater = compressor(self.settings.get('compress_level', 6)) if compressed else None
+                wire_bytes = 0
                 with open(local_path, 'rb') as f:
-                    bytes_sent = 0
-
-                    def callback(block):
-                        nonlocal bytes_sent
-                        bytes_sent += len(block)
-                        if progress_callback:
-                            progress_callback(bytes_sent, file_size)
-                        return block
-
-                    self.ftp.storbinary(f'STOR {remote_file}', f, buffer_size, callback)
-
-                uploaded_size = self.ftp.size(remote_file)
-                if uploaded_size != file_size:
-                    self.ftp.delete(remote_file)
-                    return False, "Ошибка загрузки: размер файла не совпадает"
-
-                return True, "Файл успешно загружен"
-
-        except Exception as e:
-            return False, str(e)
+                    f.seek(offset)
+                    bytes_sent = offset
+                    with conn.transfercmd(command, rest) as sock:
+                        tuner.tune_socket(sock, receive=False)
+                        while True:
+                            block = f.read(tuner.block_size)
+                            if deflater is not None:
+                                # Пустой block - конец файла, завершаем поток deflate
+                                data = deflater.compress(block) if block else deflater.flush()
+                            else:
+                                data = block
+                            if data:
+                                sock.sendall(data)
+                                wire_bytes += len(data)
+                                tuner.record(len(data), sock, receive=False)
+                            if not block:
+                                break
+                            if digest is not None:
+                                digest.update(block)
+                            bytes_sent += len(block)
+                            if progress_callback:
+                                progress_callback(bytes_sent, file_size)
+                        self._unwrap_data_socket(sock)
+                    conn.voidresp()
+                if deflater is not None:
+                    self._record_compression(remote_path, bytes_sent, wire_bytes)
+            self._remember_tuner(tuner)
+
+            uploaded_size = conn.size(remote_path)
+            self.upload_states.remove(key)
+            if uploaded_size != file_size:
+                conn.delete(remote_path)
+                self.remote_cache.remove_entry(parent, name)
+                self._forget_listing(parent)
+                return False, "Ошибка загрузки: размер файла не совпадает"
+
+            if digest is not None:
+                verified, message = self._check_digest(conn, remote_path, digest)
+                if verified is False:
+                    conn.delete(remote_path)
+                    self.remote_cache.remove_entry(parent, name)
+                    self._forget_listing(parent)
+                    return False, message
+
+        self.remote_cache.add_entry(parent, RemoteEntry(name, False, file_size, time.time()))
+        self._forget_listing(parent)
+
+        return True, "Файл успешно загружен"
 
     def upload_folder(self, local_path: str, remote_folder: str,
                       progress_callback=None) -> Tuple[bool, str]:
-        try:
-            with self.ftp_lock:
-                try:
-                    self.ftp.mkd(remote_folder)
-                except:
-                    pass
+        if not self.ftp or not self.pool:
+            return False, "Нет подключения"
 
-                current_remote = self.ftp.pwd()
-                self.ftp.cwd(remote_folder)
+        with self._tree_workers() as workers:
+            uploader = TreeUploader(self, workers=workers)
+            return uploader.run(local_path, self._remote_path(remote_folder), progress_callback)
 
-                for item in os.listdir(local_path):
-                    local_item_path = os.path.join(local_path, item)
+    def plan_sync(self, local_dir: str, remote_dir: str, direction: str = 'upload',
+                  delete: bool = False, compare_hash: bool = False) -> SyncPlan:
+        if not self.ftp or not self.pool:
+            raise ConnectionError("Нет подключения")
 
-                    if os.path.isfile(local_item_path):
-                        success, message = self.upload_file(local_item_path, item, progress_callback)
-                        if not success:
-                            return False, f"Ошибка загрузки {item}: {message}"
-                    elif os.path.isdir(local_item_path):
-                        success, message = self.upload_folder(local_item_path, item, progress_callback)
-                        if not success:
-                            return False, message
+        sync = DirectorySync(self, workers=self.settings.get('pool_size', 4), delete=delete,
+                             compare_hash=compare_hash,
+                             mtime_tolerance=self.settings.get('sync_mtime_tolerance', 2))
+        return sync.plan(local_dir, self._remote_path(remote_dir), direction)
 
-                self.ftp.cwd(current_remote)
-                return True, "Папка успешно загружена"
+    def sync_directories(self, plan: SyncPlan, progress_callback=None) -> Tuple[bool, str]:
+        if not self.ftp or not self.pool:
+            return False, "Нет подключения"
 
-        except Exception as e:
-            return False, str(e)
+        with self._tree_workers() as workers:
+            sync = DirectorySync(self, workers=workers)
+            return sync.run(plan, progress_callback)
 
     def create_directory(self, dirname: str) -> Tuple[bool, str]:
         if not self.ftp:
@@ -255,13 +1008,19 @@ class FTPClient:
                 return False, "Пустое имя директории"
 
             with self.ftp_lock:
-                items = self._get_file_list()
-                for name, is_dir in items:
-                    if name == dirname and is_dir:
-                        return False, f"Папка '{dirname}' уже существует"
+                # Имя может быть и абсолютным путем; список родителя читаем по соединению
+                # из пула, чтобы не сдвигать текущую папку управляющего соединения
+                parent, name = posixpath.split(posixpath.join(self.ftp.pwd(), dirname))
+                if self.pool:
+                    with self.pool.connection() as conn:
+                        entries = self._list_dir(conn, parent, use_cache=False)
+                    for entry in entries:
+                        if entry.name == name and entry.is_dir:
+                            return False, f"Папка '{dirname}' уже существует"
 
                 try:
                     self.ftp.mkd(dirname)
+                    self.invalidate_cache(parent)
                     return True, f"Папка '{dirname}' создана"
                 except error_perm as e:
                     if '550' in str(e):
@@ -315,6 +1074,7 @@ class FTPClient:
 
                         debug_log(f"DEBUG: Пытаемся удалить пустую директорию {name}")
                         self.ftp.rmd(name)
+                        self.invalidate_cache(posixpath.join(current_dir, name), tree=True)
                         debug_log(f"DEBUG: Директория {name} успешно удалена")
                         return True, f"Папка '{name}' удалена"
                     except Exception as e:
@@ -327,6 +1087,10 @@ class FTPClient:
                     try:
                         debug_log(f"DEBUG: Пытаемся удалить файл {name}")
                         self.ftp.delete(name)
+                        # Имя может быть и абсолютным путем
+                        parent, base = posixpath.split(posixpath.join(current_dir, name))
+                        self.remote_cache.remove_entry(parent, base)
+                        self._forget_listing(parent)
                         debug_log(f"DEBUG: Файл {name} успешно удален")
                         return True, f"Файл '{name}' удален"
                     except Exception as e:
@@ -339,107 +1103,27 @@ class FTPClient:
             debug_log(f"DEBUG: Критическая ошибка: {str(e)}")
             return False, str(e)
 
-    def delete_directory_recursive(self, dirname: str) -> Tuple[bool, str]:
-        if not self.ftp:
+    def delete_directory_recursive(self, dirname: str, progress_callback=None) -> Tuple[bool, str]:
+        if not self.ftp or not self.pool:
             return False, "Нет подключения"
 
-        debug_log(f"\nDEBUG: Начинаем удаление директории {dirname}")
+        remote_path = self._remote_path(dirname)
+        if remote_path.rstrip('/') == '':
+            return False, "Нельзя удалить корневую директорию"
 
+        deleter = TreeDeleter(self, workers=self.settings.get('pool_size', 4),
+                              pipeline=self.settings.get('delete_pipeline', 16))
         try:
-            with self.ftp_lock:
-                current_dir = self.ftp.pwd()
-                debug_log(f"DEBUG: Текущая директория: {current_dir}")
-                try:
-                    debug_log(f"DEBUG: Пытаемся перейти в директорию {dirname}")
-                    self.ftp.cwd(dirname)
-                    current_path = self.ftp.pwd()
-                    debug_log(f"DEBUG: Успешно перешли. Текущий путь: {current_path}")
-                except Exception as e:
-                    debug_log(f"DEBUG: Ошибка при переходе в директорию: {str(e)}")
-                    return False, f"Не удалось перейти в директорию {dirname}: {str(e)}"
-
-                try:
-                    files = []
-
-                    def list_callback(line):
-                        debug_log(f"DEBUG: Получена строка листинга: {line}")
-                        files.append(line)
-
-                    debug_log("DEBUG: Запрашиваем список файлов")
-                    self.ftp.retrlines('LIST', list_callback)
-                    debug_log(f"DEBUG: Получен список файлов: {len(files)} элементов")
-                except Exception as e:
-                    debug_log(f"DEBUG: Ошибка при получении списка файлов: {str(e)}")
-                    self.ftp.cwd(current_dir)
-                    return False, f"Не удалось получить список файлов: {str(e)}"
-
-                for file_info in files:
-                    debug_log(f"DEBUG: Обработка элемента: {file_info}")
-
-                    if file_info.endswith('.') or file_info.endswith('..'):
-                        debug_log("DEBUG: Пропускаем специальную директорию")
-                        continue
-                    parts = file_info.split(maxsplit=8)
-                    if len(parts) < 9:
-                        debug_log("DEBUG: Некорректный формат строки листинга")
-                        continue
-
-                    name = parts[8]
-                    is_dir = file_info.startswith('d')
-                    debug_log(f"DEBUG: Обнаружен {'каталог' if is_dir else 'файл'}: {name}")
-
-                    try:
-                        if is_dir:
-                            debug_log(f"DEBUG: Удаляем содержимое поддиректории: {name}")
-                            self.ftp.cwd(name)
-
-                            subfiles = []
-                            self.ftp.retrlines('LIST', subfiles.append)
-                            for subfile_info in subfiles:
-                                if subfile_info.endswith('.') or subfile_info.endswith('..'):
-                                    continue
-                                subparts = subfile_info.split(maxsplit=8)
-                                if len(subparts) >= 9:
-                                    subname = subparts[8]
-                                    if subfile_info.startswith('d'):
-                                        debug_log(f"DEBUG: Рекурсивно удаляем поддиректорию: {subname}")
-                                        self.delete_directory_recursive(subname)
-                                    else:
-                                        debug_log(f"DEBUG: Удаляем файл в поддиректории: {subname}")
-                                        self.ftp.delete(subname)
-                            self.ftp.cwd('..')
-
-                            debug_log(f"DEBUG: Удаляем пустую поддиректорию: {name}")
-                            self.ftp.rmd(name)
-                            debug_log(f"DEBUG: Поддиректория {name} успешно удалена")
-                        else:
-                            debug_log(f"DEBUG: Удаляем файл: {name}")
-                            self.ftp.delete(name)
-                            debug_log(f"DEBUG: Файл {name} успешно удален")
-                    except Exception as e:
-                        debug_log(f"DEBUG: Ошибка при обработке элемента {name}: {str(e)}")
-                        self.ftp.cwd(current_dir)
-                        return False, f"Ошибка при удалении {name}: {str(e)}"
-
-                debug_log(f"DEBUG: Возвращаемся в исходную директорию: {current_dir}")
-                self.ftp.cwd(current_dir)
-
-                try:
-                    debug_log(f"DEBUG: Удаляем исходную директорию: {dirname}")
-                    self.ftp.rmd(dirname)
-                    debug_log(f"DEBUG: Директория {dirname} успешно удалена")
-                    return True, f"Папка '{dirname}' и её содержимое удалены"
-                except Exception as e:
-                    error_msg = str(e)
-                    debug_log(f"DEBUG: Ошибка при удалении директории: {error_msg}")
-                    if "550" in error_msg:
-                        debug_log("DEBUG: Ошибка 550 - возможно, директория не пуста или нет прав")
-                    return False, f"Не удалось удалить директорию {dirname}: {error_msg}"
-
+            success, message = deleter.run(remote_path, progress_callback)
         except Exception as e:
             debug_log(f"DEBUG: Критическая ошибка: {str(e)}")
             return False, str(e)
 
+        if success:
+            debug_log(f"DEBUG: Директория {dirname} успешно удалена, {message}")
+            return True, f"Папка '{dirname}' и её содержимое удалены"
+        return False, message
+
     def rename_item(self, old_name: str, new_name: str) -> Tuple[bool, str]:
         if not self.ftp:
             return False, "Нет подключения"
@@ -447,6 +1131,9 @@ class FTPClient:
         try:
             with self.ftp_lock:
                 self.ftp.rename(str(old_name), str(new_name))
+                current_dir = self.ftp.pwd()
+                self.invalidate_cache(posixpath.join(current_dir, str(old_name)), tree=True)
+                self.invalidate_cache(posixpath.join(current_dir, str(new_name)), tree=True)
                 return True, "Успешно переименовано"
         except Exception as e:
             return False, str(e)
@@ -472,39 +1159,6 @@ class FTPClient:
         except:
             return "/"
 
-    def _parse_ftp_time(self, time_str: str) -> str:
-        try:
-            current_year = datetime.now().year
-            months = {
-                'Jan': 1, 'Feb': 2, 'Mar': 3, 'Apr': 4, 'May': 5, 'Jun': 6,
-                'Jul': 7, 'Aug': 8, 'Sep': 9, 'Oct': 10, 'Nov': 11, 'Dec': 12
-            }
-
-            parts = time_str.split()
-            if len(parts) != 3:
-                return time_str
-
-            month = months.get(parts[0], 1)
-            day = int(parts[1])
-            if ':' in parts[2]:
-                hour, minute = map(int, parts[2].split(':'))
-                year = current_year
-
-                dt = datetime(year, month, day, hour, minute, tzinfo=timezone.utc)
-
-                if dt > datetime.now(timezone.utc):
-                    dt = datetime(year - 1, month, day, hour, minute, tzinfo=timezone.utc)
-
-                local_dt = dt.astimezone()
-                return local_dt.strftime("%Y-%m-%d %H:%M")
-            else:
-                year = int(parts[2])
-                dt = datetime(year, month, day, 0, 0, tzinfo=timezone.utc)
-                local_dt = dt.astimezone()
-                return local_dt.strftime("%Y-%m-%d %H:%M")
-        except:
-            return time_str
-
     def _get_optimal_buffer_size(self, file_size: int) -> int:
         if file_size < 1024 * 1024:
             return 8192
@@ -513,6 +1167,39 @@ class FTPClient:
         else:    
             return 65536
 
+    def _create_tuner(self, file_size: int) -> TransferTuner:
+        params = self.connection_params or {}
+        remembered = self.settings.get('block_sizes', {}).get(str(params.get('host')))
+        start = remembered or max(self.settings.get('buffer_size', 8192),
+                                  self._get_optimal_buffer_size(file_size))
+        return TransferTuner(start, adaptive=self.settings.get('adaptive_buffer', True))
+
+    def _remember_tuner(self, tuner: TransferTuner) -> None:
+        if not tuner.adaptive or not tuner.measured():
+            return
+        host = str((self.connection_params or {}).get('host'))
+        with self.tuner_lock:
+            block_sizes = dict(self.settings.get('block_sizes', {}))
+            if block_sizes.get(host) == tuner.best_size:
+                return
+            block_sizes[host] = tuner.best_size
+            # Только в памяти: файл настроек пишется при отключении, а не из потоков передачи
+            self.settings.set('block_sizes', block_sizes)
+            self._tuner_changed = True
+        debug_log(f"DEBUG: FTPClient: Размер блока для {host}: {tuner.best_size} байт "
+                  f"({tuner.best_rate / 1024 / 1024:.1f} МБ/с)")
+
+    def _save_block_sizes(self) -> None:
+        with self.tuner_lock:
+            changed, self._tuner_changed = self._tuner_changed, False
+        if changed:
+            self.settings.save_settings()
+
+    @staticmethod
+    def _unwrap_data_socket(sock) -> None:
+        if isinstance(sock, ssl.SSLSocket):
+            sock.unwrap()
+
     def start_connection_monitor(self, on_connection_lost: Callable):
         def monitor():
             while not self.stop_monitor:
@@ -523,10 +1210,13 @@ class FTPClient:
                 except:
                     if self.settings.get('auto_reconnect', True):
                         attempts = self.settings.get('reconnect_attempts', 3)
-                        for _ in range(attempts):
+                        for attempt in range(attempts):
                             success, _ = self.reconnect()
                             if success:
+                                debug_log("DEBUG: FTPClient: Соединение восстановлено, "
+                                          "прерванные передачи продолжатся с места разрыва")
                                 break
+                            time.sleep(self.settings.get('retry_delay', 2) * (attempt + 1))
                         else:
                             on_connection_lost()
                     else:
@@ -544,45 +1234,28 @@ class FTPClient:
             self.monitor_thread = None
 
     def copy_file(self, source: str, destination: str) -> Tuple[bool, str]:
-         
-        if not self.ftp:
+        if not self.ftp or not self.pool:
             return False, "Нет подключения"
 
         debug_log(f"\nDEBUG: Начинаем копирование файла {source} -> {destination}")
 
         try:
-            with self.ftp_lock:
-                try:
-                    current_dir = self.ftp.pwd()
-                    self.ftp.cwd(source)
-                    self.ftp.cwd(current_dir)
-                    debug_log("DEBUG: Источник является директорией")
-                    return self.copy_directory(source, destination)
-                except:
-                    debug_log("DEBUG: Источник является файлом")
-                    pass
-
-                import tempfile
-                with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                    temp_path = temp_file.name
-                    debug_log(f"DEBUG: Создан временный файл: {temp_path}")
-
-                    try:
-                        debug_log(f"DEBUG: Скачиваем файл {source}")
-                        self.ftp.retrbinary(f'RETR {source}', temp_file.write)
-                        temp_file.close()
-                        debug_log(f"DEBUG: Загружаем файл как {destination}")
-                        with open(temp_path, 'rb') as f:
-                            self.ftp.storbinary(f'STOR {destination}', f)
-
-                        debug_log("DEBUG: Копирование успешно завершено")
-                        return True, "Файл успешно скопирован"
-                    finally:
-                        try:
-                            os.unlink(temp_path)
-                            debug_log("DEBUG: Временный файл удален")
-                        except:
-                            pass
+            source_path = self._remote_path(source)
+            destination_path = self._remote_path(destination)
+            with self.pool.connection() as conn:
+                entry = self._stat(conn, source_path)
+            if entry is None:
+                return False, f"Ошибка копирования файла: {source} не найден"
+
+            if entry.is_dir:
+                debug_log("DEBUG: Источник является директорией")
+                return self.copy_directory(source_path, destination_path)
+
+            debug_log("DEBUG: Источник является файлом")
+            RemoteCopier(self).copy(source_path, destination_path)
+            self.invalidate_cache(posixpath.dirname(destination_path))
+            debug_log("DEBUG: Копирование успешно завершено")
+            return True, "Файл успешно скопирован"
 
         except Exception as e:
             error_msg = str(e)
@@ -590,99 +1263,56 @@ class FTPClient:
             return False, f"Ошибка копирования файла: {error_msg}"
 
     def copy_directory(self, source: str, destination: str) -> Tuple[bool, str]:
-        if not self.ftp:
+        if not self.ftp or not self.pool:
             return False, "Нет подключения"
 
         debug_log(f"\nDEBUG: Начинаем копирование директории {source} -> {destination}")
 
         try:
-            with self.ftp_lock:
-                current_dir = self.ftp.pwd()
+            source_path = self._remote_path(source)
+            destination_path = self._remote_path(destination)
+            with self.pool.connection() as conn:
                 try:
-                    debug_log(f"DEBUG: Создаем директорию {destination}")
-                    self.ftp.mkd(destination)
-                except:
+                    debug_log(f"DEBUG: Создаем директорию {destination_path}")
+                    conn.mkd(destination_path)
+                except error_perm:
                     debug_log("DEBUG: Директория назначения уже существует или ошибка создания")
-                    pass
-
-                try:
-                    debug_log(f"DEBUG: Переходим в исходную директорию {source}")
-                    self.ftp.cwd(source)
-                    source_dir = self.ftp.pwd()
-
-                      
-                    items = []
-
-                    def list_callback(line):
-                        items.append(line)
 
-                    self.ftp.retrlines('LIST', list_callback)
-                    debug_log(f"DEBUG: Получен список файлов: {len(items)} элементов")
-
-                      
-                    self.ftp.cwd(current_dir)
-                    self.ftp.cwd(destination)
-                    dest_dir = self.ftp.pwd()
-
-                    for item in items:
-                        parts = item.split(maxsplit=8)
-                        if len(parts) < 9:
-                            continue
-
-                        name = parts[8]
-                        if name in ('.', '..'):
-                            continue
-
-                        is_dir = item.startswith('d')
-
-                        if is_dir:
-                            debug_log(f"DEBUG: Копируем поддиректорию {name}")
-                            try:
-                                self.ftp.mkd(name)
-                            except:
-                                pass
-
-                            self.ftp.cwd(source_dir)    
-                            success, message = self.copy_directory(f"{source}/{name}", f"{destination}/{name}")
-                            if not success:
-                                debug_log(f"DEBUG: Ошибка копирования поддиректории: {message}")
-                                return False, f"Ошибка копирования поддиректории {name}: {message}"
-                            self.ftp.cwd(dest_dir)    
-                        else:
-                            debug_log(f"DEBUG: Копируем файл {name}")
-                              
-                            import tempfile
-                            with tempfile.NamedTemporaryFile(delete=False) as temp_file:
-                                temp_path = temp_file.name
-                                debug_log(f"DEBUG: Создан временный файл: {temp_path}")
-
-                                try:
-                                    self.ftp.cwd(source_dir)
-                                    self.ftp.retrbinary(f'RETR {name}', temp_file.write)
-                                    temp_file.close()
-
-                                    self.ftp.cwd(dest_dir)
-                                    with open(temp_path, 'rb') as f:
-                                        self.ftp.storbinary(f'STOR {name}', f)
-
-                                    debug_log(f"DEBUG: Файл {name} успешно скопирован")
-                                finally:
-                                    try:
-                                        os.unlink(temp_path)
-                                        debug_log("DEBUG: Временный файл удален")
-                                    except:
-                                        pass
-
-                    debug_log("DEBUG: Копирование директории успешно завершено")
-                    return True, "Директория успешно скопирована"
-
-                finally:
-                    try:
-                        self.ftp.cwd(current_dir)
-                    except:
-                        pass
+                entries = self._list_dir_strict(conn, source_path)
+                debug_log(f"DEBUG: Получен список файлов: {len(entries)} элементов")
+
+            copier = RemoteCopier(self)
+            for entry in entries:
+                if entry.is_dir:
+                    continue
+
+                debug_log(f"DEBUG: Копируем файл {entry.name}")
+                copier.copy(posixpath.join(source_path, entry.name),
+                            posixpath.join(destination_path, entry.name))
+                debug_log(f"DEBUG: Файл {entry.name} успешно скопирован")
+
+            for entry in entries:
+                if not entry.is_dir:
+                    continue
+                if entry.is_link:
+                    # В ссылки на папки не заходим: ссылка на '..' или предка зациклила бы копирование
+                    debug_log(f"DEBUG: Пропускаем ссылку на папку {entry.name}")
+                    continue
+
+                name = entry.name
+                debug_log(f"DEBUG: Копируем поддиректорию {name}")
+                success, message = self.copy_directory(posixpath.join(source_path, name),
+                                                       posixpath.join(destination_path, name))
+                if not success:
+                    debug_log(f"DEBUG: Ошибка копирования поддиректории: {message}")
+                    return False, f"Ошибка копирования поддиректории {name}: {message}"
+
+            self.invalidate_cache(destination_path, tree=True)
+            debug_log("DEBUG: Копирование директории успешно завершено")
+            return True, "Директория успешно скопирована"
 
         except Exception as e:
+            self.invalidate_cache(self._remote_path(destination), tree=True)
             error_msg = str(e)
             debug_log(f"DEBUG: Ошибка копирования директории: {error_msg}")
-            return False, f"Ошибка копирования директории: {error_msg}"
\ No newline at end of file
+            return False, f"Ошибка копирования директории: {error_msg}"
@@ -0,0 +1,138 @@
+from ftplib import FTP, FTP_TLS
+from threading import Lock
+from typing import Dict, Any, Optional
+import socket
+import ssl
+import time
+
+
+TLS_MODES = ('none', 'explicit', 'implicit')
+IMPLICIT_PORT = 990
+
+
+def create_tls_context(verify: bool = True) -> ssl.SSLContext:
+    # Один контекст на подключение: SSLSession можно возобновить только в контексте,
+    # который ее создал, поэтому все соединения пула делят его
+    context = ssl.create_default_context()
+    if not verify:
+        context.check_hostname = False
+        context.verify_mode = ssl.CERT_NONE
+    return context
+
+
+class TLSSessionCache:
+    MAX_HOSTS = 64
+
+    def __init__(self):
+        self._lock = Lock()
+        self._sessions: Dict[str, ssl.SSLSession] = {}
+        self._stats = {
+            'control': [0, 0, 0.0, 0.0],
+            'data': [0, 0, 0.0, 0.0]
+        }
+
+    def get(self, key: str) -> Optional[ssl.SSLSession]:
+        with self._lock:
+            return self._sessions.get(key)
+
+    def put(self, key: str, session: Optional[ssl.SSLSession]) -> None:
+        if session is None:
+            return
+        with self._lock:
+            if key not in self._sessions and len(self._sessions) >= self.MAX_HOSTS:
+                self._sessions.pop(next(iter(self._sessions)))
+            self._sessions[key] = session
+
+    def record(self, channel: str, seconds: float, reused: bool) -> None:
+        # [рукопожатий, возобновлено, суммарное время, последнее время]
+        with self._lock:
+            stats = self._stats[channel]
+            stats[0] += 1
+            stats[1] += int(reused)
+            stats[2] += seconds
+            stats[3] = seconds
+
+    def clear(self) -> None:
+        with self._lock:
+            self._sessions.clear()
+            for stats in self._stats.values():
+                stats[:] = [0, 0, 0.0, 0.0]
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                channel: {
+                    'handshakes': count,
+                    'resumed': resumed,
+                    'avg_ms': total / count * 1000 if count else 0.0,
+                    'last_ms': last * 1000
+                }
+                for channel, (count, resumed, total, last) in self._stats.items()
+            }
+
+
+class SessionFTP_TLS(FTP_TLS):
+    # FTP_TLS, который возобновляет TLS-сессии: управляющее соединение берет
+    # сохраненную для сервера сессию, каналы данных - сессию своего управляющего
+    # соединения (этого же требуют vsftpd с require_ssl_reuse и FileZilla Server)
+    def __init__(self, context: ssl.SSLContext, sessions: TLSSessionCache,
+                 implicit: bool = False, **kwargs):
+        self.sessions = sessions
+        self.implicit = implicit
+        super().__init__(context=context, **kwargs)
+
+    @property
+    def session_key(self) -> str:
+        return f"{self.host}:{self.port}"
+
+    def connect(self, host='', port=0, timeout=-999, source_address=None):
+        if not self.implicit:
+            return super().connect(host, port, timeout, source_address)
+
+        # Неявный FTPS: TLS начинается сразу, до приветствия сервера
+        if host != '':
+            self.host = host
+        if port > 0:
+            self.port = port
+        if timeout != -999:
+            self.timeout = timeout
+        if source_address is not None:
+            self.source_address = source_address
+        sock = socket.create_connection((self.host, self.port), self.timeout,
+                                        source_address=self.source_address)
+        self.af = sock.family
+        self.sock = self._wrap(sock, self.sessions.get(self.session_key), 'control')
+        self.file = self.sock.makefile('r', encoding=self.encoding)
+        self.welcome = self.getresp()
+        return self.welcome
+
+    def auth(self):
+        if isinstance(self.sock, ssl.SSLSocket):
+            raise ValueError("Already using TLS")
+        resp = self.voidcmd('AUTH TLS')
+        self.sock = self._wrap(self.sock, self.sessions.get(self.session_key), 'control')
+        self.file = self.sock.makefile(mode='r', encoding=self.encoding)
+        return resp
+
+    def remember_session(self) -> None:
+        # В TLS 1.3 билет сессии приходит после рукопожатия, поэтому сессию
+        # сохраняем, когда по соединению уже прошел обмен командами
+        if isinstance(self.sock, ssl.SSLSocket):
+            self.sessions.put(self.session_key, self.sock.session)
+
+    def ntransfercmd(self, cmd, rest=None):
+        conn, size = FTP.ntransfercmd(self, cmd, rest)
+        if self._prot_p:
+            try:
+                conn = self._wrap(conn, self.sock.session, 'data')
+            except BaseException:
+                conn.close()
+                raise
+        return conn, size
+
+    def _wrap(self, sock: socket.socket, session: Optional[ssl.SSLSession],
+              channel: str) -> ssl.SSLSocket:
+        started = time.perf_counter()
+        tls = self.context.wrap_socket(sock, server_hostname=self.host, session=session)
+        self.sessions.record(channel, time.perf_counter() - started, tls.session_reused)
+        return tls
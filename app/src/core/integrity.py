@@ -0,0 +1,82 @@
+from typing import Dict, Optional, Tuple
+import hashlib
+import zlib
+
+
+# Команды хеширования в порядке предпочтения: команда, алгоритм
+HASH_COMMANDS = [
+    ('XSHA256', 'sha256'),
+    ('XSHA1', 'sha1'),
+    ('XMD5', 'md5'),
+    ('XCRC', 'crc32'),
+]
+# Имена алгоритмов команды HASH (draft-bryan-ftpext-hash)
+HASH_ALGORITHMS = {'SHA-256': 'sha256', 'SHA-1': 'sha1', 'MD5': 'md5', 'CRC32': 'crc32'}
+HASH_NAMES = {algorithm: name for name, algorithm in HASH_ALGORITHMS.items()}
+
+
+class _Crc32:
+    name = 'crc32'
+
+    def __init__(self):
+        self._crc = 0
+
+    def update(self, data: bytes) -> None:
+        self._crc = zlib.crc32(data, self._crc)
+
+    def hexdigest(self) -> str:
+        return format(self._crc, '08x')
+
+
+def new_digest(algorithm: str):
+    return _Crc32() if algorithm == 'crc32' else hashlib.new(algorithm)
+
+
+def select_hash(features: Dict[str, str]) -> Optional[Tuple[str, str]]:
+    if 'HASH' in features:
+        # Алгоритмы через ';', выбранный сейчас помечен '*'; берем первый известный
+        for name in features['HASH'].split(';'):
+            algorithm = HASH_ALGORITHMS.get(name.strip().rstrip('*').upper())
+            if algorithm:
+                return 'HASH', algorithm
+    for command, algorithm in HASH_COMMANDS:
+        if command in features:
+            return command, algorithm
+    return None
+
+
+def remote_hash(conn, command: Tuple[str, str], path: str) -> str:
+    name, algorithm = command
+    if name == 'HASH':
+        conn.sendcmd(f'OPTS HASH {HASH_NAMES[algorithm]}')
+        # 213 SHA-256 0-49 <хеш> <имя>
+        return conn.sendcmd(f'HASH {path}').split()[3]
+    # 250 <хеш>, некоторые серверы добавляют имя файла
+    return conn.sendcmd(f'{name} {path}').split()[1]
+
+
+def file_digest(path: str, algorithm: str, limit: Optional[int] = None, digest=None):
+    # limit - хешировать только начало файла (уже переданную часть при докачке)
+    digest = digest or new_digest(algorithm)
+    remaining = limit
+    with open(path, 'rb') as f:
+        while remaining is None or remaining > 0:
+            block = f.read(1024 * 1024 if remaining is None else min(1024 * 1024, remaining))
+            if not block:
+                break
+            digest.update(block)
+            if remaining is not None:
+                remaining -= len(block)
+    return digest
+
+
+def normalize_hash(value: str) -> str:
+    # XCRC отдают и как 0x..., и без ведущих нулей
+    value = value.lower()
+    if value.startswith('0x'):
+        value = value[2:]
+    return value.lstrip('0') or '0'
+
+
+def same_hash(first: str, second: str) -> bool:
+    return normalize_hash(first) == normalize_hash(second)
@@ -0,0 +1,235 @@
+from typing import NamedTuple, Optional, List, Dict, Iterable, Iterator
+from datetime import datetime, timezone
+import calendar
+import re
+import stat
+import time
+
+
+class RemoteEntry(NamedTuple):
+    name: str
+    is_dir: bool
+    size: int = -1
+    modified: float = 0.0
+    permissions: str = ''
+    is_link: bool = False
+    target: str = ''
+
+
+MONTHS = {
+    'jan': 1, 'feb': 2, 'mar': 3, 'apr': 4, 'may': 5, 'jun': 6,
+    'jul': 7, 'aug': 8, 'sep': 9, 'oct': 10, 'nov': 11, 'dec': 12
+}
+
+# Unix `ls -l`: права, ссылки, владелец, [группа], размер, дата и имя.
+# Имя начинается ровно после одного пробела, поэтому ведущие пробелы сохраняются
+_UNIX_RE = re.compile(
+    r'^(?P<perm>[-bcdlpsD][-rwxsStTlL]{9}[+@.]?)\s+'
+    r'\d+\s+\S+\s+(?:\S+\s+)??'
+    r'(?P<size>\d+)\s+'
+    r'(?P<month>[A-Za-z]{3})\s+(?P<day>\d{1,2})\s+'
+    r'(?P<time>\d{1,2}:\d{2}|\d{4}) '
+    r'(?P<name>.+?)\r?$',
+    re.MULTILINE
+)
+
+# DOS/IIS: 01-15-24  10:30AM       <DIR>          folder
+_DOS_RE = re.compile(
+    r'^(?P<date>\d{2}-\d{2}-\d{2,4})\s+'
+    r'(?P<time>\d{1,2}:\d{2})(?P<ampm>[AaPp][Mm])?\s+'
+    r'(?P<size><DIR>|\d+)\s+'
+    r'(?P<name>.+?)\r?$',
+    re.MULTILINE
+)
+
+
+def parse_features(response: str) -> Dict[str, str]:
+    features = {}
+    for line in response.splitlines()[1:]:
+        if not line.startswith(' '):
+            continue
+        feature, _, params = line.strip().partition(' ')
+        features[feature.upper()] = params
+    return features
+
+
+def parse_mlsd_line(line: str) -> Optional[RemoteEntry]:
+    facts_str, sep, name = line.partition(' ')
+    if not sep or not name:
+        return None
+
+    facts = {}
+    for fact in facts_str.split(';'):
+        key, eq, value = fact.partition('=')
+        if eq:
+            facts[key.lower()] = value
+
+    # В регистр приводим только тип: цель ссылки после ':' - путь с исходным регистром
+    entry_type, _, target = facts.get('type', '').partition(':')
+    entry_type = entry_type.lower()
+    if entry_type in ('cdir', 'pdir') or name in ('.', '..'):
+        return None
+
+    # Некоторые серверы отдают тип файла в unix.mode целиком (0120777 - ссылка)
+    is_link = entry_type in ('os.unix=slink', 'os.unix=symlink') or _is_link_mode(facts.get('unix.mode', ''))
+    if not is_link:
+        target = ''
+
+    try:
+        size = int(facts.get('size', facts.get('sizd', -1)))
+    except ValueError:
+        size = -1
+
+    return RemoteEntry(
+        name=name,
+        is_dir=entry_type == 'dir' or _is_dir_target(target),
+        size=size,
+        modified=parse_mlsd_time(facts.get('modify', '')),
+        permissions=facts.get('unix.mode', facts.get('perm', '')),
+        is_link=is_link,
+        target=target
+    )
+
+
+def parse_mlsd(lines: Iterable[str]) -> List[RemoteEntry]:
+    return list(iter_mlsd(lines))
+
+
+def iter_mlsd(lines: Iterable[str]) -> Iterator[RemoteEntry]:
+    for line in lines:
+        entry = parse_mlsd_line(line)
+        if entry is not None:
+            yield entry
+
+
+def parse_mlsd_time(value: str) -> float:
+    if len(value) < 14:
+        return 0.0
+    try:
+        seconds = calendar.timegm((
+            int(value[0:4]), int(value[4:6]), int(value[6:8]),
+            int(value[8:10]), int(value[10:12]), int(value[12:14]), 0, 0, 0
+        ))
+    except ValueError:
+        return 0.0
+    if len(value) > 15 and value[14] == '.':
+        try:
+            seconds += float('0' + value[14:])
+        except ValueError:
+            pass
+    return float(seconds)
+
+
+def _is_link_mode(mode: str) -> bool:
+    try:
+        return stat.S_ISLNK(int(mode, 8))
+    except ValueError:
+        return False
+
+
+def _is_dir_target(target: str) -> bool:
+    # Цель с '/' на конце - точно папка; остальные ссылки FTPClient проверяет через CWD
+    return target.endswith('/')
+
+
+def parse_list(lines: Iterable[str], now: Optional[float] = None) -> List[RemoteEntry]:
+    return list(iter_list(lines, now))
+
+
+def iter_list(lines: Iterable[str], now: Optional[float] = None) -> Iterator[RemoteEntry]:
+    # Формат определяем по первой строке, дальше разбираем построчно по мере поступления
+    if now is None:
+        now = time.time()
+
+    pattern = None
+    for line in lines:
+        if not line or line.startswith('total '):
+            continue
+        if pattern is None:
+            if _UNIX_RE.match(line):
+                pattern, make_entry = _UNIX_RE, lambda m: _unix_entry(m, now)
+            elif _DOS_RE.match(line):
+                pattern, make_entry = _DOS_RE, _dos_entry
+            else:
+                return
+
+        match = pattern.match(line)
+        if match:
+            entry = make_entry(match)
+            if entry is not None:
+                yield entry
+
+
+def _unix_entry(match, now: float) -> Optional[RemoteEntry]:
+    perm = match.group('perm')
+    name = match.group('name')
+    target = ''
+    is_link = perm[0] == 'l'
+    if is_link and ' -> ' in name:
+        name, target = name.split(' -> ', 1)
+    if name in ('.', '..'):
+        return None
+
+    # Время LIST - местное время сервера, часовой пояс которого неизвестен; считаем его
+    # UTC, как и MLSD. Точное время дают MLSD/MDTM, которые используются, если есть
+    month = MONTHS.get(match.group('month').lower(), 1)
+    day = int(match.group('day'))
+    time_part = match.group('time')
+    try:
+        if ':' in time_part:
+            hour, minute = map(int, time_part.split(':'))
+            year = time.gmtime(now).tm_year
+            modified = calendar.timegm((year, month, day, hour, minute, 0, 0, 0, 0))
+            # Без года сервер показывает последние полгода, будущая дата - прошлый год
+            if modified > now + 86400:
+                modified = calendar.timegm((year - 1, month, day, hour, minute, 0, 0, 0, 0))
+        else:
+            modified = calendar.timegm((int(time_part), month, day, 0, 0, 0, 0, 0, 0))
+    except ValueError:
+        modified = 0
+
+    return RemoteEntry(
+        name=name,
+        is_dir=perm[0] == 'd' or _is_dir_target(target),
+        size=int(match.group('size')),
+        modified=float(modified),
+        permissions=perm,
+        is_link=is_link,
+        target=target
+    )
+
+
+def _dos_entry(match) -> Optional[RemoteEntry]:
+    name = match.group('name')
+    if name in ('.', '..'):
+        return None
+
+    month, day, year = map(int, match.group('date').split('-'))
+    if year < 100:
+        year += 2000 if year < 70 else 1900
+    # Как и в Unix-формате, местное время сервера считается UTC
+    hour, minute = map(int, match.group('time').split(':'))
+    ampm = (match.group('ampm') or '').upper()
+    if ampm == 'PM' and hour < 12:
+        hour += 12
+    elif ampm == 'AM' and hour == 12:
+        hour = 0
+    try:
+        modified = calendar.timegm((year, month, day, hour, minute, 0, 0, 0, 0))
+    except ValueError:
+        modified = 0
+
+    size = match.group('size')
+    is_dir = size == '<DIR>'
+    return RemoteEntry(
+        name=name,
+        is_dir=is_dir,
+        size=-1 if is_dir else int(size),
+        modified=float(modified)
+    )
+
+
+def format_timestamp(timestamp: float, format_str: str = "%Y-%m-%d %H:%M") -> str:
+    if not timestamp:
+        return ""
+    return datetime.fromtimestamp(timestamp, tz=timezone.utc).astimezone().strftime(format_str)
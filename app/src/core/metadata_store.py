@@ -0,0 +1,137 @@
+from threading import Lock
+from typing import Dict, Iterator, List, Optional, Tuple
+import json
+import os
+import sqlite3
+import time
+import zlib
+
+from src.core.listing import RemoteEntry
+from src.utils.debug import debug_log
+
+
+class MetadataStore:
+    # Записи копятся в памяти и пишутся одной транзакцией: обход дерева дает тысячи списков
+    FLUSH_COUNT = 200
+    FLUSH_INTERVAL = 2.0
+
+    def __init__(self, db_path: Optional[str] = None, max_age_days: float = 30):
+        self.db_path = db_path or os.path.join(
+            os.path.expanduser("~"), ".ftp_client_metadata.db")
+        self.max_age_days = max_age_days
+        self._lock = Lock()
+        self._db: Optional[sqlite3.Connection] = None
+        self._pending: Dict[Tuple[str, str], Tuple[float, bytes]] = {}
+        self._flushed = time.monotonic()
+
+    def get(self, server: str, path: str) -> Optional[Tuple[float, List[RemoteEntry]]]:
+        with self._lock:
+            pending = self._pending.get((server, path))
+            if pending is not None:
+                row = pending
+            else:
+                db = self._open()
+                if db is None:
+                    return None
+                row = db.execute('SELECT listed_at, entries FROM listings WHERE server = ? AND path = ?',
+                                 (server, path)).fetchone()
+        if row is None:
+            return None
+        return row[0], self._decode(row[1])
+
+    def put(self, server: str, path: str, entries: List[RemoteEntry]) -> None:
+        data = zlib.compress(json.dumps([list(entry) for entry in entries],
+                                        separators=(',', ':')).encode('utf-8'))
+        with self._lock:
+            self._pending[(server, path)] = (time.time(), data)
+            if (len(self._pending) >= self.FLUSH_COUNT
+                    or time.monotonic() - self._flushed > self.FLUSH_INTERVAL):
+                self._flush()
+
+    def remove(self, server: str, path: str, tree: bool = False) -> None:
+        prefix = path.rstrip('/') + '/'
+        with self._lock:
+            for key in [key for key in self._pending
+                        if key[0] == server and (key[1] == path or tree and key[1].startswith(prefix))]:
+                del self._pending[key]
+            db = self._open()
+            if db is None:
+                return
+            try:
+                with db:
+                    db.execute('DELETE FROM listings WHERE server = ? AND path = ?', (server, path))
+                    if tree:
+                        # Диапазон вместо LIKE: имена могут содержать % и _
+                        db.execute('DELETE FROM listings WHERE server = ? AND path >= ? AND path < ?',
+                                   (server, prefix, prefix[:-1] + '0'))
+            except sqlite3.Error as e:
+                debug_log(f"DEBUG: MetadataStore: Ошибка удаления {path}: {str(e)}")
+
+    def listings(self, server: str) -> Iterator[Tuple[str, List[RemoteEntry]]]:
+        self.flush()
+        with self._lock:
+            db = self._open()
+            if db is None:
+                return
+            rows = db.execute('SELECT path, entries FROM listings WHERE server = ?', (server,)).fetchall()
+        for path, data in rows:
+            yield path, self._decode(data)
+
+    def flush(self) -> None:
+        with self._lock:
+            self._flush()
+
+    def close(self) -> None:
+        with self._lock:
+            self._flush()
+            if self._db is not None:
+                self._db.close()
+                self._db = None
+
+    def _flush(self) -> None:
+        self._flushed = time.monotonic()
+        if not self._pending:
+            return
+        db = self._open()
+        if db is None:
+            self._pending.clear()
+            return
+        try:
+            with db:
+                db.executemany('INSERT OR REPLACE INTO listings (server, path, listed_at, entries) '
+                               'VALUES (?, ?, ?, ?)',
+                               [(server, path, listed_at, data)
+                                for (server, path), (listed_at, data) in self._pending.items()])
+        except sqlite3.Error as e:
+            debug_log(f"DEBUG: MetadataStore: Ошибка записи: {str(e)}")
+        self._pending.clear()
+
+    def _open(self) -> Optional[sqlite3.Connection]:
+        if self._db is not None:
+            return self._db
+        try:
+            db = sqlite3.connect(self.db_path, check_same_thread=False)
+            db.execute('PRAGMA journal_mode=WAL')
+            db.execute('PRAGMA synchronous=NORMAL')
+            with db:
+                db.execute('CREATE TABLE IF NOT EXISTS listings ('
+                           'server TEXT NOT NULL, '
+                           'path TEXT NOT NULL, '
+                           'listed_at REAL NOT NULL, '
+                           'entries BLOB NOT NULL, '
+                           'PRIMARY KEY (server, path)) WITHOUT ROWID')
+                db.execute('DELETE FROM listings WHERE listed_at < ?',
+                           (time.time() - self.max_age_days * 86400,))
+        except sqlite3.Error as e:
+            debug_log(f"DEBUG: MetadataStore: Не удалось открыть {self.db_path}: {str(e)}")
+            return None
+        self._db = db
+        return db
+
+    @staticmethod
+    def _decode(data: bytes) -> List[RemoteEntry]:
+        try:
+            return [RemoteEntry(*entry) for entry in json.loads(zlib.decompress(data).decode('utf-8'))]
+        except (zlib.error, ValueError, TypeError) as e:
+            debug_log(f"DEBUG: MetadataStore: Поврежденная запись: {str(e)}")
+            return []
@@ -0,0 +1,90 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Lock
+from typing import Any, Callable, Optional
+import itertools
+from src.utils.debug import debug_log
+
+
+class NavigationRequest:
+    def __init__(self, request_id: int, generation: int, supersede: bool):
+        self.id = request_id
+        self.generation = generation
+        self.supersede = supersede
+
+
+class RemoteNavigator:
+    def __init__(self, deliver: Callable[[Callable[[], None]], None]):
+        # deliver - очередь обновлений GUI (Application.schedule_update)
+        self.deliver = deliver
+        self._ids = itertools.count(1)
+        self._generation = 0
+        self._lock = Lock()
+        # Один поток: команды управляющего соединения выполняются строго по порядку
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='navigator')
+        self._shutdown = False
+
+    def request(self, work: Callable[[], Any],
+                on_result: Callable[[Any], None],
+                on_error: Optional[Callable[[Exception], None]] = None,
+                supersede: bool = True,
+                on_progress: Optional[Callable[[Any], None]] = None) -> Optional[NavigationRequest]:
+        # С on_progress work получает функцию публикации промежуточных результатов.
+        # Она возвращает False, когда запрос перекрыт новым - работу пора прекращать
+        with self._lock:
+            if self._shutdown:
+                return None
+            if supersede:
+                self._generation += 1
+            request = NavigationRequest(next(self._ids), self._generation, supersede)
+            self._executor.submit(self._run, request, work, on_result, on_error, on_progress)
+        return request
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._generation += 1
+
+    def is_current(self, request: NavigationRequest) -> bool:
+        return not request.supersede or request.generation == self._generation
+
+    def shutdown(self) -> None:
+        with self._lock:
+            self._shutdown = True
+            self._generation += 1
+        self._executor.shutdown(wait=False)
+
+    def _run(self, request: NavigationRequest, work: Callable[[], Any],
+             on_result: Callable[[Any], None],
+             on_error: Optional[Callable[[Exception], None]],
+             on_progress: Optional[Callable[[Any], None]] = None) -> None:
+        # Переход, который уже перекрыт более новым, даже не начинаем
+        if not self.is_current(request):
+            debug_log(f"DEBUG: RemoteNavigator: Запрос #{request.id} отменен до выполнения")
+            return
+
+        try:
+            if on_progress is not None:
+                result = work(lambda value: self._publish(request, on_progress, value))
+            else:
+                result = work()
+        except Exception as e:
+            debug_log(f"DEBUG: RemoteNavigator: Ошибка запроса #{request.id}: {str(e)}")
+            if on_error:
+                error = e
+                self._deliver(request, lambda: on_error(error))
+            return
+        self._deliver(request, lambda: on_result(result))
+
+    def _publish(self, request: NavigationRequest, on_progress: Callable[[Any], None], value: Any) -> bool:
+        if not self.is_current(request):
+            return False
+        self._deliver(request, lambda: on_progress(value))
+        return True
+
+    def _deliver(self, request: NavigationRequest, update: Callable[[], None]) -> None:
+        def apply():
+            # Проверяем еще раз уже в потоке GUI: за время ожидания мог прийти новый переход
+            if self.is_current(request):
+                update()
+            else:
+                debug_log(f"DEBUG: RemoteNavigator: Результат запроса #{request.id} устарел")
+        self.deliver(apply)
@@ -0,0 +1,137 @@
+from collections import OrderedDict
+from threading import Lock
+from typing import Optional, Tuple, List, Dict, Any
+import posixpath
+import time
+
+from src.core.listing import RemoteEntry
+
+
+class DirectoryCache:
+    def __init__(self, ttl: float = 30, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max(1, int(max_entries))
+        self._listings: "OrderedDict[str, Tuple[float, List[RemoteEntry]]]" = OrderedDict()
+        self._counts: "OrderedDict[str, Tuple[float, Optional[int]]]" = OrderedDict()
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path: str) -> Optional[List[RemoteEntry]]:
+        path = self._normalize(path)
+        with self._lock:
+            cached = self._lookup(self._listings, path)
+            if cached is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return list(cached)
+
+    def peek(self, path: str) -> Optional[List[RemoteEntry]]:
+        path = self._normalize(path)
+        with self._lock:
+            cached = self._lookup(self._listings, path)
+            return None if cached is None else list(cached)
+
+    def put(self, path: str, entries: List[RemoteEntry]) -> None:
+        path = self._normalize(path)
+        with self._lock:
+            self._store(self._listings, path, list(entries))
+            self._counts.pop(path, None)
+
+    def get_count(self, path: str) -> Tuple[bool, Optional[int]]:
+        path = self._normalize(path)
+        with self._lock:
+            listing = self._lookup(self._listings, path)
+            if listing is not None:
+                return True, len(listing)
+            if path in self._counts:
+                timestamp, count = self._counts[path]
+                if time.monotonic() - timestamp <= self.ttl:
+                    self._counts.move_to_end(path)
+                    return True, count
+                del self._counts[path]
+            return False, None
+
+    def put_count(self, path: str, count: Optional[int]) -> None:
+        path = self._normalize(path)
+        with self._lock:
+            self._store(self._counts, path, count)
+
+    def invalidate(self, path: str) -> None:
+        path = self._normalize(path)
+        with self._lock:
+            self._listings.pop(path, None)
+            self._counts.pop(path, None)
+
+    def invalidate_tree(self, path: str) -> None:
+        path = self._normalize(path)
+        prefix = path.rstrip('/') + '/'
+        with self._lock:
+            for cache in (self._listings, self._counts):
+                for key in [key for key in cache if key == path or key.startswith(prefix)]:
+                    del cache[key]
+        self.invalidate(posixpath.dirname(path))
+
+    def add_entry(self, parent: str, entry: RemoteEntry) -> None:
+        parent = self._normalize(parent)
+        with self._lock:
+            if parent not in self._listings:
+                return
+            timestamp, entries = self._listings[parent]
+            entries = [item for item in entries if item.name != entry.name]
+            entries.append(entry)
+            self._listings[parent] = (timestamp, entries)
+
+    def remove_entry(self, parent: str, name: str) -> None:
+        parent = self._normalize(parent)
+        with self._lock:
+            if parent not in self._listings:
+                return
+            timestamp, entries = self._listings[parent]
+            self._listings[parent] = (timestamp, [item for item in entries if item.name != name])
+
+    def clear(self) -> None:
+        with self._lock:
+            self._listings.clear()
+            self._counts.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / requests * 100 if requests else 0.0,
+                'entries': len(self._listings),
+                'evictions': self.evictions
+            }
+
+    def _lookup(self, cache: OrderedDict, path: str) -> Any:
+        cached = cache.get(path)
+        if cached is None:
+            return None
+        timestamp, value = cached
+        if time.monotonic() - timestamp > self.ttl:
+            del cache[path]
+            return None
+        cache.move_to_end(path)
+        return value
+
+    def _store(self, cache: OrderedDict, path: str, value: Any) -> None:
+        cache[path] = (time.monotonic(), value)
+        cache.move_to_end(path)
+        while len(cache) > self.max_entries:
+            cache.popitem(last=False)
+            self.evictions += 1
+
+    @staticmethod
+    def _normalize(path: str) -> str:
+        normalized = posixpath.normpath(path or '/')
+        if normalized.startswith('//'):
+            normalized = '/' + normalized.lstrip('/')
+        return normalized
@@ -0,0 +1,219 @@
+from ftplib import FTP, error_perm, error_temp, error_reply, parse227
+from src.core.connection_pool import ConnectionPool, PoolTimeout
+from threading import Condition, Thread
+from typing import Optional, Tuple, Callable
+import socket
+from src.utils.debug import debug_log
+
+
+class RingBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = max(1, int(capacity))
+        self._buffer = bytearray(self.capacity)
+        self._start = 0
+        self._size = 0
+        self._closed = False
+        self._error: Optional[BaseException] = None
+        self._cond = Condition()
+
+    def write(self, data: bytes) -> None:
+        view = memoryview(data)
+        while view:
+            with self._cond:
+                while self._size == self.capacity and not self._closed:
+                    self._cond.wait()
+                if self._closed:
+                    raise self._error or BrokenPipeError("Буфер копирования закрыт")
+
+                end = (self._start + self._size) % self.capacity
+                count = min(len(view), self.capacity - self._size, self.capacity - end)
+                self._buffer[end:end + count] = view[:count]
+                self._size += count
+                self._cond.notify_all()
+            view = view[count:]
+
+    def read(self, max_size: int) -> bytes:
+        with self._cond:
+            while not self._size and not self._closed:
+                self._cond.wait()
+            if not self._size:
+                if self._error is not None:
+                    raise self._error
+                return b''
+
+            count = min(max_size, self._size, self.capacity - self._start)
+            data = bytes(self._buffer[self._start:self._start + count])
+            self._start = (self._start + count) % self.capacity
+            self._size -= count
+            self._cond.notify_all()
+            return data
+
+    def close(self, error: Optional[BaseException] = None) -> None:
+        with self._cond:
+            self._closed = True
+            if error is not None and self._error is None:
+                self._error = error
+            self._cond.notify_all()
+
+
+class FxpUnsupported(error_reply):
+    pass
+
+
+class RemoteCopier:
+    FXP_TIMEOUT = 30
+    # Сколько ждать второе соединение из пула, прежде чем открыть отдельное
+    PAIR_TIMEOUT = 2
+
+    def __init__(self, client):
+        self.client = client
+
+    def copy(self, source_path: str, destination_path: str,
+             progress_callback: Optional[Callable[[int, int], None]] = None) -> None:
+        if (self.client.settings.get('use_fxp', True) and self.client.fxp_supported is not False
+                and self.client.pool.size >= 2):
+            try:
+                self._copy_fxp(source_path, destination_path)
+                self.client.fxp_supported = True
+                return
+            except FxpUnsupported as e:
+                debug_log(f"DEBUG: RemoteCopier: FXP недоступен ({str(e)}), копируем через поток")
+                # Сервер отказал в самом FXP (PORT/PASV или соединение данных) - больше
+                # не пробуем; прочие ошибки копирования пробрасываются выше
+                if self.client.fxp_supported is None:
+                    self.client.fxp_supported = False
+
+        self._copy_stream(source_path, destination_path, progress_callback)
+
+    def _copy_fxp(self, source_path: str, destination_path: str) -> None:
+        source, target, dedicated = self._acquire_pair()
+        broken = False
+        try:
+            if source.af != socket.AF_INET or target.af != socket.AF_INET:
+                raise FxpUnsupported("FXP поддерживается только для IPv4")
+
+            source.voidcmd('TYPE I')
+            target.voidcmd('TYPE I')
+            try:
+                host, port = parse227(target.sendcmd('PASV'))
+                source.voidcmd('PORT ' + ','.join(host.split('.') + [str(port >> 8), str(port & 0xFF)]))
+            except error_perm as e:
+                # Сервер не принимает PORT на чужой адрес (защита от FXP)
+                raise FxpUnsupported(str(e))
+
+            # Ответы 150 ждем с таймаутом: сервер может не дозвониться до адреса из PASV
+            for conn in (source, target):
+                conn.sock.settimeout(self.FXP_TIMEOUT)
+            target.putcmd(f'STOR {destination_path}')
+            source.putcmd(f'RETR {source_path}')
+            for conn in (source, target):
+                try:
+                    response = conn.getresp()
+                except socket.timeout:
+                    raise FxpUnsupported("Сервер не ответил на STOR/RETR при FXP")
+                except error_temp as e:
+                    # 425/426: сервер не смог открыть соединение данных со вторым сервером
+                    if str(e)[:3] in ('425', '426'):
+                        raise FxpUnsupported(str(e))
+                    raise
+                if not response.startswith('1'):
+                    raise FxpUnsupported(response)
+                conn.sock.settimeout(None)
+
+            debug_log(f"DEBUG: RemoteCopier: FXP {source_path} -> {destination_path}")
+            source.voidresp()
+            target.voidresp()
+        except BaseException:
+            # Состояние обоих соединений после сбоя FXP неизвестно
+            broken = True
+            raise
+        finally:
+            self._release_pair(source, target, dedicated, broken)
+
+    def _copy_stream(self, source_path: str, destination_path: str,
+                     progress_callback: Optional[Callable[[int, int], None]]) -> None:
+        buffer_size = self.client.settings.get('buffer_size', 8192)
+        ring = RingBuffer(self.client.settings.get('copy_buffer_size', 4 * 1024 * 1024))
+
+        source, target, dedicated = self._acquire_pair()
+        broken = False
+        try:
+            source.voidcmd('TYPE I')
+            target.voidcmd('TYPE I')
+            try:
+                total = source.size(source_path) or 0
+            except error_perm:
+                total = 0
+
+            debug_log(f"DEBUG: RemoteCopier: Поток {source_path} -> {destination_path}")
+            source_sock = source.transfercmd(f'RETR {source_path}')
+            # Дальше RETR уже начат: при любой ошибке соединения в пул не возвращаем
+            broken = True
+            with source_sock, target.transfercmd(f'STOR {destination_path}') as target_sock:
+
+                def pump():
+                    try:
+                        while True:
+                            block = source_sock.recv(buffer_size)
+                            if not block:
+                                break
+                            ring.write(block)
+                        ring.close()
+                    except BaseException as e:
+                        ring.close(e)
+
+                reader = Thread(target=pump, daemon=True)
+                reader.start()
+                copied = 0
+                try:
+                    while True:
+                        block = ring.read(buffer_size)
+                        if not block:
+                            break
+                        target_sock.sendall(block)
+                        copied += len(block)
+                        if progress_callback:
+                            progress_callback(copied, total)
+                except BaseException as e:
+                    ring.close(e)
+                    try:
+                        source_sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+                    raise
+                finally:
+                    reader.join()
+
+                self.client._unwrap_data_socket(source_sock)
+                self.client._unwrap_data_socket(target_sock)
+
+            source.voidresp()
+            target.voidresp()
+            broken = False
+        finally:
+            self._release_pair(source, target, dedicated, broken)
+
+    def _acquire_pair(self) -> Tuple[FTP, FTP, bool]:
+        # Второе соединение из пула ждем недолго: при маленьком пуле или нескольких
+        # копированиях сразу каждое держало бы одно соединение и ждало другое.
+        # Если свободного нет, открываем отдельную сессию вне пула
+        pool = self.client.pool
+        source = pool.acquire()
+        try:
+            if pool.size >= 2:
+                try:
+                    return source, pool.acquire(timeout=self.PAIR_TIMEOUT), False
+                except PoolTimeout:
+                    pass
+            debug_log("DEBUG: RemoteCopier: Нет второго соединения в пуле, открываем отдельное")
+            return source, self.client._create_session(), True
+        except BaseException:
+            pool.release(source)
+            raise
+
+    def _release_pair(self, source: FTP, target: FTP, dedicated: bool, broken: bool) -> None:
+        self.client.pool.release(source, broken)
+        if dedicated:
+            ConnectionPool._close_quietly(target)
+        else:
+            self.client.pool.release(target, broken)
@@ -0,0 +1,153 @@
+from threading import Lock, Timer
+from typing import Optional, Dict, Any
+import json
+import os
+import tempfile
+from src.utils.debug import debug_log
+
+
+PART_SUFFIX = '.part'
+STATE_SUFFIX = '.part.json'
+
+
+def part_path(local_path: str) -> str:
+    return local_path + PART_SUFFIX
+
+
+def download_offset(local_path: str, remote_path: str, size: int, modified: float) -> int:
+    state = _read_json(local_path + STATE_SUFFIX)
+    partial = part_path(local_path)
+    if not state or not os.path.exists(partial):
+        return 0
+
+    # Без MDTM изменение файла на сервере заметно только по размеру, а файл того же
+    # размера с другим содержимым склеился бы из двух версий - такую докачку не делаем
+    if not modified:
+        debug_log(f"DEBUG: Сервер не сообщает время изменения {remote_path}, докачка невозможна")
+        return 0
+
+    # Докачиваем только если файл на сервере не менялся с прошлой попытки
+    if (state.get('remote_path') != remote_path or state.get('size') != size
+            or state.get('modified') != modified):
+        debug_log(f"DEBUG: Файл {remote_path} изменился на сервере, докачка невозможна")
+        return 0
+
+    offset = os.path.getsize(partial)
+    return offset if 0 < offset < size else 0
+
+
+def save_download_state(local_path: str, remote_path: str, size: int, modified: float) -> None:
+    _write_json(local_path + STATE_SUFFIX, {
+        'remote_path': remote_path,
+        'size': size,
+        'modified': modified
+    })
+
+
+def clear_download_state(local_path: str, keep_part: bool = False) -> None:
+    paths = [local_path + STATE_SUFFIX]
+    if not keep_part:
+        paths.append(part_path(local_path))
+    for path in paths:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+class UploadStateStore:
+    # Записи меняются на каждый файл, а на диск попадают не чаще раза в SAVE_DELAY:
+    # параллельные загрузки не ждут друг друга на записи файла состояния. При обрыве
+    # передачи и отключении flush() сохраняет их сразу
+    SAVE_DELAY = 5.0
+
+    def __init__(self, state_file: Optional[str] = None):
+        self.state_file = state_file or os.path.join(
+            os.path.expanduser("~"), ".ftp_client_uploads.json")
+        self._lock = Lock()
+        self._save_lock = Lock()
+        self._states: Optional[Dict[str, Dict[str, Any]]] = None
+        self._version = 0
+        self._saved_version = 0
+        self._timer: Optional[Timer] = None
+
+    def offset(self, key: str, local_path: str, remote_size: int) -> int:
+        with self._lock:
+            state = self._load().get(key)
+        if not state or state.get('local_path') != local_path:
+            return 0
+
+        try:
+            stat = os.stat(local_path)
+        except OSError:
+            return 0
+        # Локальный файл изменился - докачивать на сервер нечего
+        if state.get('size') != stat.st_size or state.get('mtime') != stat.st_mtime_ns:
+            return 0
+        return remote_size if 0 < remote_size < stat.st_size else 0
+
+    def put(self, key: str, local_path: str) -> None:
+        stat = os.stat(local_path)
+        with self._lock:
+            self._load()[key] = {
+                'local_path': local_path,
+                'size': stat.st_size,
+                'mtime': stat.st_mtime_ns
+            }
+            self._changed()
+
+    def remove(self, key: str) -> None:
+        with self._lock:
+            if self._load().pop(key, None) is not None:
+                self._changed()
+
+    def flush(self) -> None:
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._states is None or self._version == self._saved_version:
+                return
+            version, states = self._version, dict(self._states)
+        # Запись вне основной блокировки; более старый снимок не перезаписывает новый
+        with self._save_lock:
+            if version <= self._saved_version:
+                return
+            _write_json(self.state_file, states)
+            self._saved_version = version
+
+    def _load(self) -> Dict[str, Dict[str, Any]]:
+        if self._states is None:
+            self._states = _read_json(self.state_file) or {}
+        return self._states
+
+    def _changed(self) -> None:
+        self._version += 1
+        if self._timer is None:
+            self._timer = Timer(self.SAVE_DELAY, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+
+def _read_json(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path: str, data: Dict[str, Any]) -> None:
+    # Через временный файл и os.replace: сбой посреди записи не портит прежнее состояние
+    try:
+        fd, temp_path = tempfile.mkstemp(prefix=os.path.basename(path) + '.',
+                                         dir=os.path.dirname(os.path.abspath(path)))
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f)
+            os.replace(temp_path, path)
+        except BaseException:
+            os.remove(temp_path)
+            raise
+    except OSError as e:
+        debug_log(f"DEBUG: Не удалось сохранить состояние докачки {path}: {str(e)}")
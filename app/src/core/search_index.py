@@ -0,0 +1,339 @@
+from bisect import bisect_right
+from collections import deque
+from itertools import accumulate
+from threading import Lock, Thread, Event
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import re
+from src.utils.debug import debug_log
+
+
+# Запись индекса: имя, папка ли это, размер и время изменения
+IndexEntry = Tuple[str, bool, int, float]
+# Результат поиска: папка, в которой лежит запись, и сама запись
+SearchResult = Tuple[str, str, bool, int, float]
+
+
+class _Segment:
+    # Имена записей [start, start + len(names)) одной строкой, каждое между '\n': поиск
+    # идет в C (str.find / re), номер записи восстанавливается бинарным поиском по смещениям
+    def __init__(self, start: int, names: List[str]):
+        self.start = start
+        self.size = len(names)
+        self.text = '\n' + '\n'.join(names) + '\n'
+        self.offsets = self._offsets(names)
+        lower = [name.lower() for name in names]
+        self.lower_text = '\n' + '\n'.join(lower) + '\n'
+        if len(self.lower_text) == len(self.text):
+            self.lower_offsets = self.offsets
+        else:
+            # lower() у некоторых символов меняет длину строки
+            self.lower_offsets = self._offsets(lower)
+
+    @staticmethod
+    def _offsets(names: List[str]) -> List[int]:
+        return [1] + list(accumulate((len(name) + 1 for name in names), initial=1))[1:-1]
+
+    def entry_at(self, position: int, lower: bool) -> int:
+        offsets = self.lower_offsets if lower else self.offsets
+        return bisect_right(offsets, position) - 1
+
+    def next_offset(self, index: int, lower: bool) -> int:
+        offsets = self.lower_offsets if lower else self.offsets
+        if index + 1 < len(offsets):
+            return offsets[index + 1]
+        return len(self.lower_text if lower else self.text)
+
+
+class SearchIndex:
+    def __init__(self, sep: str = '/'):
+        self.sep = sep
+        self._lock = Lock()
+        self._names: List[str] = []
+        self._meta: List[Tuple[int, bool, int, float]] = []
+        self._alive = bytearray()
+        self._dead = 0
+        self._dir_ids: Dict[str, int] = {}
+        self._dir_paths: List[str] = []
+        self._dir_entries: Dict[str, range] = {}
+        self._segments: List[_Segment] = []
+        self._indexed = 0
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._names) - self._dead
+
+    def update_directory(self, path: str, entries: Iterable[IndexEntry]) -> None:
+        entries = [entry for entry in entries if entry[0] not in ('.', '..')]
+        with self._lock:
+            self._replace_directory(path, entries)
+
+    def update_entries(self, path: str, entries: Iterable[IndexEntry],
+                       removed: Iterable[str] = ()) -> None:
+        # Точечные изменения одной папки (например, от наблюдателя ФС): остальные записи сохраняются
+        entries = [entry for entry in entries if entry[0] not in ('.', '..')]
+        with self._lock:
+            old = self._dir_entries.get(path)
+            if old is None:
+                # Папка еще не проиндексирована, неполный список сделал бы ее "известной"
+                return
+            changed = {entry[0] for entry in entries}.union(removed)
+            kept = [(self._names[index],) + self._meta[index][1:] for index in old
+                    if self._alive[index] and self._names[index] not in changed]
+            self._replace_directory(path, kept + entries)
+
+    def has_directory(self, path: str) -> bool:
+        with self._lock:
+            return path in self._dir_entries
+
+    def remove_tree(self, path: str) -> None:
+        with self._lock:
+            self._drop_tree(path)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._names, self._meta, self._alive, self._dead = [], [], bytearray(), 0
+            self._dir_ids, self._dir_paths, self._dir_entries = {}, [], {}
+            self._segments, self._indexed = [], 0
+
+    def search(self, pattern: str, root: Optional[str] = None, case_sensitive: bool = False,
+               limit: int = 1000) -> List[SearchResult]:
+        # Шаблон с *, ? или [...] сравнивается с именем целиком, иначе ищется подстрока
+        if not pattern:
+            return []
+        if not case_sensitive:
+            pattern = pattern.lower()
+        regex = _glob_regex(pattern) if any(ch in pattern for ch in '*?[') else None
+        lower = not case_sensitive
+
+        results: List[SearchResult] = []
+        with self._lock:
+            self._pack()
+            prefix = None if root is None else root.rstrip(self.sep) + self.sep
+            in_root: Dict[int, bool] = {}
+
+            for segment in self._segments:
+                text = segment.lower_text if lower else segment.text
+                for index in self._matches(segment, text, pattern, regex, lower):
+                    entry = segment.start + index
+                    if not self._alive[entry]:
+                        continue
+                    dir_id, is_dir, size, modified = self._meta[entry]
+                    inside = in_root.get(dir_id)
+                    if inside is None:
+                        directory = self._dir_paths[dir_id]
+                        inside = in_root[dir_id] = (prefix is None or directory == root
+                                                    or directory.startswith(prefix))
+                    if inside:
+                        results.append((self._dir_paths[dir_id], self._names[entry], is_dir, size, modified))
+                        if len(results) >= limit:
+                            return results
+        return results
+
+    @staticmethod
+    def _matches(segment: _Segment, text: str, pattern: str,
+                 regex: Optional["re.Pattern"], lower: bool) -> Iterable[int]:
+        if regex is not None:
+            last = -1
+            for match in regex.finditer(text):
+                # Совпадение может начинаться с '\n' перед именем, а без якоря - несколько раз в одном имени
+                index = segment.entry_at(match.start() + 1, lower)
+                if index != last:
+                    last = index
+                    yield index
+            return
+
+        position = text.find(pattern)
+        while position != -1:
+            index = segment.entry_at(position, lower)
+            yield index
+            # Остальные вхождения в то же имя не нужны
+            position = text.find(pattern, segment.next_offset(index, lower))
+
+    def _replace_directory(self, path: str, entries: List[IndexEntry]) -> None:
+        old = self._dir_entries.get(path)
+        if old is not None:
+            # Пропавшие подпапки удаляем вместе со всем их содержимым
+            names = {entry[0] for entry in entries if entry[1]}
+            for index in old:
+                if self._alive[index] and self._meta[index][1] and self._names[index] not in names:
+                    self._drop_tree(self._join(path, self._names[index]))
+            self._kill(old)
+
+        dir_id = self._dir_ids.get(path)
+        if dir_id is None:
+            dir_id = self._dir_ids[path] = len(self._dir_paths)
+            self._dir_paths.append(path)
+
+        start = len(self._names)
+        for name, is_dir, size, modified in entries:
+            self._names.append(name)
+            self._meta.append((dir_id, bool(is_dir), size, modified))
+        self._alive.extend(b'\x01' * len(entries))
+        self._dir_entries[path] = range(start, len(self._names))
+
+        # Больше половины записей удалено - перестраиваем индекс целиком
+        if self._dead > 1024 and self._dead * 2 > len(self._names):
+            self._compact()
+
+    def _pack(self) -> None:
+        # Новые записи упаковываются в сегмент; соседние сегменты близкого размера
+        # сливаются, поэтому сегментов остается O(log n) и поиск не зависит от числа папок
+        if self._indexed == len(self._names):
+            return
+        self._segments.append(_Segment(self._indexed, self._names[self._indexed:]))
+        self._indexed = len(self._names)
+        while len(self._segments) > 1 and self._segments[-2].size <= 2 * self._segments[-1].size:
+            last = self._segments.pop()
+            previous = self._segments.pop()
+            self._segments.append(_Segment(previous.start,
+                                           self._names[previous.start:last.start + last.size]))
+
+    def _kill(self, entries: range) -> None:
+        for index in entries:
+            if self._alive[index]:
+                self._alive[index] = 0
+                self._dead += 1
+
+    def _drop_tree(self, path: str) -> None:
+        prefix = path.rstrip(self.sep) + self.sep
+        for directory in [d for d in self._dir_entries if d == path or d.startswith(prefix)]:
+            self._kill(self._dir_entries.pop(directory))
+
+    def _compact(self) -> None:
+        names, meta = [], []
+        dir_entries = {}
+        for directory, entries in self._dir_entries.items():
+            start = len(names)
+            for index in entries:
+                names.append(self._names[index])
+                meta.append(self._meta[index])
+            dir_entries[directory] = range(start, len(names))
+
+        self._names, self._meta = names, meta
+        self._alive = bytearray(b'\x01' * len(names))
+        self._dead = 0
+        self._dir_entries = dir_entries
+        self._segments, self._indexed = [], 0
+
+    def _join(self, path: str, name: str) -> str:
+        return path.rstrip(self.sep) + self.sep + name
+
+
+def name_matcher(pattern: str, case_sensitive: bool = False) -> Callable[[str], bool]:
+    # Те же правила, что и у SearchIndex.search, для проверки отдельных имен
+    if not case_sensitive:
+        pattern = pattern.lower()
+    if any(ch in pattern for ch in '*?['):
+        regex = _glob_regex(pattern)
+        match = lambda name: regex.search('\n' + name + '\n') is not None
+    else:
+        match = lambda name: pattern in name
+    if case_sensitive:
+        return match
+    return lambda name: match(name.lower())
+
+
+def _glob_regex(pattern: str) -> "re.Pattern":
+    # Границы имени - символы '\n'. Якорь в виде литерала дает re искать по префиксу,
+    # а ведущая или завершающая * просто снимает соответствующий якорь
+    parts = []
+    i = 0
+    while i < len(pattern):
+        ch = pattern[i]
+        i += 1
+        if ch == '*':
+            parts.append('[^\n]*')
+        elif ch == '?':
+            parts.append('[^\n]')
+        elif ch == '[':
+            end = pattern.find(']', i + 1)
+            if end == -1:
+                parts.append('\\[')
+                continue
+            body = pattern[i:end]
+            i = end + 1
+            if body.startswith('!'):
+                body = '^' + body[1:]
+            parts.append('[' + body.replace('\\', '\\\\').replace('\n', '') + ']')
+        else:
+            parts.append(re.escape(ch))
+
+    head = '\n'
+    while parts and parts[0] == '[^\n]*':
+        parts.pop(0)
+        head = ''
+    tail = '(?=\n)'
+    while parts and parts[-1] == '[^\n]*':
+        parts.pop()
+        tail = ''
+    if not parts:
+        # Шаблон из одних * - подходит любое имя
+        return re.compile('\n(?=[^\n])')
+    return re.compile(head + ''.join(parts) + tail)
+
+
+class IndexCrawler:
+    def __init__(self, index: SearchIndex, list_dir: Callable[[str], List[IndexEntry]],
+                 close: Optional[Callable[[], None]] = None,
+                 on_done: Optional[Callable[[], None]] = None,
+                 preload: Optional[Callable[[], None]] = None):
+        self.index = index
+        self.list_dir = list_dir
+        self.close = close
+        self.preload = preload
+        self.on_done = on_done
+        self.root: Optional[str] = None
+        self.complete = False
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, root: str) -> None:
+        self.stop()
+        self.root = root
+        self.complete = False
+        self._stop = Event()
+        self._thread = Thread(target=self._run, args=(root, self._stop), daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+
+    def _run(self, root: str, stop: Event) -> None:
+        debug_log(f"DEBUG: IndexCrawler: Индексация {root}")
+        pending = deque([root])
+        seen = set()
+        try:
+            # Сначала известное дерево из сохраненных данных, затем его перепроверка обходом
+            if self.preload:
+                self.preload()
+            while pending and not stop.is_set():
+                path = pending.popleft()
+                if path in seen:
+                    continue
+                seen.add(path)
+                try:
+                    entries = self.list_dir(path)
+                except Exception as e:
+                    debug_log(f"DEBUG: IndexCrawler: Пропускаем {path}: {str(e)}")
+                    continue
+
+                self.index.update_directory(path, entries)
+                for name, is_dir, _, _ in entries:
+                    if is_dir and name not in ('.', '..'):
+                        pending.append(self.index._join(path, name))
+        finally:
+            if self.close:
+                try:
+                    self.close()
+                except Exception:
+                    pass
+
+        if not stop.is_set():
+            self.complete = True
+            debug_log(f"DEBUG: IndexCrawler: Индексация {root} завершена, записей: {len(self.index)}")
+            if self.on_done:
+                self.on_done()
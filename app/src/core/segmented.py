@@ -0,0 +1,129 @@
+from concurrent.futures import ThreadPoolExecutor
+from ftplib import error_temp, error_perm, error_reply, error_proto
+from threading import Lock, Event
+from typing import Optional, Tuple, List, Callable
+import time
+from src.utils.debug import debug_log
+
+
+class SegmentedDownloader:
+    def __init__(self, client, segments: int):
+        self.client = client
+        self.segments = max(1, int(segments))
+        self.cancel_event = Event()
+        self._lock = Lock()
+        self._received = 0
+        self._error: Optional[BaseException] = None
+
+    def run(self, remote_path: str, local_path: str, file_size: int,
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, str]:
+        ranges = self._split(file_size)
+        debug_log(f"DEBUG: SegmentedDownloader: {remote_path} ({file_size} байт) в {len(ranges)} потоков")
+
+        # Заранее выделяем файл целиком, сегменты пишут каждый в свою область
+        with open(local_path, 'wb') as f:
+            f.truncate(file_size)
+
+        with ThreadPoolExecutor(max_workers=len(ranges),
+                                thread_name_prefix='segment') as executor:
+            futures = [executor.submit(self._fetch, remote_path, local_path, file_size,
+                                       start, end, progress_callback)
+                       for start, end in ranges]
+            for future in futures:
+                try:
+                    future.result()
+                except BaseException as e:
+                    self.cancel_event.set()
+                    # Остальные сегменты прерываются с InterruptedError, сохраняем исходную причину
+                    if self._error is None or type(self._error) is InterruptedError:
+                        self._error = e
+
+        if self._error is not None:
+            raise self._error
+        if self._received != file_size:
+            return False, "Ошибка скачивания: получены не все сегменты файла"
+        return True, "Файл успешно скачан"
+
+    def _split(self, file_size: int) -> List[Tuple[int, int]]:
+        step = -(-file_size // self.segments)
+        return [(start, min(start + step, file_size)) for start in range(0, file_size, step)]
+
+    def _fetch(self, remote_path: str, local_path: str, file_size: int, start: int, end: int,
+               progress_callback: Optional[Callable[[int, int], None]]) -> None:
+        tuner = self.client._create_tuner(end - start)
+        attempts = 1 + max(0, int(self.client.settings.get('reconnect_attempts', 3)))
+        delay = self.client.settings.get('retry_delay', 2)
+        position = start
+
+        for attempt in range(1, attempts + 1):
+            try:
+                conn = self.client.pool.acquire()
+                reusable = False
+                try:
+                    conn.voidcmd('TYPE I')
+                    with open(local_path, 'r+b') as f:
+                        f.seek(position)
+                        sock = conn.transfercmd(f'RETR {remote_path}', rest=position)
+                        try:
+                            tuner.tune_socket(sock, receive=True)
+                            while position < end:
+                                if self.cancel_event.is_set():
+                                    raise InterruptedError("Передача отменена")
+                                block = sock.recv(min(tuner.block_size, end - position))
+                                if not block:
+                                    break
+                                f.write(block)
+                                position += len(block)
+                                tuner.record(len(block), sock, receive=True)
+                                self._report(len(block), file_size, progress_callback)
+                            if end == file_size and position == end:
+                                # Последний сегмент дочитан до конца: закрываем TLS корректно
+                                self.client._unwrap_data_socket(sock)
+                        finally:
+                            sock.close()
+                    reusable = self._finish_response(conn, end == file_size)
+                finally:
+                    self.client.pool.release(conn, broken=not reusable)
+
+                if position < end:
+                    raise EOFError(f"Сегмент {start}-{end} оборвался на {position}")
+                self.client._remember_tuner(tuner)
+                return
+            except InterruptedError:
+                raise
+            except (OSError, EOFError, error_temp, error_reply, error_proto) as e:
+                if self.cancel_event.is_set() or attempt == attempts:
+                    raise
+                debug_log(f"DEBUG: SegmentedDownloader: Обрыв сегмента {start}-{end}: {str(e)}, "
+                          f"повтор с позиции {position}")
+                time.sleep(delay * attempt)
+
+    def _finish_response(self, conn, complete: bool) -> bool:
+        if complete:
+            conn.voidresp()
+            return True
+        # Сегмент дочитан раньше конца файла. Сервер отвечает на закрытый канал
+        # по-разному: 226, 426/451 или 426 и следом 226. Соединение возвращаем в пул,
+        # только если ответ 2xx; иначе лишний ответ может достаться следующей команде
+        try:
+            conn.voidresp()
+            return True
+        except (error_temp, error_perm, error_reply, error_proto, OSError, EOFError):
+            return False
+
+    def _report(self, count: int, file_size: int,
+                progress_callback: Optional[Callable[[int, int], None]]) -> None:
+        with self._lock:
+            self._received += count
+            received = self._received
+        if not progress_callback:
+            return
+        try:
+            progress_callback(received, file_size)
+        except BaseException as e:
+            # Отмена или пауза из колбэка должна остановить все сегменты
+            with self._lock:
+                if self._error is None:
+                    self._error = e
+            self.cancel_event.set()
+            raise
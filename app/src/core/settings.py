@@ -19,7 +19,31 @@ class Settings:
             'theme': 'default',
             'auto_reconnect': True,
             'reconnect_attempts': 3,
-            'cache_ttl': 30
+            'cache_ttl': 30,
+            'cache_max_dirs': 256,
+            'pool_size': 4,
+            'folder_item_count': 'lazy',
+            'resume_transfers': True,
+            'retry_delay': 2,
+            'segment_threshold': 64 * 1024 * 1024,
+            'segment_count': 4,
+            'adaptive_buffer': True,
+            'block_sizes': {},
+            'use_fxp': True,
+            'copy_buffer_size': 4 * 1024 * 1024,
+            'search_index': True,
+            'metadata_cache': True,
+            'metadata_cache_days': 30,
+            'search_max_results': 1000,
+            'sync_mtime_tolerance': 2,
+            'delete_pipeline': 16,
+            'watch_local_dir': True,
+            'watch_poll_interval': 2,
+            'verify_integrity': True,
+            'compress_transfers': True,
+            'compress_min_size': 64 * 1024,
+            'compress_level': 6,
+            'tls_verify': True
         }
         self.current_settings = self.load_settings()
 
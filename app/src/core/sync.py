@@ -0,0 +1,364 @@
+from concurrent.futures import ThreadPoolExecutor
+from threading import Semaphore
+from typing import NamedTuple, Optional, Tuple, List, Dict, Callable
+import posixpath
+import shutil
+import os
+import time
+
+from src.core.tree_transfer import TreeTransfer
+from src.utils.debug import debug_log
+
+
+class SyncAction(NamedTuple):
+    kind: str
+    path: str
+    is_dir: bool = False
+    size: int = 0
+    modified: float = 0.0
+    reason: str = ''
+
+
+# Состояние одной записи дерева: папка ли это, размер и время изменения
+SyncEntry = Tuple[bool, int, float]
+
+ACTION_TITLES = {
+    'mkdir_remote': "Создать на сервере",
+    'mkdir_local': "Создать локально",
+    'upload': "Загрузить",
+    'download': "Скачать",
+    'delete_remote': "Удалить на сервере",
+    'delete_local': "Удалить локально",
+}
+
+
+class SyncPlan:
+    def __init__(self, local_dir: str, remote_dir: str, direction: str):
+        self.local_dir = local_dir
+        self.remote_dir = remote_dir
+        self.direction = direction
+        self.actions: List[SyncAction] = []
+        self.conflicts: List[str] = []
+        self.unchanged = 0
+
+    def __bool__(self) -> bool:
+        return bool(self.actions)
+
+    def count(self, kind: str) -> int:
+        return sum(1 for action in self.actions if action.kind == kind)
+
+    @property
+    def transfer_bytes(self) -> int:
+        return sum(action.size for action in self.actions if action.kind in ('upload', 'download'))
+
+    def report(self, limit: int = 500) -> str:
+        lines = [f"{self.local_dir} ↔ {self.remote_dir}"]
+        for kind, title in ACTION_TITLES.items():
+            count = self.count(kind)
+            if count:
+                lines.append(f"{title}: {count}")
+        lines.append(f"Передать байт: {self.transfer_bytes}, без изменений: {self.unchanged}")
+        if self.conflicts:
+            lines.append(f"Конфликтов: {len(self.conflicts)}")
+        if not self.actions:
+            lines.append("Папки синхронизированы, изменений нет")
+
+        lines.append("")
+        for action in self.actions[:limit]:
+            line = f"{ACTION_TITLES[action.kind]}: {action.path}"
+            if action.reason:
+                line += f" ({action.reason})"
+            lines.append(line)
+        if len(self.actions) > limit:
+            lines.append(f"... и еще {len(self.actions) - limit}")
+        for conflict in self.conflicts[:limit]:
+            lines.append(f"Конфликт: {conflict}")
+        return "\n".join(lines)
+
+
+class DirectorySync(TreeTransfer):
+    def __init__(self, client, workers: int = 4, delete: bool = False,
+                 compare_hash: bool = False, mtime_tolerance: float = 2.0):
+        super().__init__(client, workers)
+        self.delete = delete
+        self.compare_hash = compare_hash
+        # LIST отдает время с точностью до минуты
+        self.mtime_tolerance = mtime_tolerance if client.supports('MLST') else max(mtime_tolerance, 60.0)
+
+    def plan(self, local_dir: str, remote_dir: str, direction: str = 'upload') -> SyncPlan:
+        debug_log(f"\nDEBUG: DirectorySync: Сравнение {local_dir} и {remote_dir} ({direction})")
+        local = self._scan_local(local_dir)
+        links: List[str] = []
+        remote = self._scan_remote(remote_dir, links)
+        plan = SyncPlan(local_dir, remote_dir, direction)
+
+        if direction == 'upload':
+            self._diff(plan, local, remote, 'upload', 'mkdir_remote', 'delete_remote')
+        elif direction == 'download':
+            self._diff(plan, remote, local, 'download', 'mkdir_local', 'delete_local')
+        else:
+            self._diff_both(plan, local, remote)
+        self._skip_remote_links(plan, links)
+
+        if self.compare_hash:
+            self._drop_equal_hashes(plan, local_dir, remote_dir)
+        debug_log(f"DEBUG: DirectorySync: Действий {len(plan.actions)}, "
+                  f"байт {plan.transfer_bytes}, конфликтов {len(plan.conflicts)}")
+        return plan
+
+    def run(self, plan: SyncPlan,
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, str]:
+        local_dir, remote_dir = plan.local_dir, plan.remote_dir
+        by_kind: Dict[str, List[SyncAction]] = {kind: [] for kind in ACTION_TITLES}
+        for action in plan.actions:
+            by_kind[action.kind].append(action)
+            if action.kind in ('upload', 'download'):
+                self.stats.add_file(action.size)
+
+        # Удаляем до передачи: лишняя папка может мешать созданию одноименного файла
+        for action in by_kind['delete_remote']:
+            if self.cancel_event.is_set():
+                break
+            self._delete_remote(posixpath.join(remote_dir, action.path), action.is_dir)
+        for action in by_kind['delete_local']:
+            if self.cancel_event.is_set():
+                break
+            self._delete_local(self._local_path(local_dir, action.path), action.is_dir)
+
+        for action in by_kind['mkdir_local']:
+            try:
+                os.makedirs(self._local_path(local_dir, action.path), exist_ok=True)
+                self.stats.dirs_done += 1
+            except OSError as e:
+                self.stats.file_finished(False, action.path, str(e))
+
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='sync') as executor:
+            # Папки на сервере создаются по уровням, как в TreeUploader
+            levels: Dict[int, List[str]] = {}
+            for action in by_kind['mkdir_remote']:
+                levels.setdefault(action.path.count('/'), []).append(action.path)
+            for depth in sorted(levels):
+                if self.cancel_event.is_set():
+                    break
+                level = levels[depth]
+                chunks = [level[i::self.workers] for i in range(self.workers) if level[i::self.workers]]
+                for future in [executor.submit(self._make_dirs, remote_dir, chunk) for chunk in chunks]:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        debug_log(f"DEBUG: DirectorySync: Ошибка создания папок: {str(e)}")
+                        self.stats.file_finished(False, remote_dir, str(e))
+
+            slots = Semaphore(self.workers * 2)
+            for action in by_kind['upload'] + by_kind['download']:
+                slots.acquire()
+                if self.cancel_event.is_set():
+                    slots.release()
+                    break
+                future = executor.submit(self._transfer, action, local_dir, remote_dir, progress_callback)
+                future.add_done_callback(lambda _: slots.release())
+
+        self.client.invalidate_cache(remote_dir, tree=True)
+
+        if self.cancel_event.is_set():
+            return False, "Синхронизация отменена"
+        if self.stats.files_failed:
+            return False, self.stats.summary("Синхронизация с ошибками") + "\n" + "\n".join(self.stats.errors)
+        summary = self.stats.summary("Синхронизация завершена")
+        if plan.conflicts:
+            summary += f", пропущено конфликтов {len(plan.conflicts)}"
+        return True, summary
+
+    def _diff(self, plan: SyncPlan, source: Dict[str, SyncEntry], target: Dict[str, SyncEntry],
+              copy: str, mkdir: str, delete: str) -> None:
+        for path in sorted(source):
+            is_dir, size, modified = source[path]
+            existing = target.get(path)
+            if existing is not None and existing[0] != is_dir:
+                plan.conflicts.append(f"{path}: папка и файл с одним именем")
+            elif is_dir:
+                if existing is None:
+                    plan.actions.append(SyncAction(mkdir, path, True))
+            elif existing is None:
+                plan.actions.append(SyncAction(copy, path, False, size, modified, "новый"))
+            else:
+                reason = self._difference(source[path], existing)
+                if reason:
+                    plan.actions.append(SyncAction(copy, path, False, size, modified, reason))
+                else:
+                    plan.unchanged += 1
+
+        if self.delete:
+            for path in sorted(target):
+                parent = posixpath.dirname(path)
+                # Лишнюю папку удаляем целиком, ее содержимое в план не попадает.
+                # Папку, которая в источнике оказалась файлом (конфликт), не трогаем
+                if path not in source and (not parent or (parent in source and source[parent][0])):
+                    plan.actions.append(SyncAction(delete, path, target[path][0], reason="лишний"))
+
+    def _diff_both(self, plan: SyncPlan, local: Dict[str, SyncEntry], remote: Dict[str, SyncEntry]) -> None:
+        # Двусторонний режим ничего не удаляет: без истории нельзя отличить удаление от создания
+        for path in sorted(set(local) | set(remote)):
+            mine, theirs = local.get(path), remote.get(path)
+            if mine is not None and theirs is not None and mine[0] != theirs[0]:
+                plan.conflicts.append(f"{path}: папка и файл с одним именем")
+            elif theirs is None:
+                kind = 'mkdir_remote' if mine[0] else 'upload'
+                plan.actions.append(SyncAction(kind, path, mine[0], mine[1], mine[2],
+                                               '' if mine[0] else "новый"))
+            elif mine is None:
+                kind = 'mkdir_local' if theirs[0] else 'download'
+                plan.actions.append(SyncAction(kind, path, theirs[0], theirs[1], theirs[2],
+                                               '' if theirs[0] else "новый"))
+            elif mine[0]:
+                continue
+            elif mine[2] > theirs[2] + self.mtime_tolerance:
+                plan.actions.append(SyncAction('upload', path, False, mine[1], mine[2], "новее"))
+            elif theirs[2] > mine[2] + self.mtime_tolerance:
+                plan.actions.append(SyncAction('download', path, False, theirs[1], theirs[2], "новее"))
+            elif theirs[1] >= 0 and mine[1] != theirs[1]:
+                plan.conflicts.append(f"{path}: разный размер при одинаковом времени изменения")
+            else:
+                plan.unchanged += 1
+
+    def _skip_remote_links(self, plan: SyncPlan, links: List[str]) -> None:
+        # Содержимое ссылок на папки не сканировалось: загрузка в них писала бы через ссылку,
+        # а удаление и скачивание опирались бы на пустой список
+        for link in links:
+            prefix = link + '/'
+            kept = [action for action in plan.actions
+                    if action.path != link and not action.path.startswith(prefix)]
+            if len(kept) != len(plan.actions):
+                plan.conflicts.append(f"{link}: на сервере ссылка на папку, пропущено")
+                plan.actions = kept
+
+    def _difference(self, source: SyncEntry, target: SyncEntry) -> str:
+        _, size, modified = source
+        _, target_size, target_modified = target
+        # Размер -1 - сервер его не сообщил
+        if size >= 0 and target_size >= 0 and size != target_size:
+            return "размер"
+        if modified > target_modified + self.mtime_tolerance:
+            return "новее"
+        return ''
+
+    def _drop_equal_hashes(self, plan: SyncPlan, local_dir: str, remote_dir: str) -> None:
+        if self.client.hash_command is None:
+            debug_log("DEBUG: DirectorySync: Сервер не умеет считать хеши, сравниваем по времени")
+            return
+
+        # Хеш проверяем только там, где размеры совпали и отличается лишь время
+        candidates = {posixpath.join(remote_dir, action.path): action.path for action in plan.actions
+                      if action.kind in ('upload', 'download') and action.reason == "новее"}
+        if not candidates:
+            return
+
+        results = self.client.verify_files([(self._local_path(local_dir, path), remote_path)
+                                            for remote_path, path in candidates.items()])
+        equal = {candidates[remote_path] for remote_path, (verified, _) in results.items() if verified}
+        plan.unchanged += len(equal)
+        plan.actions = [action for action in plan.actions
+                        if action.path not in equal or action.kind not in ('upload', 'download')]
+
+    def _scan_local(self, local_dir: str) -> Dict[str, SyncEntry]:
+        entries: Dict[str, SyncEntry] = {}
+        pending = ['']
+        while pending:
+            rel_dir = pending.pop()
+            try:
+                with os.scandir(self._local_path(local_dir, rel_dir)) as it:
+                    for entry in it:
+                        path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        try:
+                            if entry.is_dir(follow_symlinks=False):
+                                entries[path] = (True, 0, 0.0)
+                                pending.append(path)
+                            elif entry.is_file():
+                                stat = entry.stat()
+                                entries[path] = (False, stat.st_size, stat.st_mtime)
+                        except OSError as e:
+                            debug_log(f"DEBUG: DirectorySync: Пропускаем {path}: {str(e)}")
+            except OSError as e:
+                if not rel_dir:
+                    raise
+                debug_log(f"DEBUG: DirectorySync: Ошибка чтения {rel_dir}: {str(e)}")
+        return entries
+
+    def _scan_remote(self, remote_dir: str, links: List[str]) -> Dict[str, SyncEntry]:
+        entries: Dict[str, SyncEntry] = {}
+
+        def list_dir(rel_dir: str):
+            with self.client.pool.connection() as conn:
+                return self.client._list_dir_strict(
+                    conn, posixpath.join(remote_dir, rel_dir) if rel_dir else remote_dir)
+
+        level = ['']
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='sync-scan') as executor:
+            while level and not self.cancel_event.is_set():
+                next_level = []
+                for rel_dir, listing in zip(level, executor.map(list_dir, level)):
+                    for entry in listing:
+                        if entry.name in ('.', '..'):
+                            continue
+                        path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                        if entry.is_dir:
+                            # В ссылки на папки не заходим: они могут вести по кругу
+                            if entry.is_link:
+                                links.append(path)
+                                continue
+                            entries[path] = (True, 0, 0.0)
+                            next_level.append(path)
+                        else:
+                            entries[path] = (False, entry.size, entry.modified)
+                level = next_level
+        return entries
+
+    def _transfer(self, action: SyncAction, local_dir: str, remote_dir: str,
+                  progress_callback: Optional[Callable[[int, int], None]]) -> None:
+        local_path = self._local_path(local_dir, action.path)
+        remote_path = posixpath.join(remote_dir, action.path)
+        if action.kind == 'download':
+            if self._download(remote_path, local_path, action.size, progress_callback) and action.modified:
+                try:
+                    os.utime(local_path, (action.modified, action.modified))
+                except OSError as e:
+                    debug_log(f"DEBUG: DirectorySync: Не удалось задать время {local_path}: {str(e)}")
+            return
+
+        # Без MFMT время на сервере станет временем загрузки, и файл будет считаться новее
+        if self._upload(local_path, remote_path, progress_callback) and self.client.supports('MFMT'):
+            stamp = time.strftime('%Y%m%d%H%M%S', time.gmtime(action.modified))
+            try:
+                with self.client.pool.connection() as conn:
+                    conn.sendcmd(f'MFMT {stamp} {remote_path}')
+            except Exception as e:
+                debug_log(f"DEBUG: DirectorySync: Не удалось задать время {remote_path}: {str(e)}")
+
+    def _delete_remote(self, path: str, is_dir: bool) -> None:
+        try:
+            if is_dir:
+                success, message = self.client.delete_directory_recursive(path)
+                if not success:
+                    raise OSError(message)
+            else:
+                with self.client.pool.connection() as conn:
+                    conn.delete(path)
+            debug_log(f"DEBUG: DirectorySync: Удалено {path}")
+        except Exception as e:
+            self.stats.file_finished(False, path, str(e))
+
+    def _delete_local(self, path: str, is_dir: bool) -> None:
+        try:
+            if is_dir:
+                shutil.rmtree(path)
+            else:
+                os.remove(path)
+            debug_log(f"DEBUG: DirectorySync: Удалено {path}")
+        except OSError as e:
+            self.stats.file_finished(False, path, str(e))
+
+    @staticmethod
+    def _local_path(local_dir: str, path: str) -> str:
+        return os.path.join(local_dir, *path.split('/')) if path else local_dir
+
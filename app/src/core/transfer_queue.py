@@ -0,0 +1,273 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from threading import Condition, Event, Lock
+from typing import Optional, Tuple, List, Dict, Any, Callable
+import heapq
+import itertools
+import time
+from src.utils.debug import debug_log
+
+
+class TransferCancelled(Exception):
+    pass
+
+
+class TransferPaused(InterruptedError):
+    # Пауза посреди файла: передача прерывается и отдает соединение в пул,
+    # после resume() файл продолжается с места остановки (REST)
+    def __init__(self, resumed: Event):
+        super().__init__("Передача приостановлена")
+        self.resumed = resumed
+
+    def wait(self) -> None:
+        self.resumed.wait()
+
+
+class TransferJob:
+    def __init__(self, job_id: int, direction: str, source: str, destination: str,
+                 priority: int = 0, size: int = 0, is_dir: bool = False):
+        self.id = job_id
+        self.direction = direction
+        self.source = source
+        self.destination = destination
+        self.priority = priority
+        self.size = size
+        self.is_dir = is_dir
+
+        self.transferred = 0
+        self.status = 'pending'
+        self.message = ''
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.cancelled = False
+        self.future: Future = Future()
+
+        self._resume = Event()
+        self._resume.set()
+
+    @property
+    def name(self) -> str:
+        return self.source.replace('\\', '/').rstrip('/').rsplit('/', 1)[-1]
+
+
+class TransferQueue:
+    PROGRESS_INTERVAL = 0.25
+
+    def __init__(self, client, workers: int = 4,
+                 on_progress: Optional[Callable[[Dict[str, Any]], None]] = None):
+        self.client = client
+        self.workers = max(1, int(workers))
+        self.on_progress = on_progress
+
+        self._heap: List[Tuple[int, int, TransferJob]] = []
+        self._counter = itertools.count()
+        self._ids = itertools.count(1)
+        self._cond = Condition()
+        self._batch: List[TransferJob] = []
+        self._batch_started: Optional[float] = None
+        self._paused = False
+        self._shutdown = False
+        self._active = 0
+
+        self._progress_lock = Lock()
+        self._last_progress = 0.0
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers,
+                                            thread_name_prefix='transfer')
+        for _ in range(self.workers):
+            self._executor.submit(self._worker)
+
+    def submit(self, direction: str, source: str, destination: str,
+               priority: int = 0, size: int = 0, is_dir: bool = False) -> TransferJob:
+        if direction not in ('upload', 'download'):
+            raise ValueError(f"Неизвестное направление передачи: {direction}")
+
+        with self._cond:
+            if self._shutdown:
+                raise RuntimeError("Очередь передач остановлена")
+
+            # Новый пакет начинается, когда очередь полностью опустела
+            if not self._heap and not self._active:
+                self._batch = []
+                self._batch_started = None
+
+            job = TransferJob(next(self._ids), direction, source, destination,
+                              priority, size, is_dir)
+            self._batch.append(job)
+            heapq.heappush(self._heap, (-priority, next(self._counter), job))
+            self._cond.notify()
+
+        debug_log(f"DEBUG: TransferQueue: Добавлено задание #{job.id} {direction}: {source} -> {destination}")
+        return job
+
+    def pause(self, job: Optional[TransferJob] = None) -> None:
+        if job is not None:
+            job._resume.clear()
+            if job.status == 'running':
+                job.status = 'paused'
+        else:
+            with self._cond:
+                self._paused = True
+                for item in self._batch:
+                    item._resume.clear()
+                    if item.status == 'running':
+                        item.status = 'paused'
+        self._report(force=True)
+
+    def resume(self, job: Optional[TransferJob] = None) -> None:
+        jobs = [job] if job is not None else None
+        with self._cond:
+            if jobs is None:
+                self._paused = False
+                jobs = list(self._batch)
+            for item in jobs:
+                if item.status == 'paused':
+                    item.status = 'running'
+                item._resume.set()
+            self._cond.notify_all()
+        self._report(force=True)
+
+    def cancel(self, job: Optional[TransferJob] = None) -> None:
+        with self._cond:
+            jobs = [job] if job is not None else list(self._batch)
+            for item in jobs:
+                if item.status in ('done', 'error', 'cancelled'):
+                    continue
+                item.cancelled = True
+                item._resume.set()
+                if item.status == 'pending':
+                    self._finish(item, 'cancelled', "Передача отменена")
+            self._cond.notify_all()
+        self._report(force=True)
+
+    def is_paused(self) -> bool:
+        return self._paused
+
+    def stats(self) -> Dict[str, Any]:
+        with self._cond:
+            jobs = list(self._batch)
+            started = self._batch_started
+
+        stats = {
+            'total': len(jobs),
+            'done': 0,
+            'failed': 0,
+            'cancelled': 0,
+            'running': 0,
+            'pending': 0,
+            'bytes_done': 0,
+            'bytes_total': 0,
+            'speed': 0.0,
+            'eta': None,
+            'current': None,
+            'paused': self._paused
+        }
+        for job in jobs:
+            stats['bytes_done'] += job.transferred
+            stats['bytes_total'] += max(job.size, job.transferred)
+            if job.status == 'done':
+                stats['done'] += 1
+            elif job.status == 'error':
+                stats['failed'] += 1
+            elif job.status == 'cancelled':
+                stats['cancelled'] += 1
+            elif job.status in ('running', 'paused'):
+                stats['running'] += 1
+                stats['current'] = job.name
+            else:
+                stats['pending'] += 1
+
+        if started:
+            elapsed = time.monotonic() - started
+            if elapsed > 0:
+                stats['speed'] = stats['bytes_done'] / elapsed
+            if stats['speed'] > 0 and stats['bytes_total'] > stats['bytes_done']:
+                stats['eta'] = (stats['bytes_total'] - stats['bytes_done']) / stats['speed']
+        return stats
+
+    def shutdown(self, wait: bool = False) -> None:
+        self.cancel()
+        with self._cond:
+            self._shutdown = True
+            self._cond.notify_all()
+        self._executor.shutdown(wait=wait)
+
+    def _worker(self) -> None:
+        while True:
+            with self._cond:
+                while not self._shutdown and (self._paused or not self._heap):
+                    self._cond.wait()
+                if self._shutdown:
+                    return
+                _, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    continue
+                job.status = 'running'
+                job.started_at = time.monotonic()
+                if self._batch_started is None:
+                    self._batch_started = job.started_at
+                self._active += 1
+
+            try:
+                self._run(job)
+            except Exception as e:
+                debug_log(f"DEBUG: TransferQueue: Ошибка задания #{job.id}: {str(e)}")
+                with self._cond:
+                    self._finish(job, 'error', str(e))
+            finally:
+                with self._cond:
+                    self._active -= 1
+                self._report(force=True)
+
+    def _run(self, job: TransferJob) -> None:
+        def progress_callback(done: int, total: int):
+            if job.cancelled:
+                raise TransferCancelled("Передача отменена")
+            if not job._resume.is_set():
+                raise TransferPaused(job._resume)
+            job.transferred = done
+            if total:
+                job.size = total
+            self._report()
+
+        if job.direction == 'upload':
+            if job.is_dir:
+                success, message = self.client.upload_folder(job.source, job.destination,
+                                                             progress_callback)
+            else:
+                success, message = self.client.upload_file(job.source, job.destination,
+                                                           progress_callback)
+        elif job.is_dir:
+            success, message = self.client.download_tree(job.source, job.destination,
+                                                         progress_callback)
+        else:
+            success, message = self.client.download_file(job.source, job.destination,
+                                                         progress_callback)
+
+        with self._cond:
+            if job.cancelled:
+                self._finish(job, 'cancelled', "Передача отменена")
+            elif success:
+                job.transferred = max(job.transferred, job.size)
+                self._finish(job, 'done', message)
+            else:
+                self._finish(job, 'error', message)
+
+    def _finish(self, job: TransferJob, status: str, message: str) -> None:
+        job.status = status
+        job.message = message
+        job.finished_at = time.monotonic()
+        if not job.future.done():
+            job.future.set_result((status == 'done', message))
+
+    def _report(self, force: bool = False) -> None:
+        if not self.on_progress:
+            return
+        now = time.monotonic()
+        with self._progress_lock:
+            if not force and now - self._last_progress < self.PROGRESS_INTERVAL:
+                return
+            self._last_progress = now
+        try:
+            self.on_progress(self.stats())
+        except Exception as e:
+            debug_log(f"DEBUG: TransferQueue: Ошибка обработчика прогресса: {str(e)}")
@@ -0,0 +1,59 @@
+import socket
+import time
+
+
+class TransferTuner:
+    MIN_BLOCK = 8 * 1024
+    MAX_BLOCK = 1024 * 1024
+    WINDOW = 0.5
+
+    def __init__(self, block_size: int, adaptive: bool = True):
+        self.block_size = self._clamp(block_size)
+        self.adaptive = adaptive
+        self.best_size = self.block_size
+        self.best_rate = 0.0
+        self._growing = True
+        self._window_start = time.monotonic()
+        self._window_bytes = 0
+
+    def tune_socket(self, sock: socket.socket, receive: bool = True) -> None:
+        option = socket.SO_RCVBUF if receive else socket.SO_SNDBUF
+        wanted = self.block_size * 4
+        try:
+            # Только поднимаем буфер: явное уменьшение отключает автонастройку ядра
+            if sock.getsockopt(socket.SOL_SOCKET, option) < wanted:
+                sock.setsockopt(socket.SOL_SOCKET, option, wanted)
+        except OSError:
+            pass
+
+    def record(self, count: int, sock: socket.socket = None, receive: bool = True) -> None:
+        if not self.adaptive:
+            return
+
+        self._window_bytes += count
+        now = time.monotonic()
+        elapsed = now - self._window_start
+        if elapsed < self.WINDOW:
+            return
+
+        rate = self._window_bytes / elapsed
+        self._window_start = now
+        self._window_bytes = 0
+
+        if rate > self.best_rate * 1.05:
+            self.best_rate = rate
+            self.best_size = self.block_size
+            if self._growing and self.block_size < self.MAX_BLOCK:
+                self.block_size = self._clamp(self.block_size * 2)
+                if sock is not None:
+                    self.tune_socket(sock, receive)
+        elif rate < self.best_rate * 0.9:
+            # Рост блока перестал помогать - возвращаемся к лучшему значению
+            self._growing = False
+            self.block_size = self.best_size
+
+    def measured(self) -> bool:
+        return self.best_rate > 0
+
+    def _clamp(self, size: int) -> int:
+        return max(self.MIN_BLOCK, min(self.MAX_BLOCK, int(size)))
@@ -0,0 +1,165 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from ftplib import error_perm, error_temp, error_reply, error_proto
+from typing import Optional, Tuple, List, Callable
+import posixpath
+
+from src.core.tree_transfer import TreeTransfer
+from src.utils.debug import debug_log
+
+
+class TreeDeleter(TreeTransfer):
+    def __init__(self, client, workers: int = 4, pipeline: int = 16):
+        super().__init__(client, workers)
+        # Сколько команд DELE/RMD отправляется, не дожидаясь ответов
+        self.pipeline = max(1, int(pipeline))
+
+    def run(self, remote_dir: str,
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, str]:
+        debug_log(f"\nDEBUG: TreeDeleter: Удаление {remote_dir}")
+        if self._is_link(remote_dir):
+            # Удаляем саму ссылку, содержимое папки, на которую она ведет, не трогаем
+            with self.client.pool.connection() as conn:
+                conn.delete(remote_dir)
+            self.client.invalidate_cache(remote_dir, tree=True)
+            return True, "Удалена ссылка на папку"
+        levels, files = self._scan(remote_dir)
+        debug_log(f"DEBUG: TreeDeleter: Найдено папок {sum(len(level) for level in levels)}, файлов {len(files)}")
+
+        # Прогресс считаем в удаленных элементах: байты здесь не передаются
+        for _ in range(len(files) + sum(len(level) for level in levels)):
+            self.stats.add_file(0)
+        self._progress = progress_callback
+
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='tree-delete') as executor:
+            self._delete_batch(executor, 'DELE', files)
+            # Папки снизу вверх: уровень можно удалять, только когда глубже все удалено
+            for level in reversed(levels):
+                if self.cancel_event.is_set():
+                    break
+                self._delete_batch(executor, 'RMD', level)
+
+        self.client.invalidate_cache(remote_dir, tree=True)
+        self.client.search_index.remove_tree(remote_dir)
+
+        if self.cancel_event.is_set():
+            return False, "Удаление отменено"
+        if self.stats.files_failed:
+            return False, (f"Удалено {self.stats.files_done} из {self.stats.files_total}, "
+                           f"ошибок {self.stats.files_failed}\n" + "\n".join(self.stats.errors))
+        return True, f"Удалено элементов: {self.stats.files_done}"
+
+    def _is_link(self, remote_dir: str) -> bool:
+        parent, name = posixpath.split(remote_dir.rstrip('/'))
+        with self.client.pool.connection() as conn:
+            entries = self.client._list_dir_strict(conn, parent or '/')
+        return any(entry.name == name and entry.is_link for entry in entries)
+
+    def _scan(self, remote_dir: str) -> Tuple[List[List[str]], List[str]]:
+        levels: List[List[str]] = [[remote_dir]]
+        files: List[str] = []
+
+        def list_dir(path: str):
+            with self.client.pool.connection() as conn:
+                return self.client._list_dir_strict(conn, path)
+
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='tree-delete-scan') as executor:
+            current = [remote_dir]
+            while current and not self.cancel_event.is_set():
+                next_level = []
+                futures = [(path, executor.submit(list_dir, path)) for path in current]
+                for path, future in futures:
+                    try:
+                        entries = future.result()
+                    except Exception as e:
+                        debug_log(f"DEBUG: TreeDeleter: Ошибка чтения {path}: {str(e)}")
+                        self.stats.add_file(0)
+                        self.stats.file_finished(False, path, str(e))
+                        continue
+                    for entry in entries:
+                        if entry.name in ('.', '..'):
+                            continue
+                        child = posixpath.join(path, entry.name)
+                        # Ссылку на папку удаляем как файл, не заходя внутрь
+                        if entry.is_dir and not entry.is_link:
+                            next_level.append(child)
+                        else:
+                            files.append(child)
+                if next_level:
+                    levels.append(next_level)
+                current = next_level
+        return levels, files
+
+    def _delete_batch(self, executor: ThreadPoolExecutor, command: str, paths: List[str]) -> None:
+        if not paths:
+            return
+        chunks = [paths[i::self.workers] for i in range(self.workers) if paths[i::self.workers]]
+        for future in [executor.submit(self._delete_chunk, command, chunk) for chunk in chunks]:
+            try:
+                future.result()
+            except Exception as e:
+                debug_log(f"DEBUG: TreeDeleter: Ошибка {command}: {str(e)}")
+
+    def _delete_chunk(self, command: str, paths: List[str]) -> None:
+        pending = deque(paths)
+        # Команды, ответ на которые потерян при обрыве: сервер мог успеть их выполнить
+        replayed: set = set()
+        attempts = 1 + max(0, int(self.client.settings.get('reconnect_attempts', 3)))
+        for attempt in range(1, attempts + 1):
+            try:
+                with self.client.pool.connection() as conn:
+                    self._pipeline(conn, command, pending, replayed)
+                return
+            except (OSError, EOFError, error_temp, error_reply, error_proto) as e:
+                # Поток ответов рассинхронизирован: соединение закрывается,
+                # неподтвержденные команды повторяем на новом
+                if self.cancel_event.is_set():
+                    return
+                debug_log(f"DEBUG: TreeDeleter: Обрыв при {command}: {str(e)}, осталось {len(pending)}")
+                if attempt == attempts:
+                    for path in pending:
+                        self._finished(False, path, str(e))
+                    return
+
+    def _pipeline(self, conn, command: str, pending: deque, replayed: set) -> None:
+        in_flight: deque = deque()
+        try:
+            while (pending or in_flight) and not self.cancel_event.is_set():
+                while pending and len(in_flight) < self.pipeline:
+                    path = pending.popleft()
+                    conn.putcmd(f'{command} {path}')
+                    in_flight.append(path)
+
+                try:
+                    conn.voidresp()
+                    success, message = True, ''
+                except error_temp as e:
+                    # 421 - сервер закрывает соединение, команда остается неподтвержденной;
+                    # прочие 4xx относятся только к этому элементу
+                    if str(e).startswith('421'):
+                        raise
+                    success, message = False, str(e)
+                except error_perm as e:
+                    success, message = False, str(e)
+                path = in_flight.popleft()
+                if not success and path in replayed and message.startswith('550'):
+                    # Повторенная команда: элемент уже удален до обрыва
+                    success, message = True, ''
+                self._finished(success, path, message)
+        finally:
+            # При обрыве или отмене неподтвержденные команды возвращаются в очередь
+            replayed.update(in_flight)
+            pending.extendleft(reversed(in_flight))
+
+        if in_flight:
+            # Ответы на них еще могут прийти - соединение дальше непригодно
+            raise error_reply(f"Не получены ответы на {len(in_flight)} команд")
+
+    def _finished(self, success: bool, path: str, message: str) -> None:
+        if not success:
+            debug_log(f"DEBUG: TreeDeleter: Не удалось удалить {path}: {message}")
+        self.stats.file_finished(success, path, message)
+        finished = self.stats.files_done + self.stats.files_failed
+        self._report(self._progress, finished, self.stats.files_total)
@@ -0,0 +1,273 @@
+from concurrent.futures import ThreadPoolExecutor, Future
+from collections import deque
+from ftplib import error_perm
+from threading import Lock, Semaphore, Event
+from typing import Optional, Tuple, List, Dict, Any, Callable
+import posixpath
+import os
+import time
+from src.core.connection_pool import PoolTimeout
+from src.core.transfer_queue import TransferPaused
+from src.utils.debug import debug_log
+
+
+class TreeTransferStats:
+    MAX_ERRORS = 100
+
+    def __init__(self):
+        self._lock = Lock()
+        self.started_at = time.monotonic()
+        self.files_total = 0
+        self.files_done = 0
+        self.files_failed = 0
+        self.dirs_done = 0
+        self.bytes_total = 0
+        self.bytes_done = 0
+        self.errors: List[str] = []
+
+    def add_file(self, size: int) -> None:
+        with self._lock:
+            self.files_total += 1
+            self.bytes_total += max(size, 0)
+
+    def add_bytes(self, count: int) -> Tuple[int, int]:
+        with self._lock:
+            self.bytes_done += count
+            return self.bytes_done, self.bytes_total
+
+    def file_finished(self, success: bool, name: str = '', message: str = '') -> None:
+        with self._lock:
+            if success:
+                self.files_done += 1
+            else:
+                self.files_failed += 1
+                if len(self.errors) < self.MAX_ERRORS:
+                    self.errors.append(f"{name}: {message}")
+
+    def speed(self) -> float:
+        elapsed = time.monotonic() - self.started_at
+        return self.bytes_done / elapsed if elapsed > 0 else 0.0
+
+    def summary(self, action: str) -> str:
+        elapsed = time.monotonic() - self.started_at
+        text = (f"{action}: файлов {self.files_done} из {self.files_total}, "
+                f"{self.bytes_done} байт за {elapsed:.1f} с ({self.speed() / 1024:.1f} КБ/с)")
+        if self.files_failed:
+            text += f", ошибок {self.files_failed}"
+        return text
+
+
+class TreeTransfer:
+    def __init__(self, client, workers: int = 4):
+        self.client = client
+        self.workers = max(1, int(workers))
+        self.cancel_event = Event()
+        self.stats = TreeTransferStats()
+
+    def cancel(self) -> None:
+        self.cancel_event.set()
+
+    def _report(self, progress_callback: Optional[Callable[[int, int], None]],
+                bytes_done: int, bytes_total: int) -> None:
+        if not progress_callback:
+            return
+        # Колбэк вызывается без блокировок: он может быть медленным или прервать
+        # передачу, другие потоки дерева ждать его не должны
+        try:
+            progress_callback(bytes_done, bytes_total)
+        except TransferPaused:
+            # Пауза прерывает только текущий файл, он продолжится после возобновления
+            raise
+        except Exception:
+            # Исключение из колбэка (например, отмена из очереди) останавливает всё дерево
+            self.cancel_event.set()
+            raise
+
+    def _file_progress(self, progress_callback: Optional[Callable[[int, int], None]]
+                       ) -> Callable[[int, int], None]:
+        # Прогресс одного файла переводится в общий счетчик байт дерева
+        last = 0
+
+        def file_progress(done: int, total: int):
+            nonlocal last
+            if self.cancel_event.is_set():
+                raise InterruptedError("Передача отменена")
+            delta = done - last
+            last = done
+            bytes_done, bytes_total = self.stats.add_bytes(delta)
+            self._report(progress_callback, bytes_done, bytes_total)
+        return file_progress
+
+    def _make_dirs(self, remote_dir: str, rel_dirs: List[str]) -> None:
+        with self.client.pool.connection() as conn:
+            for rel_dir in rel_dirs:
+                if self.cancel_event.is_set():
+                    return
+                path = posixpath.join(remote_dir, rel_dir.replace(os.sep, '/')) if rel_dir else remote_dir
+                try:
+                    conn.mkd(path)
+                except error_perm as e:
+                    # 550 для уже существующей папки - не ошибка
+                    if not str(e).startswith('550') and not str(e).startswith('521'):
+                        self.stats.file_finished(False, path, str(e))
+
+    def _download(self, remote_path: str, local_path: str, size: int,
+                  progress_callback: Optional[Callable[[int, int], None]]) -> bool:
+        if self.cancel_event.is_set():
+            return False
+
+        file_progress = self._file_progress(progress_callback)
+
+        try:
+            success, message = self.client.download_file(
+                remote_path, local_path, file_progress,
+                file_size=size if size >= 0 else None)
+        except Exception as e:
+            success, message = False, str(e)
+
+        if not success and not self.cancel_event.is_set():
+            debug_log(f"DEBUG: {type(self).__name__}: Ошибка скачивания {remote_path}: {message}")
+        self.stats.file_finished(success, remote_path, message)
+        return success
+
+    def _upload(self, local_path: str, remote_path: str,
+                progress_callback: Optional[Callable[[int, int], None]]) -> bool:
+        if self.cancel_event.is_set():
+            return False
+
+        file_progress = self._file_progress(progress_callback)
+
+        try:
+            success, message = self.client.upload_file(local_path, remote_path, file_progress)
+        except Exception as e:
+            success, message = False, str(e)
+
+        if not success and not self.cancel_event.is_set():
+            debug_log(f"DEBUG: {type(self).__name__}: Ошибка загрузки {local_path}: {message}")
+        self.stats.file_finished(success, local_path, message)
+        return success
+
+
+class TreeDownloader(TreeTransfer):
+    def run(self, remote_dir: str, local_dir: str,
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, str]:
+        debug_log(f"\nDEBUG: TreeDownloader: {remote_dir} -> {local_dir}")
+        # Ограничиваем число заданий в полете, чтобы память не росла на больших деревьях
+        slots = Semaphore(self.workers * 2)
+        pending = deque([(remote_dir, local_dir)])
+
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='tree-download') as executor:
+            while pending and not self.cancel_event.is_set():
+                remote_path, local_path = pending.popleft()
+                try:
+                    os.makedirs(local_path, exist_ok=True)
+                    with self.client.pool.connection() as conn:
+                        entries = self.client._list_dir(conn, remote_path, use_cache=False)
+                except PoolTimeout:
+                    # Все соединения заняты передачами (например, других заданий очереди):
+                    # папку не пропускаем, а читаем, когда соединение освободится
+                    debug_log(f"DEBUG: TreeDownloader: Нет свободного соединения для {remote_path}, ждем")
+                    pending.appendleft((remote_path, local_path))
+                    continue
+                except Exception as e:
+                    debug_log(f"DEBUG: TreeDownloader: Ошибка чтения {remote_path}: {str(e)}")
+                    self.stats.file_finished(False, remote_path, str(e))
+                    continue
+
+                self.stats.dirs_done += 1
+                for entry in entries:
+                    child_remote = posixpath.join(remote_path, entry.name)
+                    child_local = os.path.join(local_path, entry.name)
+                    if entry.is_dir:
+                        # В ссылки на папки не заходим: они могут вести по кругу
+                        if entry.is_link:
+                            debug_log(f"DEBUG: TreeDownloader: Пропускаем ссылку на папку {child_remote}")
+                        else:
+                            pending.append((child_remote, child_local))
+                        continue
+
+                    self.stats.add_file(entry.size)
+                    slots.acquire()
+                    if self.cancel_event.is_set():
+                        slots.release()
+                        break
+                    future = executor.submit(self._download, child_remote, child_local,
+                                             entry.size, progress_callback)
+                    future.add_done_callback(lambda _: slots.release())
+                del entries
+
+        if self.cancel_event.is_set():
+            return False, "Передача отменена"
+        if self.stats.files_failed:
+            return False, self.stats.summary("Скачивание с ошибками") + "\n" + "\n".join(self.stats.errors)
+        return True, self.stats.summary("Папка скачана")
+
+
+class TreeUploader(TreeTransfer):
+    def run(self, local_dir: str, remote_dir: str,
+            progress_callback: Optional[Callable[[int, int], None]] = None) -> Tuple[bool, str]:
+        debug_log(f"\nDEBUG: TreeUploader: {local_dir} -> {remote_dir}")
+        levels, files = self._scan(local_dir)
+        debug_log(f"DEBUG: TreeUploader: Найдено папок {sum(len(level) for level in levels)}, файлов {len(files)}")
+
+        with ThreadPoolExecutor(max_workers=self.workers,
+                                thread_name_prefix='tree-upload') as executor:
+            # Сначала создаем все папки уровень за уровнем, затем файлы идут без MKD
+            for level in levels:
+                chunks = [level[i::self.workers] for i in range(self.workers) if level[i::self.workers]]
+                futures = [executor.submit(self._make_dirs, remote_dir, chunk) for chunk in chunks]
+                for future in futures:
+                    try:
+                        future.result()
+                    except Exception as e:
+                        debug_log(f"DEBUG: TreeUploader: Ошибка создания папок: {str(e)}")
+                        self.stats.file_finished(False, remote_dir, str(e))
+                if self.cancel_event.is_set():
+                    break
+
+            slots = Semaphore(self.workers * 2)
+            for rel_path, size in files:
+                slots.acquire()
+                if self.cancel_event.is_set():
+                    slots.release()
+                    break
+                future = executor.submit(self._upload, os.path.join(local_dir, rel_path),
+                                         posixpath.join(remote_dir, rel_path.replace(os.sep, '/')),
+                                         progress_callback)
+                future.add_done_callback(lambda _: slots.release())
+
+        self.client.invalidate_cache(remote_dir, tree=True)
+
+        if self.cancel_event.is_set():
+            return False, "Передача отменена"
+        if self.stats.files_failed:
+            return False, self.stats.summary("Загрузка с ошибками") + "\n" + "\n".join(self.stats.errors)
+        return True, self.stats.summary("Папка загружена")
+
+    def _scan(self, local_dir: str) -> Tuple[List[List[str]], List[Tuple[str, int]]]:
+        levels: List[List[str]] = [['']]
+        files: List[Tuple[str, int]] = []
+        current = ['']
+        while current:
+            next_level = []
+            for rel_dir in current:
+                try:
+                    with os.scandir(os.path.join(local_dir, rel_dir)) as it:
+                        for entry in it:
+                            rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                            try:
+                                if entry.is_dir(follow_symlinks=False):
+                                    next_level.append(rel_path)
+                                elif entry.is_file():
+                                    size = entry.stat().st_size
+                                    files.append((rel_path, size))
+                                    self.stats.add_file(size)
+                            except OSError as e:
+                                self.stats.file_finished(False, rel_path, str(e))
+                except OSError as e:
+                    self.stats.file_finished(False, rel_dir or local_dir, str(e))
+            if next_level:
+                levels.append(next_level)
+            current = next_level
+        return levels, files
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk
 import time
+import humanize
+from typing import Callable, Dict, Any, Optional
 from src.utils.connection_monitor import ConnectionMonitor
 
 class ConnectionStatsPanel(ttk.LabelFrame):
@@ -16,13 +18,31 @@ class ConnectionStatsPanel(ttk.LabelFrame):
         
         self.last_check_label = ttk.Label(self, text="Последняя проверка: --")
         self.last_check_label.pack(anchor="w", padx=5, pady=2)
+
+        self.cache_label = ttk.Label(self, text="Кэш каталогов: --")
+        self.cache_label.pack(anchor="w", padx=5, pady=2)
+
+        self.compression_label = ttk.Label(self, text="Сжатие MODE Z: --")
+        self.compression_label.pack(anchor="w", padx=5, pady=2)
+
+        self.tls_label = ttk.Label(self, text="TLS: --")
+        self.tls_label.pack(anchor="w", padx=5, pady=2)
         
         self.monitor = None
+        self.cache_stats: Optional[Callable[[], Dict[str, Any]]] = None
+        self.compression_stats: Optional[Callable[[], Dict[str, Any]]] = None
+        self.tls_stats: Optional[Callable[[], Dict[str, Any]]] = None
         
-    def start_monitoring(self, host: str, port: int):
+    def start_monitoring(self, host: str, port: int,
+                         cache_stats: Optional[Callable[[], Dict[str, Any]]] = None,
+                         compression_stats: Optional[Callable[[], Dict[str, Any]]] = None,
+                         tls_stats: Optional[Callable[[], Dict[str, Any]]] = None):
         if self.monitor:
             self.stop_monitoring()
             
+        self.cache_stats = cache_stats
+        self.compression_stats = compression_stats
+        self.tls_stats = tls_stats
         self.monitor = ConnectionMonitor(host, port)
         self.monitor.start_monitoring()
         self.update_stats()
@@ -31,10 +51,16 @@ class ConnectionStatsPanel(ttk.LabelFrame):
         if self.monitor:
             self.monitor.stop_monitoring()
             self.monitor = None
+        self.cache_stats = None
+        self.compression_stats = None
+        self.tls_stats = None
 
         self.latency_label.config(text="Задержка: --")
         self.packet_loss_label.config(text="Потери пакетов: --")
         self.last_check_label.config(text="Последняя проверка: --")
+        self.cache_label.config(text="Кэш каталогов: --")
+        self.compression_label.config(text="Сжатие MODE Z: --")
+        self.tls_label.config(text="TLS: --")
             
     def update_stats(self):
         if self.monitor:
@@ -62,4 +88,30 @@ class ConnectionStatsPanel(ttk.LabelFrame):
                 last_check_text = "Последняя проверка: --"
             self.last_check_label.config(text=last_check_text)
 
+            if self.cache_stats:
+                cache = self.cache_stats()
+                miss_rate = 100 - cache['hit_rate'] if cache['hits'] + cache['misses'] else 0
+                self.cache_label.config(
+                    text=f"Кэш каталогов: попадания {cache['hit_rate']:.0f}% ({cache['hits']}), "
+                         f"промахи {miss_rate:.0f}% ({cache['misses']}), "
+                         f"каталогов {cache['entries']}")
+
+            if self.compression_stats:
+                compression = self.compression_stats()
+                if compression['files']:
+                    saved = compression['raw_bytes'] - compression['wire_bytes']
+                    self.compression_label.config(
+                        text=f"Сжатие MODE Z: {compression['ratio']:.1f}x, файлов {compression['files']}, "
+                             f"сэкономлено {humanize.naturalsize(max(saved, 0))}")
+
+            if self.tls_stats:
+                tls = self.tls_stats()
+                control, data = tls['control'], tls['data']
+                if control['handshakes']:
+                    self.tls_label.config(
+                        text=f"TLS: рукопожатие {control['avg_ms']:.0f} мс, "
+                             f"данные {data['avg_ms']:.0f} мс, сессия возобновлена "
+                             f"{control['resumed'] + data['resumed']} из "
+                             f"{control['handshakes'] + data['handshakes']}")
+
             self.after(500, self.update_stats) 
\ No newline at end of file
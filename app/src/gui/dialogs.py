@@ -219,6 +219,90 @@ class SettingsDialog:
         callback(settings)
 
 
+class SyncDialog:
+    def __init__(self, parent, local_dir: str, remote_dir: str,
+                 on_check: Callable, on_sync: Callable):
+        self.dialog = tk.Toplevel(parent)
+        self.dialog.title("Синхронизация папок")
+        self.dialog.geometry("700x500")
+        self.dialog.transient(parent)
+        self.dialog.grab_set()
+
+        frame = ttk.Frame(self.dialog, padding="10")
+        frame.pack(fill=tk.BOTH, expand=True)
+        frame.columnconfigure(1, weight=1)
+        frame.rowconfigure(5, weight=1)
+
+        self.local_dir = tk.StringVar(value=local_dir)
+        self.remote_dir = tk.StringVar(value=remote_dir)
+        ttk.Label(frame, text="Локальная папка:").grid(row=0, column=0, sticky="e", pady=2)
+        ttk.Entry(frame, textvariable=self.local_dir).grid(row=0, column=1, sticky="ew", pady=2)
+        ttk.Label(frame, text="Папка на сервере:").grid(row=1, column=0, sticky="e", pady=2)
+        ttk.Entry(frame, textvariable=self.remote_dir).grid(row=1, column=1, sticky="ew", pady=2)
+
+        self.direction = tk.StringVar(value='upload')
+        direction_frame = ttk.Frame(frame)
+        direction_frame.grid(row=2, column=0, columnspan=2, sticky="w", pady=5)
+        for value, text in (('upload', "На сервер"), ('download', "С сервера"),
+                            ('both', "В обе стороны")):
+            ttk.Radiobutton(direction_frame, text=text, value=value,
+                            variable=self.direction).pack(side=tk.LEFT, padx=5)
+
+        self.delete = tk.BooleanVar(value=False)
+        self.compare_hash = tk.BooleanVar(value=False)
+        options_frame = ttk.Frame(frame)
+        options_frame.grid(row=3, column=0, columnspan=2, sticky="w")
+        ttk.Checkbutton(options_frame, text="Удалять лишние файлы",
+                        variable=self.delete).pack(side=tk.LEFT, padx=5)
+        ttk.Checkbutton(options_frame, text="Сравнивать по хешу",
+                        variable=self.compare_hash).pack(side=tk.LEFT, padx=5)
+
+        ttk.Label(frame, text="План синхронизации:").grid(row=4, column=0, columnspan=2, sticky="w", pady=(10, 2))
+        report_frame = ttk.Frame(frame)
+        report_frame.grid(row=5, column=0, columnspan=2, sticky="nsew")
+        self.report = tk.Text(report_frame, wrap=tk.NONE, height=15, state=tk.DISABLED)
+        scrollbar = ttk.Scrollbar(report_frame, orient=tk.VERTICAL, command=self.report.yview)
+        self.report.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.report.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        btn_frame = ttk.Frame(frame)
+        btn_frame.grid(row=6, column=0, columnspan=2, pady=10)
+
+        self.check_button = ttk.Button(btn_frame, text="Проверить",
+                                       command=lambda: on_check(self.options()))
+        self.check_button.pack(side=tk.LEFT, padx=5)
+        self.sync_button = ttk.Button(btn_frame, text="Синхронизировать",
+                                      command=lambda: on_sync(self.options()))
+        self.sync_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Закрыть",
+                   command=self.dialog.destroy).pack(side=tk.LEFT, padx=5)
+
+    def options(self) -> Dict:
+        return {
+            'local_dir': self.local_dir.get().strip(),
+            'remote_dir': self.remote_dir.get().strip(),
+            'direction': self.direction.get(),
+            'delete': self.delete.get(),
+            'compare_hash': self.compare_hash.get()
+        }
+
+    def show_report(self, text: str):
+        if not self.dialog.winfo_exists():
+            return
+        self.report.configure(state=tk.NORMAL)
+        self.report.delete("1.0", tk.END)
+        self.report.insert("1.0", text)
+        self.report.configure(state=tk.DISABLED)
+
+    def set_busy(self, busy: bool):
+        if not self.dialog.winfo_exists():
+            return
+        state = tk.DISABLED if busy else tk.NORMAL
+        self.check_button.configure(state=state)
+        self.sync_button.configure(state=state)
+
+
 class AboutDialog:
     def __init__(self, parent):
         self.dialog = tk.Toplevel(parent)
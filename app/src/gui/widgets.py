@@ -1,10 +1,16 @@
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from typing import Callable, Optional, List, Tuple, Dict, Any
+from typing import Callable, Optional, List, Tuple, Dict, Any, Iterable
+from bisect import bisect_right
 from datetime import datetime
+import humanize
+import itertools
 
 
 class FileListView(ttk.Treeview):
+    # Строк сверх видимой области, которые держим в Treeview для плавной прокрутки
+    OVERSCAN = 50
+
     def __init__(self, parent, **kwargs):
         super().__init__(parent, 
                         columns=("name", "size", "type", "modified"),
@@ -12,18 +18,18 @@ class FileListView(ttk.Treeview):
                         selectmode="extended",
                         **kwargs)
 
-        self.heading("name", text="Имя")
-        self.heading("size", text="Размер")
-        self.heading("type", text="Тип")
-        self.heading("modified", text="Изменён")
+        self.heading("name", text="Имя", command=lambda: self._sort_by_column("name"))
+        self.heading("size", text="Размер", command=lambda: self._sort_by_column("size"))
+        self.heading("type", text="Тип", command=lambda: self._sort_by_column("type"))
+        self.heading("modified", text="Изменён", command=lambda: self._sort_by_column("modified"))
         
         self.column("name", width=300)
         self.column("size", width=100)
         self.column("type", width=100)
         self.column("modified", width=150)
 
-        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self.yview)
-        self.configure(yscrollcommand=self.scrollbar.set)
+        self.scrollbar = ttk.Scrollbar(parent, orient="vertical", command=self._on_scrollbar)
+        self.configure(yscrollcommand=self._on_view_changed)
 
         self.pack(side="left", fill="both", expand=True)
         self.scrollbar.pack(side="right", fill="y")
@@ -31,32 +37,401 @@ class FileListView(ttk.Treeview):
         self.current_sort = None
         self.reverse_sort = False
 
-    def set_items(self, items: List[Any]) -> None:
-        self.delete(*self.get_children())
+        # Модель списка: порядок строк и значения. В Treeview материализовано только окно
+        # вокруг видимой области, остальные строки существуют только здесь
+        self._order: List[str] = []
+        self._values: Dict[str, Tuple] = {}
+        # Исходные размер (байты или число элементов папки) и время изменения - ключи сортировки
+        self._raw: Dict[str, Tuple[int, float]] = {}
+        # Отсортированные по возрастанию перестановки модели для каждой колонки
+        self._sort_cache: Dict[str, List[str]] = {}
+        self._name_index: Dict[str, str] = {}
+        self._positions: Optional[Dict[str, int]] = None
+        self._ids = itertools.count()
+
+        self._window: List[str] = []
+        self._window_set: set = set()
+        self._window_start = 0
+        self._selected: set = set()
+        self._anchor: Optional[str] = None
+        self._rendering = False
+        self._pending_top: Optional[int] = None
+        self._input_state: Optional[int] = None
+        self._input_row: Optional[str] = None
+        self._path: Optional[str] = None
+        self._changed: set = set()
+
+        tag = f"{self}_virtual"
+        self.bindtags((tag,) + self.bindtags())
+        self.bind_class(tag, "<ButtonPress-1>", self._on_user_input)
+        self.bind_class(tag, "<ButtonPress-2>", self._on_user_input)
+        self.bind_class(tag, "<ButtonPress-3>", self._on_user_input)
+        self.bind_class(tag, "<KeyPress>", self._on_user_input)
+        self.bind_class(tag, "<<TreeviewSelect>>", self._on_select)
+        self.bind_class(tag, "<Configure>", lambda e: self._schedule_render(self._top()))
+
+    def set_items(self, items: List[Any], path: Optional[str] = None) -> None:
+        # В той же папке сравниваем новый список с текущим по имени: у сохранившихся строк
+        # остаются прежние iid, поэтому выделение и позиция прокрутки не теряются
+        reset = path != self._path
+        self._path = path
+        if reset:
+            anchor, top = None, 0
+        else:
+            top = self._pending_top if self._pending_top is not None else self._top()
+            anchor = self._order[top] if top < len(self._order) else None
+
+        old_values, old_index = self._values, self._name_index
+        self._order = []
+        self._values = {}
+        self._raw = {}
+        self._name_index = {}
+        for item in items:
+            values, raw = self._row_values(item)
+            name = str(values[0])
+            iid = None if reset or name in self._name_index else old_index.get(name)
+            if iid is None:
+                iid = f"row{next(self._ids)}"
+            elif old_values[iid] != values:
+                self._changed.add(iid)
+            self._order.append(iid)
+            self._values[iid] = values
+            self._raw[iid] = raw
+            self._name_index.setdefault(name, iid)
+
+        self._sort_cache = {}
+        if self.current_sort:
+            self._order = self._sorted_order()
+        self._positions = None
+        if reset:
+            self._selected.clear()
+            self._anchor = None
+            self._changed.clear()
+            self._reset_window(0)
+            return
+
+        self._selected.intersection_update(self._values)
+        if anchor in self._values:
+            top = self._position(anchor)
+        # Виджет обновляем одним проходом по окну, когда Tk освободится
+        self._schedule_render(top)
+
+    def append_items(self, items: List[Any]) -> None:
+        # Дописывает строки в конец списка, пока каталог еще читается с сервера
         for item in items:
-            if isinstance(item, dict):
-                values = (
-                    item['name'],
-                    item.get('size_human', ''),
-                    item['type'],
-                    item['modified'].strftime('%Y-%m-%d %H:%M:%S') if isinstance(item['modified'], datetime) else item['modified']
-                )
-            else:
-                values = item
-            self.insert("", "end", values=values)
+            values, raw = self._row_values(item)
+            iid = f"row{next(self._ids)}"
+            self._order.append(iid)
+            self._values[iid] = values
+            self._raw[iid] = raw
+            self._name_index.setdefault(str(values[0]), iid)
+
+        self._sort_cache = {}
+        self._positions = None
+        self._schedule_render(self._pending_top if self._pending_top is not None else self._top())
+
+    def update_items(self, items: List[Any], removed: Iterable[str] = (),
+                     order_key: Optional[Callable[[Tuple], Any]] = None) -> None:
+        # Точечное изменение списка: строки items заменяют одноименные или добавляются,
+        # имена из removed удаляются. Остальные строки, выделение и прокрутка не трогаются.
+        # order_key - порядок, в котором вставлять новые строки, если колонка сортировки не выбрана
+        top = self._pending_top if self._pending_top is not None else self._top()
+        anchor = self._order[top] if top < len(self._order) else None
+
+        gone = {self._name_index.pop(name) for name in removed if name in self._name_index}
+        if gone:
+            self._order = [iid for iid in self._order if iid not in gone]
+            for iid in gone:
+                del self._values[iid]
+                del self._raw[iid]
+            self._selected -= gone
+
+        added = []
+        for item in items:
+            values, raw = self._row_values(item)
+            iid = self._name_index.get(str(values[0]))
+            if iid is None:
+                iid = f"row{next(self._ids)}"
+                self._name_index[str(values[0])] = iid
+                added.append(iid)
+            elif self._values[iid] != values:
+                self._changed.add(iid)
+            self._values[iid] = values
+            self._raw[iid] = raw
+
+        self._sort_cache = {}
+        if self.current_sort:
+            self._order.extend(added)
+            self._order = self._sorted_order()
+        elif added and order_key is not None:
+            keys = [order_key(self._values[iid]) for iid in self._order]
+            for iid in added:
+                key = order_key(self._values[iid])
+                index = bisect_right(keys, key)
+                keys.insert(index, key)
+                self._order.insert(index, iid)
+        else:
+            self._order.extend(added)
+        self._positions = None
+
+        if anchor in self._values:
+            top = self._position(anchor)
+        self._schedule_render(top)
+
+    def set_cell(self, name: str, column: str, value: Any, raw: Optional[int] = None) -> None:
+        item = self._name_index.get(name)
+        if item is None:
+            return
+        values = list(self._values[item])
+        values[self['columns'].index(column)] = value
+        self._values[item] = tuple(values)
+        if column == 'size' and raw is not None:
+            self._raw[item] = (raw, self._raw[item][1])
+            self._sort_cache.pop('size', None)
+        if item in self._window_set:
+            ttk.Treeview.set(self, item, column, value)
+
+    def clear(self) -> None:
+        self.set_items([])
+
+    # Методы Treeview, которыми пользуется приложение, работают с моделью целиком
+
+    def get_children(self, item: Optional[str] = None) -> Tuple[str, ...]:
+        if item:
+            return ()
+        return tuple(self._order)
+
+    def selection(self) -> Tuple[str, ...]:
+        selected = set(ttk.Treeview.selection(self)) | self._selected
+        return tuple(sorted((iid for iid in selected if iid in self._values), key=self._position))
+
+    def selection_add(self, *items: str) -> None:
+        self._selected.update(iid for iid in items if iid not in self._window_set)
+        ttk.Treeview.selection_add(self, [iid for iid in items if iid in self._window_set])
+
+    def selection_remove(self, *items: str) -> None:
+        self._selected.difference_update(items)
+        ttk.Treeview.selection_remove(self, [iid for iid in items if iid in self._window_set])
+
+    def item(self, item: str, option: Optional[str] = None, **kw) -> Any:
+        if item in self._values and not kw and option in (None, 'values'):
+            values = list(self._values[item])
+            if option == 'values':
+                return values
+            return {'text': '', 'image': '', 'values': values, 'open': 0, 'tags': ''}
+        return ttk.Treeview.item(self, item, option, **kw)
+
+    def delete(self, *items: str) -> None:
+        removed = set(items)
+        if len(removed) >= len(self._order) and removed.issuperset(self._order):
+            self.clear()
+            return
+
+        top = self._top()
+        self._order = [iid for iid in self._order if iid not in removed]
+        for iid in removed:
+            values = self._values.pop(iid, None)
+            self._raw.pop(iid, None)
+            if values is not None and self._name_index.get(str(values[0])) == iid:
+                del self._name_index[str(values[0])]
+        self._selected -= removed
+        self._sort_cache = {}
+        self._positions = None
+        self._reset_window(top)
+
+    def see(self, item: str) -> None:
+        if item not in self._values:
+            return
+        if item not in self._window_set:
+            self._render(self._position(item) - self._visible_rows() // 2)
+        ttk.Treeview.see(self, item)
 
     def _sort_by_column(self, column: str) -> None:
-        items = [(self.set(item, column), item) for item in self.get_children('')]
-
         if self.current_sort == column:
             self.reverse_sort = not self.reverse_sort
         else:
             self.reverse_sort = False
         self.current_sort = column
 
-        items.sort(reverse=self.reverse_sort)
-        for index, (_, item) in enumerate(items):
-            self.move(item, '', index)
+        self._order = self._sorted_order()
+        self._positions = None
+        # Переставляем только материализованное окно, за один проход
+        self._render(self._top())
+
+    def _sorted_order(self) -> List[str]:
+        ascending = self._sort_cache.get(self.current_sort)
+        if ascending is None:
+            ascending = sorted(self._order, key=self._sort_key(self.current_sort))
+            self._sort_cache[self.current_sort] = ascending
+        return ascending[::-1] if self.reverse_sort else list(ascending)
+
+    def _sort_key(self, column: str) -> Callable[[str], Any]:
+        values, raw = self._values, self._raw
+        if column == 'size':
+            # Папки (по числу элементов) идут отдельно от файлов (по размеру в байтах)
+            return lambda iid: (values[iid][2] != "Папка", raw[iid][0], str(values[iid][0]).lower())
+        if column == 'modified':
+            return lambda iid: (raw[iid][1], str(values[iid][0]).lower())
+        if column == 'type':
+            return lambda iid: (str(values[iid][2]), str(values[iid][0]).lower())
+        return lambda iid: str(values[iid][0]).lower()
+
+    @staticmethod
+    def _row_values(item: Any) -> Tuple[Tuple, Tuple[int, float]]:
+        if isinstance(item, dict):
+            modified = item['modified']
+            return (
+                item['name'],
+                item.get('size_human', ''),
+                item['type'],
+                modified.strftime('%Y-%m-%d %H:%M:%S') if isinstance(modified, datetime) else modified
+            ), (
+                item['size'] if isinstance(item.get('size'), int) else -1,
+                modified.timestamp() if isinstance(modified, datetime) else item.get('mtime', 0.0)
+            )
+        # Строка таблицы: четыре отображаемых значения и, необязательно, размер и время в исходном виде
+        item = tuple(item)
+        raw = (item[4], item[5]) if len(item) >= 6 else (-1, 0.0)
+        return item[:4], raw
+
+    def _position(self, item: str) -> int:
+        if self._positions is None:
+            self._positions = {iid: index for index, iid in enumerate(self._order)}
+        return self._positions.get(item, len(self._order))
+
+    def _visible_rows(self) -> int:
+        try:
+            row_height = int(ttk.Style().lookup('Treeview', 'rowheight') or 20)
+        except (ValueError, tk.TclError):
+            row_height = 20
+        height = self.winfo_height()
+        if height <= 1:
+            height = 40 * row_height
+        return max(1, height // row_height)
+
+    def _top(self) -> int:
+        if not self._window:
+            return 0
+        first = float(ttk.Treeview.yview(self)[0])
+        return self._window_start + int(round(first * len(self._window)))
+
+    def _reset_window(self, top: int) -> None:
+        self._rendering = True
+        try:
+            materialized = ttk.Treeview.get_children(self)
+            if materialized:
+                ttk.Treeview.delete(self, *materialized)
+        finally:
+            self._rendering = False
+        self._window = []
+        self._window_set = set()
+        self._render(top)
+
+    def _render(self, top: int) -> None:
+        # Синхронная отрисовка покрывает и отложенную
+        self._pending_top = None
+        total = len(self._order)
+        visible = self._visible_rows()
+        top = max(0, min(top, total - visible))
+        start = max(0, top - self.OVERSCAN)
+        window = self._order[start:top + visible + self.OVERSCAN]
+
+        self._rendering = True
+        try:
+            # Выделение строк окна переносим в модель, чтобы не потерять его при удалении
+            self._selected.update(iid for iid in ttk.Treeview.selection(self) if iid in self._values)
+
+            keep = self._window_set.intersection(window)
+            leaving = [iid for iid in self._window if iid not in keep]
+            if leaving:
+                ttk.Treeview.delete(self, *leaving)
+
+            # После обновления списка сохранившиеся строки могли поменяться местами
+            reorder = [iid for iid in self._window if iid in keep] != [iid for iid in window if iid in keep]
+            for index, iid in enumerate(window):
+                if iid not in keep:
+                    ttk.Treeview.insert(self, '', index, iid=iid, values=self._values[iid])
+                    continue
+                if reorder:
+                    ttk.Treeview.move(self, iid, '', index)
+                if iid in self._changed:
+                    ttk.Treeview.item(self, iid, values=self._values[iid])
+            self._changed.clear()
+
+            self._window = window
+            self._window_set = set(window)
+            self._window_start = start
+
+            selected = [iid for iid in window if iid in self._selected]
+            if set(selected) != set(ttk.Treeview.selection(self)):
+                ttk.Treeview.selection_set(self, selected)
+            self._selected.difference_update(selected)
+
+            if window:
+                ttk.Treeview.yview_moveto(self, (top - start) / len(window))
+        finally:
+            self._rendering = False
+        self._update_scrollbar()
+
+    def _schedule_render(self, top: int) -> None:
+        if self._pending_top is None:
+            self.after_idle(self._flush_render)
+        self._pending_top = top
+
+    def _flush_render(self) -> None:
+        top, self._pending_top = self._pending_top, None
+        if top is not None:
+            self._render(top)
+
+    def _update_scrollbar(self) -> None:
+        first, last = ttk.Treeview.yview(self)
+        self._on_view_changed(first, last)
+
+    def _on_view_changed(self, first: Any, last: Any) -> None:
+        total = len(self._order)
+        size = len(self._window)
+        if not total or not size:
+            self.scrollbar.set(0.0, 1.0)
+            return
+
+        top = self._window_start + int(round(float(first) * size))
+        bottom = self._window_start + int(round(float(last) * size))
+        self.scrollbar.set(top / total, bottom / total)
+        if self._rendering or self._pending_top is not None:
+            return
+
+        # Видимая область подошла к краю окна - сдвигаем окно по модели
+        margin = self.OVERSCAN // 2
+        end = self._window_start + size
+        if (top - self._window_start < margin and self._window_start > 0) or \
+                (end - bottom < margin and end < total):
+            self._schedule_render(top)
+
+    def _on_scrollbar(self, *args: Any) -> None:
+        if args and args[0] == 'moveto':
+            self._render(int(float(args[1]) * len(self._order)))
+        else:
+            ttk.Treeview.yview(self, *args)
+
+    def _on_user_input(self, event: tk.Event) -> None:
+        self._input_state = event.state
+        self._input_row = self.identify_row(event.y) if event.type == tk.EventType.ButtonPress else None
+
+    def _on_select(self, event: tk.Event) -> None:
+        state, self._input_state = self._input_state, None
+        if self._rendering or state is None:
+            return
+
+        focus = self._input_row or ttk.Treeview.focus(self)
+        if state & 0x0001 and self._anchor in self._values and focus in self._values:
+            # Shift: диапазон от якоря может выходить за пределы окна
+            low, high = sorted((self._position(self._anchor), self._position(focus)))
+            self._selected = set(self._order[low:high + 1]) - self._window_set
+        elif not state & (0x0004 | 0x0008):
+            self._selected.clear()
+            self._anchor = focus or None
+        else:
+            self._anchor = focus or self._anchor
 
 
 class StatusBar(ttk.Frame):
@@ -86,6 +461,11 @@ class StatusBar(ttk.Frame):
                                      style='Statusbar.TLabel')
         self.percent_label.pack(side="right", padx=(0, 5))
 
+        self.speed_label = ttk.Label(progress_frame,
+                                   text="",
+                                   style='Statusbar.TLabel')
+        self.speed_label.pack(side="right", padx=(0, 5))
+
     def set_status(self, text: str, error: bool = False) -> None:
         self.status_label.configure(
             text=text,
@@ -107,8 +487,33 @@ class StatusBar(ttk.Frame):
         self.progress.update_idletasks()
         self.percent_label.update_idletasks()
 
+    def set_transfer_stats(self, stats: Dict[str, Any]) -> None:
+        if stats['bytes_total']:
+            self.set_progress(stats['bytes_done'] / stats['bytes_total'] * 100)
+        elif stats['total']:
+            finished = stats['done'] + stats['failed'] + stats['cancelled']
+            self.set_progress(finished / stats['total'] * 100)
+
+        if stats['paused']:
+            text = "Пауза"
+        elif stats['running'] or stats['pending']:
+            text = f"{humanize.naturalsize(stats['speed'])}/с"
+            if stats['eta'] is not None:
+                eta = int(stats['eta'])
+                text += f", осталось {eta // 3600}:{eta % 3600 // 60:02d}:{eta % 60:02d}"
+        else:
+            text = ""
+        self.speed_label.configure(text=text)
+
 
 class ConnectionPanel(ttk.LabelFrame):
+    TLS_MODES = {
+        'none': "Без шифрования",
+        'explicit': "Явный FTPS (AUTH TLS)",
+        'implicit': "Неявный FTPS"
+    }
+    DEFAULT_PORTS = {'none': "21", 'explicit': "21", 'implicit': "990"}
+
     def __init__(self, parent, on_connect: Callable, **kwargs):
         super().__init__(parent, text="Подключение", style='Connection.TFrame', **kwargs)
 
@@ -138,10 +543,18 @@ class ConnectionPanel(ttk.LabelFrame):
                                        command=self._toggle_password_visibility)
         self.toggle_pwd_btn.pack(side=tk.LEFT, padx=(2, 0))
 
+        ttk.Label(self, text="Шифрование:").grid(row=4, column=0, padx=5, pady=2, sticky="e")
+        self.tls_var = tk.StringVar(value=self.TLS_MODES['none'])
+        self.tls_combo = ttk.Combobox(self, textvariable=self.tls_var, state="readonly",
+                                      values=list(self.TLS_MODES.values()))
+        self.tls_combo.grid(row=4, column=1, padx=5, pady=2, sticky="ew")
+        self.tls_combo.bind('<<ComboboxSelected>>', self._on_tls_selected)
+        self._tls_mode = 'none'
+
         self.connect_btn = ttk.Button(self, text="Подключиться",
                                     command=self._on_button_click,
                                     style="Primary.TButton")
-        self.connect_btn.grid(row=4, column=0, columnspan=2, pady=5)
+        self.connect_btn.grid(row=5, column=0, columnspan=2, pady=5)
 
         self.columnconfigure(1, weight=1)
         
@@ -190,7 +603,24 @@ class ConnectionPanel(ttk.LabelFrame):
                 return
 
             if self._on_connect_callback:
-                self._on_connect_callback(host, port, user, password)
+                self._on_connect_callback(host, port, user, password, self.get_tls_mode())
+
+    def get_tls_mode(self) -> str:
+        label = self.tls_var.get()
+        return next((mode for mode, text in self.TLS_MODES.items() if text == label), 'none')
+
+    def set_tls_mode(self, mode: str) -> None:
+        self.tls_var.set(self.TLS_MODES.get(mode, self.TLS_MODES['none']))
+        self._tls_mode = self.get_tls_mode()
+
+    def _on_tls_selected(self, event=None) -> None:
+        # Стандартный порт меняем вслед за режимом, введенный вручную не трогаем
+        mode = self.get_tls_mode()
+        port = self.entries["port"]
+        if port.get().strip() == self.DEFAULT_PORTS[self._tls_mode]:
+            port.delete(0, tk.END)
+            port.insert(0, self.DEFAULT_PORTS[mode])
+        self._tls_mode = mode
 
     def _toggle_password_visibility(self) -> None:
         if self.show_password.get():
@@ -200,18 +630,29 @@ class ConnectionPanel(ttk.LabelFrame):
             self.password_entry.configure(show="")
             self.show_password.set(True)
 
+    def set_connecting(self) -> None:
+        # Пока идет подключение, повторное нажатие не должно начать второе
+        self.connect_btn.configure(text="Подключение...", state="disabled")
+        for entry in self.entries.values():
+            entry.configure(state="disabled")
+        self.password_entry.configure(state="disabled")
+        self.tls_combo.configure(state="disabled")
+
     def set_connected_state(self, connected: bool) -> None:
         self._is_connected = connected
+        self.connect_btn.configure(state="normal")
         if connected:
             self.connect_btn.configure(text="Отключиться")
             for entry in self.entries.values():
                 entry.configure(state="disabled")
             self.password_entry.configure(state="disabled")
+            self.tls_combo.configure(state="disabled")
         else:
             self.connect_btn.configure(text="Подключиться")
             for entry in self.entries.values():
                 entry.configure(state="normal")
             self.password_entry.configure(state="normal")
+            self.tls_combo.configure(state="readonly")
 
 
 class SearchPanel(ttk.LabelFrame):
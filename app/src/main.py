@@ -11,28 +11,33 @@ import time
 import humanize
 import json
 import re
-from typing import Dict, List, Tuple
+from typing import Any, Dict, List, Tuple, Optional
 import base64
 import sys
 import threading
 import shutil
+import posixpath
 
 from src.core.ftp_client import FTPClient
+from src.core.transfer_queue import TransferQueue
+from src.core.navigator import RemoteNavigator
+from src.core.search_index import SearchIndex, IndexCrawler, name_matcher
 from src.core.settings import Settings
 from src.gui.widgets import FileListView, ConnectionPanel, SearchPanel, PathPanel, StatusBar
-from src.gui.dialogs import QuickConnectDialog, HistoryDialog, BookmarksDialog, SettingsDialog, AboutDialog
+from src.gui.dialogs import QuickConnectDialog, HistoryDialog, BookmarksDialog, SettingsDialog, AboutDialog, SyncDialog
 from src.gui.connection_stats import ConnectionStatsPanel
 from src.utils.crypto import Crypto
 from src.utils.helpers import filter_hidden_files, sort_items
+from src.utils.local_listing import LocalEntry, ChildCounter, scan_directory, list_entries, stat_entry
+from src.utils.fs_watcher import DirectoryWatcher
 from src.gui.styles import setup_styles
-
-
-def debug_log(message: str):
-    sys.stderr.write(f"{message}\n")
-    sys.stderr.flush()
+from src.utils.debug import debug_log
 
 
 class Application(tk.Tk):
+    # Больше изменений за одно обновление наблюдателя - дешевле перечитать папку целиком
+    WATCH_RESCAN_LIMIT = 500
+
     def __init__(self):
         super().__init__()
 
@@ -52,7 +57,23 @@ class Application(tk.Tk):
             self.attributes('-zoomed', True)
 
         self.settings = Settings()
-        self.ftp_client = FTPClient()
+        self.ftp_client = FTPClient(self.settings)
+        self.ftp_client.on_listing_revalidated = lambda path, changed: self.schedule_update(
+            lambda: self._on_remote_listing_revalidated(path, changed))
+        self.transfer_queue = None
+        self._connecting = False
+        self._child_count_cancel = None
+        self.remote_nav = RemoteNavigator(self.schedule_update)
+        self._remote_dir = "/"
+        # Локальные папки читаются в фоне тем же механизмом, что и удаленные
+        self.local_nav = RemoteNavigator(self.schedule_update)
+        self._local_dir = None
+        self._local_count_cancel = None
+        self.child_counter = ChildCounter()
+        self.local_watcher = DirectoryWatcher(self._on_local_changed,
+                                              poll_interval=self.settings.get('watch_poll_interval', 2))
+        self.local_index = SearchIndex(sep=os.sep)
+        self.local_indexer = IndexCrawler(self.local_index, self._scan_local_dir)
         self.crypto = Crypto()
 
         self.connection_history_file = os.path.join(
@@ -115,6 +136,15 @@ class Application(tk.Tk):
         operations_menu.add_command(label="Скачать файлы".ljust(menu_width), 
                                   command=self._download_files,
                                   accelerator="⌘D" if sys.platform == 'darwin' else "Ctrl+D")
+        operations_menu.add_command(label="Синхронизировать папки".ljust(menu_width),
+                                  command=self._sync_folders)
+        operations_menu.add_separator()
+        operations_menu.add_command(label="Приостановить передачи".ljust(menu_width),
+                                  command=self._pause_transfers)
+        operations_menu.add_command(label="Продолжить передачи".ljust(menu_width),
+                                  command=self._resume_transfers)
+        operations_menu.add_command(label="Отменить передачи".ljust(menu_width),
+                                  command=self._cancel_transfers)
         operations_menu.add_separator()
         operations_menu.add_command(label="Обновить списки".ljust(menu_width), 
                                   command=self._refresh_lists,
@@ -228,6 +258,8 @@ class Application(tk.Tk):
     def _setup_bindings(self):
         self.local_files.bind("<Double-1>", self._on_local_double_click)
         self.remote_files.bind("<Double-1>", self._on_remote_double_click)
+        self.remote_files.bind("<<TreeviewSelect>>", self._on_remote_select)
+        self.local_files.bind("<<TreeviewSelect>>", self._on_local_select)
         self.bind_all("<F5>", lambda e: self._refresh_lists())
         self.bind_all("<Escape>", lambda e: self._toggle_fullscreen())
         def handle_backspace(event):
@@ -244,33 +276,7 @@ class Application(tk.Tk):
                     self._delete_local()
                 elif self.remote_files.focus_get() == self.remote_files and self.ftp_client.ftp:
                     debug_log("DEBUG: Удаление с удаленного сервера")
-                    selected = self.remote_files.selection()
-                    if not selected:
-                        return "break"
-                    
-                    if not messagebox.askyesno("Подтверждение", 
-                                             "Вы действительно хотите удалить выбранные файлы?"):
-                        return "break"
-                    
-                    for item_id in selected:
-                        values = self.remote_files.item(item_id)['values']
-                        filename = str(values[0])
-                        is_dir = values[2] == "Папка"
-                        
-                        if is_dir:
-                            success, message = self.ftp_client.delete_directory_recursive(filename)
-                        else:
-                            success, message = self.ftp_client.delete_item(filename)
-                            
-                        if not success:
-                            if message == "NOT_EMPTY_DIR":
-                                if messagebox.askyesno("Подтверждение", 
-                                                     f"Папка '{filename}' не пуста. Удалить её содержимое?"):
-                                    success, message = self.ftp_client.delete_directory_recursive(filename)
-                            else:
-                                messagebox.showerror("Ошибка", f"Не удалось удалить {filename}: {message}")
-                    
-                    self._refresh_remote_list()
+                    self._delete_remote()
                 return "break"
             return self._navigate_up()
             
@@ -731,28 +737,42 @@ class Application(tk.Tk):
             new_name = entry.get().strip()
             if new_name and new_name != old_name:
                 dialog.destroy()
-                try:
-                    debug_log(f"\nDEBUG: Переименование файла на сервере")
-                    debug_log(f"DEBUG: Текущая директория: {self.ftp_client.get_current_directory()}")
-                    debug_log(f"DEBUG: Старое имя: {old_name}")
-                    debug_log(f"DEBUG: Новое имя: {new_name}")
+                # Команды идут через поток навигации: он владеет управляющим соединением,
+                # а пути абсолютные, потому что пользователь может уйти в другую папку
+                old_path = posixpath.join(self._remote_dir, old_name)
+                new_path = posixpath.join(self._remote_dir, new_name)
+                debug_log(f"\nDEBUG: Переименование на сервере: {old_path} -> {new_path}")
 
+                def exists():
                     try:
-                        self.ftp_client.ftp.size(new_name)
-                        if not messagebox.askyesno("Подтверждение", 
-                                                 f"Файл {new_name} уже существует. Перезаписать?"):
-                            return
-                    except:
-                        pass
-                    
-                    self.ftp_client.ftp.rename(old_name, new_name)
-                    self._refresh_remote_list()
-                    self.status_bar.set_status(f"Файл переименован: {old_name} -> {new_name}")
-                except Exception as e:
+                        with self.ftp_client.ftp_lock:
+                            self.ftp_client.ftp.size(new_path)
+                        return True
+                    except Exception:
+                        return False
+
+                def on_error(e):
                     error_msg = str(e)
                     debug_log(f"DEBUG: Ошибка переименования: {error_msg}")
                     self.status_bar.set_status(f"Ошибка переименования: {error_msg}", error=True)
                     messagebox.showerror("Ошибка", f"Не удалось переименовать файл: {error_msg}")
+
+                def on_renamed(result):
+                    success, message = result
+                    if not success:
+                        on_error(message)
+                        return
+                    self._refresh_remote_list()
+                    self.status_bar.set_status(f"Файл переименован: {old_name} -> {new_name}")
+
+                def on_checked(found):
+                    if found and not messagebox.askyesno("Подтверждение",
+                                                         f"Файл {new_name} уже существует. Перезаписать?"):
+                        return
+                    self.remote_nav.request(lambda: self.ftp_client.rename_item(old_path, new_path),
+                                            on_renamed, on_error, supersede=False)
+
+                self.remote_nav.request(exists, on_checked, on_error, supersede=False)
             elif not new_name:
                 messagebox.showwarning("Ошибка", "Имя файла не может быть пустым")
         
@@ -770,14 +790,22 @@ class Application(tk.Tk):
         if not dirname:
             return
             
-        try:
-            self.ftp_client.ftp.mkd(dirname)
-            self._refresh_remote_list()
-            self.status_bar.set_status(f"Создана папка: {dirname}")
-        except Exception as e:
+        def on_error(e):
             self.status_bar.set_status(f"Ошибка создания папки: {str(e)}", error=True)
             messagebox.showerror("Ошибка", f"Не удалось создать папку: {str(e)}")
 
+        def on_result(result):
+            success, message = result
+            if not success:
+                on_error(message)
+                return
+            self._refresh_remote_list()
+            self.status_bar.set_status(f"Создана папка: {dirname}")
+
+        path = posixpath.join(self._remote_dir, dirname.strip())
+        self.remote_nav.request(lambda: self.ftp_client.create_directory(path),
+                                on_result, on_error, supersede=False)
+
     def start_update_handler(self):
         def update_handler():
             if not self.is_updating and not self.update_queue.empty():
@@ -828,11 +856,12 @@ class Application(tk.Tk):
         except Exception as e:
             print(f"Ошибка сохранения закладок: {e}")
 
-    def _add_to_history(self, host: str, port: int, user: str):
+    def _add_to_history(self, host: str, port: int, user: str, tls: str = 'none'):
         connection = {
             'host': host,
             'port': port,
             'user': user,
+            'tls': tls,
             'timestamp': datetime.now().isoformat()
         }
 
@@ -846,10 +875,12 @@ class Application(tk.Tk):
         self.connection_history = self.connection_history[:10]
         self._save_connection_history()
 
-    def _connect(self, host, port, user, password):
+    def _connect(self, host, port, user, password, tls=None):
         if host is None and port is None and user is None and password is None:
             self._disconnect()
             return False
+        if tls is None:
+            tls = self.connection_panel.get_tls_mode()
         if not host or not user or not password:
             messagebox.showerror("Ошибка", "Все поля должны быть заполнены")
             return False
@@ -862,48 +893,80 @@ class Application(tk.Tk):
             messagebox.showerror("Ошибка", "Порт должен быть числом")
             return False
 
-        try:
-            success, message = self.ftp_client.connect(host, port, user, password)
-            if success:
-                self.status_bar.set_status("Подключено к серверу")
-                self.connection_panel.set_connected_state(True)
-                for i in range(self.connection_menu.index('end') + 1):
-                    try:
-                        if "Отключиться" in self.connection_menu.entrycget(i, 'label').strip():
-                            self.connection_menu.entryconfig(i, state="normal")
-                            break
-                    except:
-                        continue
-                self._add_to_history(host, port, user)
-                self.stats_panel.start_monitoring(host, port)
-                self.ftp_client.start_connection_monitor(self._on_connection_lost)
-                self._refresh_remote_list()
-                return True
-            else:
-                error_msg = message
-                if "530" in message:
-                    error_msg = "Неверное имя пользователя или пароль"
-                elif "connection refused" in message.lower():
-                    error_msg = "Подключение отклонено. Проверьте адрес и порт."
-                elif "[Errno 8]" in message:
-                    error_msg = "Не удалось найти сервер. Проверьте правильность введенного адреса."
-                
-                self.status_bar.set_status(error_msg, error=True)
-                messagebox.showerror("Ошибка подключения", error_msg)
-                return False
-                
-        except Exception as e:
-            error_msg = str(e)
-            if "timeout" in error_msg.lower():
-                error_msg = "Превышено время ожидания подключения"
-            elif "connection refused" in error_msg.lower():
+        if self._connecting:
+            return False
+        self._connecting = True
+        self.connection_panel.set_connecting()
+
+        self.status_bar.set_status(f"Подключение к {host}:{port}...")
+        # Подключение отменяет прежние переходы, но само последующими переходами не отменяется
+        self.remote_nav.cancel()
+        self.remote_nav.request(
+            lambda: self.ftp_client.connect(host, port, user, password, tls),
+            lambda result: self._on_connect_result(host, port, user, tls, *result),
+            self._on_connect_error,
+            supersede=False
+        )
+        return True
+
+    def _on_connect_result(self, host: str, port: int, user: str, tls: str,
+                           success: bool, message: str):
+        self._connecting = False
+        if success:
+            self.status_bar.set_status("Подключено к серверу")
+            self.connection_panel.set_connected_state(True)
+            for i in range(self.connection_menu.index('end') + 1):
+                try:
+                    if "Отключиться" in self.connection_menu.entrycget(i, 'label').strip():
+                        self.connection_menu.entryconfig(i, state="normal")
+                        break
+                except:
+                    continue
+            self._add_to_history(host, port, user, tls)
+            if self.transfer_queue:
+                self.transfer_queue.shutdown()
+            self.transfer_queue = TransferQueue(
+                self.ftp_client,
+                workers=self.settings.get('pool_size', 4),
+                on_progress=self._on_transfer_progress
+            )
+            self.stats_panel.start_monitoring(host, port, self.ftp_client.remote_cache.stats,
+                                              self.ftp_client.compression.stats,
+                                              self.ftp_client.tls_sessions.stats)
+            self.ftp_client.start_connection_monitor(self._on_connection_lost)
+            self.ftp_client.start_indexing()
+            self._refresh_remote_list()
+        else:
+            error_msg = message
+            if "530" in message:
+                error_msg = "Неверное имя пользователя или пароль"
+            elif "connection refused" in message.lower():
                 error_msg = "Подключение отклонено. Проверьте адрес и порт."
-            elif "[Errno 8]" in error_msg:
+            elif "[Errno 8]" in message:
                 error_msg = "Не удалось найти сервер. Проверьте правильность введенного адреса."
-            
+            elif "CERTIFICATE_VERIFY_FAILED" in message:
+                error_msg = ("Сертификат сервера не прошел проверку. Если вы доверяете серверу, "
+                             "отключите проверку сертификата в настройках.")
+            elif "WRONG_VERSION_NUMBER" in message:
+                error_msg = "Сервер не поддерживает выбранный режим шифрования"
+
+            self.connection_panel.set_connected_state(False)
             self.status_bar.set_status(error_msg, error=True)
             messagebox.showerror("Ошибка подключения", error_msg)
-            return False
+
+    def _on_connect_error(self, error: Exception):
+        self._connecting = False
+        self.connection_panel.set_connected_state(False)
+        error_msg = str(error)
+        if "timeout" in error_msg.lower():
+            error_msg = "Превышено время ожидания подключения"
+        elif "connection refused" in error_msg.lower():
+            error_msg = "Подключение отклонено. Проверьте адрес и порт."
+        elif "[Errno 8]" in error_msg:
+            error_msg = "Не удалось найти сервер. Проверьте правильность введенного адреса."
+
+        self.status_bar.set_status(error_msg, error=True)
+        messagebox.showerror("Ошибка подключения", error_msg)
 
     def _disconnect(self):
         debug_log("\nDEBUG: Начало отключения от сервера")
@@ -912,6 +975,14 @@ class Application(tk.Tk):
             debug_log("DEBUG: Останавливаем мониторинг")
             self.stats_panel.stop_monitoring()
             
+            debug_log("DEBUG: Останавливаем очередь передач")
+            if self.transfer_queue:
+                self.transfer_queue.shutdown()
+                self.transfer_queue = None
+
+            debug_log("DEBUG: Отменяем незавершенные переходы")
+            self.remote_nav.cancel()
+
             debug_log("DEBUG: Вызываем disconnect у FTP клиента")
             self.ftp_client.disconnect()
             
@@ -953,161 +1024,399 @@ class Application(tk.Tk):
 
     def _refresh_lists(self):
         self._refresh_local_list()
-        self._refresh_remote_list()
+        self._refresh_remote_list(force=True)
 
     def _refresh_local_list(self):
-        try:
-            items = []
-            current_dir = self.settings.get('default_local_dir')
-            for item in os.listdir(current_dir):
-                try:
-                    path = os.path.join(current_dir, item)
-                    stat = os.stat(path)
-                    is_dir = os.path.isdir(path)
+        current_dir = self.settings.get('default_local_dir')
+        show_hidden = self.settings.get('show_hidden_files')
+        folders_first = self.settings.get('sort_folders_first')
+        date_format = self.settings.get('date_format', "%Y-%m-%d %H:%M")
+
+        def load(publish):
+            entries, items = [], []
+            for chunk in scan_directory(current_dir):
+                entries.extend(chunk)
+                rows = filter_hidden_files([self._local_item(entry, current_dir, date_format) for entry in chunk],
+                                           show_hidden)
+                items.extend(rows)
+                if not publish([self._remote_row(item) for item in rows]):
+                    return None
+            return entries, [self._remote_row(item) for item in sort_items(items, folders_first)]
+
+        streaming = {}
+
+        def on_chunk(rows):
+            if 'active' not in streaming:
+                # Как и для сервера: новую папку показываем по мере чтения, обновление текущей - разом
+                streaming['active'] = current_dir != self._local_dir or not self.local_files.get_children()
+                if streaming['active']:
+                    self._local_dir = current_dir
+                    self.local_files.set_items(rows, path=current_dir)
+                    self.local_path.set_path(current_dir)
+                    return
+            if streaming['active']:
+                self.local_files.append_items(rows)
 
-                    if is_dir:
-                        try:
-                            size = f"{len(os.listdir(path))} элем."
-                        except:
-                            size = "Нет доступа"
-                    else:
-                        size = humanize.naturalsize(stat.st_size)
-
-                    modified = datetime.fromtimestamp(stat.st_mtime).strftime(
-                        self.settings.get('date_format', "%Y-%m-%d %H:%M")
-                    )
-
-                    items.append({
-                        'name': item,
-                        'size': size,
-                        'type': "Папка" if is_dir else "Файл",
-                        'modified': modified
-                    })
-                except Exception as e:
-                    items.append({
-                        'name': item,
-                        'size': "Ошибка",
-                        'type': "Неизвестно",
-                        'modified': ""
-                    })
+        def on_result(result):
+            if result is None:
+                return
+            entries, rows = result
+            self._local_dir = current_dir
+            self.local_index.update_directory(current_dir, [
+                (entry.name, entry.is_dir and not entry.is_link, entry.size, entry.modified)
+                for entry in entries if not entry.error
+            ])
+            self.local_files.set_items(rows, path=current_dir)
+            self.local_path.set_path(current_dir)
+            if self.settings.get('watch_local_dir', True):
+                self.local_watcher.watch(current_dir)
+            else:
+                self.local_watcher.stop()
 
-            items = filter_hidden_files(items, self.settings.get('show_hidden_files'))
-            items = sort_items(items, self.settings.get('sort_folders_first'))
+            if self.settings.get('folder_item_count', 'lazy') == 'lazy':
+                self._count_local_children(current_dir, [
+                    (entry.name, entry.modified) for entry in entries
+                    if entry.is_dir and (show_hidden or not entry.name.startswith('.'))
+                ])
 
-            items = [(item['name'], item['size'], item['type'], item['modified']) for item in items]
-            
-            self.local_files.set_items(items)
-            self.local_path.set_path(current_dir)
-        except Exception as e:
+        def on_error(e):
             self.status_bar.set_status(f"Ошибка чтения локальной директории: {e}", error=True)
 
-    def _refresh_remote_list(self):
+        self.local_nav.request(load, on_result, on_error, on_progress=on_chunk)
+
+    def _local_item(self, entry: LocalEntry, directory: str, date_format: str) -> Dict[str, Any]:
+        if entry.error:
+            return {'name': entry.name, 'size': "Ошибка", 'type': "Неизвестно",
+                    'modified': "", 'bytes': -1, 'mtime': 0.0}
+
+        if entry.is_dir:
+            # Число элементов подставит фоновый подсчет, если он уже был - сразу из кэша
+            found, count = self.child_counter.cached(os.path.join(directory, entry.name), entry.modified)
+            size = self._format_local_count(count) if found else ""
+            size_bytes = (-1 if count is None else count) if found else -1
+        else:
+            size = humanize.naturalsize(entry.size)
+            size_bytes = entry.size
+        return {
+            'name': entry.name,
+            'size': size,
+            'type': "Папка" if entry.is_dir else "Файл",
+            'modified': datetime.fromtimestamp(entry.modified).strftime(date_format),
+            'bytes': size_bytes,
+            'mtime': entry.modified
+        }
+
+    @staticmethod
+    def _format_local_count(count: Optional[int]) -> str:
+        return "Нет доступа" if count is None else f"{count} элем."
+
+    def _count_local_children(self, current_dir: str, folders: List[Tuple[str, float]],
+                              replace: bool = True):
+        # replace=False досчитывает папки, не прерывая уже идущий подсчет той же папки
+        if replace and self._local_count_cancel:
+            self._local_count_cancel.set()
+        folders = [(name, modified) for name, modified in folders
+                   if not self.child_counter.cached(os.path.join(current_dir, name), modified)[0]]
+        if not folders:
+            return
+
+        if replace or self._local_count_cancel is None:
+            self._local_count_cancel = threading.Event()
+        cancel_event = self._local_count_cancel
+        names = {os.path.join(current_dir, name): name for name, _ in folders}
+
+        def on_count(path, count):
+            text = self._format_local_count(count)
+
+            def update():
+                if not cancel_event.is_set() and self._local_dir == current_dir:
+                    self.local_files.set_cell(names[path], 'size', text,
+                                              raw=-1 if count is None else count)
+
+            self.schedule_update(update)
+
+        self.child_counter.count_in_background(
+            [(os.path.join(current_dir, name), modified) for name, modified in folders],
+            on_count, cancel_event)
+
+    def _on_local_changed(self, path: str, names: set, rescan: bool):
+        # Вызывается в потоке наблюдателя: stat измененных записей делаем здесь, не в Tk
+        if rescan or len(names) > self.WATCH_RESCAN_LIMIT:
+            self.schedule_update(lambda: self._local_dir == path and self._refresh_local_list())
+            return
+
+        entries, removed = [], []
+        for name in names:
+            entry = stat_entry(path, name)
+            if entry is None:
+                removed.append(name)
+            else:
+                entries.append(entry)
+        self.schedule_update(lambda: self._apply_local_changes(path, entries, removed))
+
+    def _apply_local_changes(self, path: str, entries: List[LocalEntry], removed: List[str]):
+        # Индекс поиска обновляем всегда, даже если панель уже показывает другую папку
+        self.local_index.update_entries(path, [
+            (entry.name, entry.is_dir and not entry.is_link, entry.size, entry.modified)
+            for entry in entries if not entry.error
+        ], removed)
+        if path != self._local_dir or path != self.settings.get('default_local_dir'):
+            return
+
+        date_format = self.settings.get('date_format', "%Y-%m-%d %H:%M")
+        show_hidden = self.settings.get('show_hidden_files')
+        visible = [entry for entry in entries if show_hidden or not entry.name.startswith('.')]
+        rows = [self._remote_row(self._local_item(entry, path, date_format)) for entry in visible]
+        if self.settings.get('sort_folders_first'):
+            order_key = lambda values: (values[2] != "Папка", str(values[0]).lower())
+        else:
+            order_key = lambda values: str(values[0]).lower()
+        self.local_files.update_items(rows, removed, order_key)
+
+        if self.settings.get('folder_item_count', 'lazy') == 'lazy':
+            self._count_local_children(path, [(entry.name, entry.modified) for entry in visible
+                                              if entry.is_dir], replace=False)
+
+    def _on_local_select(self, event):
+        if self.settings.get('folder_item_count', 'lazy') != 'on_demand' or self._local_dir is None:
+            return
+
+        folders = []
+        for item_id in self.local_files.selection():
+            values = self.local_files.item(item_id)['values']
+            if values and values[2] == "Папка" and not values[1]:
+                folders.append(str(values[0]))
+        if not folders:
+            return
+        modified = {}
+        for name in folders:
+            try:
+                modified[name] = os.stat(os.path.join(self._local_dir, name)).st_mtime
+            except OSError:
+                modified[name] = 0.0
+        self._count_local_children(self._local_dir, list(modified.items()))
+
+    def _refresh_remote_list(self, force: bool = False, path: Optional[str] = None):
         if not self.ftp_client.ftp:
             return
-            
-        try:
-            items = self.ftp_client.list_files()
-            dict_items = [
-                {
-                    'name': item[0],
-                    'size': item[1],
-                    'type': item[2],
-                    'modified': item[3]
-                }
-                for item in items
-            ]
-            dict_items = filter_hidden_files(dict_items, self.settings.get('show_hidden_files'))
-            dict_items = sort_items(dict_items, self.settings.get('sort_folders_first'))
-            items = [
-                (item['name'], item['size'], item['type'], item['modified'])
-                for item in dict_items
-            ]
-            self.remote_files.set_items(items)
-            self.remote_path.set_path(self.ftp_client.get_current_directory())
-        except Exception as e:
-            self.status_bar.set_status(f"Ошибка чтения удаленной директории: {e}", error=True)
+
+        show_hidden = self.settings.get('show_hidden_files')
+        folders_first = self.settings.get('sort_folders_first')
+
+        def load(publish):
+            if path is not None:
+                success, message = self.ftp_client.change_directory(path)
+                if not success:
+                    raise Exception(message)
+            current_dir = self.ftp_client.get_current_directory()
+
+            dict_items = []
+            listing = self.ftp_client.iter_list_files(path=current_dir, refresh=force)
+            try:
+                for chunk in listing:
+                    rows = filter_hidden_files([
+                        {
+                            'name': item[0],
+                            'size': item[1],
+                            'type': item[2],
+                            'modified': item[3],
+                            'bytes': item[4],
+                            'mtime': item[5]
+                        }
+                        for item in chunk
+                    ], show_hidden)
+                    dict_items.extend(rows)
+                    # Пользователь ушел в другую папку - дочитывать список незачем
+                    if not publish((current_dir, [self._remote_row(item) for item in rows])):
+                        return current_dir, []
+            finally:
+                listing.close()
+
+            dict_items = sort_items(dict_items, folders_first)
+            return current_dir, [self._remote_row(item) for item in dict_items]
+
+        streaming = {}
+
+        def on_chunk(chunk):
+            if not self.ftp_client.ftp:
+                return
+            current_dir, rows = chunk
+            if 'active' not in streaming:
+                # Новую папку показываем по мере чтения, обновление текущей - разом в конце
+                streaming['active'] = current_dir != self._remote_dir or not self.remote_files.get_children()
+                if streaming['active']:
+                    self.remote_files.set_items(rows, path=current_dir)
+                    self.remote_path.set_path(current_dir)
+                    return
+            if streaming['active']:
+                self.remote_files.append_items(rows)
+
+        def on_error(e):
+            if path is not None:
+                self.status_bar.set_status(f"Ошибка перехода в папку: {e}", error=True)
+            else:
+                self.status_bar.set_status(f"Ошибка чтения удаленной директории: {e}", error=True)
+
+        if path is not None:
+            self.status_bar.set_status(f"Переход в {path}...")
+        self.remote_nav.request(load, lambda result: self._show_remote_list(*result, navigated=path is not None),
+                                on_error, on_progress=on_chunk)
+
+    def _on_remote_listing_revalidated(self, path: str, changed: bool):
+        if not self.ftp_client.ftp or path != self._remote_dir:
+            return
+        self.status_bar.set_status(f"Текущая удаленная директория: {path}")
+        # Фоновая перепроверка сохраненного списка нашла отличия - обновляем панель из свежего кэша
+        if changed:
+            self._refresh_remote_list()
+
+    @staticmethod
+    def _remote_row(item: Dict[str, Any]) -> Tuple:
+        return item['name'], item['size'], item['type'], item['modified'], item['bytes'], item['mtime']
+
+    def _show_remote_list(self, current_dir: str, items: List[Tuple], navigated: bool = False):
+        if not self.ftp_client.ftp:
+            return
+
+        self._remote_dir = current_dir
+        self.remote_files.set_items(items, path=current_dir)
+        self.remote_path.set_path(current_dir)
+        if self.ftp_client.is_revalidating(current_dir):
+            # Список взят из сохраненного кэша и может быть устаревшим, пока сервер его не подтвердит
+            self.status_bar.set_status(f"{current_dir}: список из кэша, проверяется на сервере...")
+        elif navigated:
+            self.status_bar.set_status(f"Текущая удаленная директория: {current_dir}")
+
+        if self.settings.get('folder_item_count', 'lazy') == 'lazy':
+            folders = [item[0] for item in items if item[2] == "Папка" and not item[1]]
+            self._count_remote_children(current_dir, folders)
+
+    def _count_remote_children(self, current_dir: str, names: List[str]):
+        if self._child_count_cancel:
+            self._child_count_cancel.set()
+        if not names:
+            return
+
+        cancel_event = threading.Event()
+        self._child_count_cancel = cancel_event
+        paths = {posixpath.join(current_dir, name): name for name in names}
+
+        def on_count(path, count):
+            text = self.ftp_client.format_child_count(count)
+
+            def update():
+                if not cancel_event.is_set():
+                    self.remote_files.set_cell(paths[path], 'size', text,
+                                               raw=-1 if count is None else count)
+
+            self.schedule_update(update)
+
+        self.ftp_client.count_children(list(paths), on_count, cancel_event)
+
+    def _on_remote_select(self, event):
+        if self.settings.get('folder_item_count', 'lazy') != 'on_demand' or not self.ftp_client.ftp:
+            return
+
+        folders = []
+        for item_id in self.remote_files.selection():
+            values = self.remote_files.item(item_id)['values']
+            if values and values[2] == "Папка" and not values[1]:
+                folders.append(str(values[0]))
+        if folders:
+            self._count_remote_children(self._remote_dir, folders)
 
     def _on_search(self, text: str, scope: str, case_sensitive: bool, search_in_folders: bool):
         if not text:
             self._refresh_lists()
             return
 
-        def matches_search(name: str) -> bool:
-            if not case_sensitive:
-                return text.lower() in name.lower()
-            return text in name
+        # "Искать в папках" - поиск по индексу во всем дереве ниже текущей папки,
+        # иначе - только среди элементов текущей папки
+        limit = self.settings.get('search_max_results', 1000)
+        matches_search = name_matcher(text, case_sensitive)
+        indexing = False
 
-        if scope in ["local", "both"]:
-            try:
-                items = []
-                current_dir = self.settings.get('default_local_dir')
-                for item in os.listdir(current_dir):
-                    try:
-                        path = os.path.join(current_dir, item)
-                        is_dir = os.path.isdir(path)
-
-                        if matches_search(item) or (is_dir and search_in_folders):
-                            stat = os.stat(path)
+        def show_status():
+            total_found = len(self.local_files.get_children()) + len(self.remote_files.get_children())
+            if indexing:
+                self.status_bar.set_status(f"Найдено элементов: {total_found} (индексация продолжается)")
+            else:
+                self.status_bar.set_status(f"Найдено элементов: {total_found}")
 
-                            if is_dir:
-                                try:
-                                    size = f"{len(os.listdir(path))} элем."
-                                except:
-                                    size = "Нет доступа"
-                            else:
-                                size = humanize.naturalsize(stat.st_size)
-                            modified = datetime.fromtimestamp(stat.st_mtime).strftime(
-                                self.settings.get('date_format', "%Y-%m-%d %H:%M")
-                            )
-                            
-                            items.append({
-                                'name': item,
-                                'size': size,
-                                'type': "Папка" if is_dir else "Файл",
-                                'modified': modified
-                            })
-                    except Exception:
-                        continue
+        # Чтение папок (диск, LIST) идет в фоновых потоках навигации, Tk только показывает результат
+        def show_local(results, current_dir):
+            # Панель показывает результаты поиска, а не папку - обновления наблюдателя к ней не относятся
+            self._local_dir = None
+            self.local_files.set_items(self._search_rows(results, current_dir, os.path))
+            show_status()
 
-                items = filter_hidden_files(items, self.settings.get('show_hidden_files'))
-                items = sort_items(items, self.settings.get('sort_folders_first'))
+        def show_remote(results, current_dir):
+            if not self.ftp_client.ftp:
+                return
+            self.remote_files.set_items(self._search_rows(results, current_dir, posixpath))
+            show_status()
 
-                items = [(item['name'], item['size'], item['type'], item['modified']) 
-                        for item in items]
-                
-                self.local_files.set_items(items)
-            except Exception as e:
-                self.status_bar.set_status(f"Ошибка поиска в локальных файлах: {e}", error=True)
+        if scope in ["local", "both"]:
+            current_dir = self.settings.get('default_local_dir')
+            if search_in_folders:
+                root = self.local_indexer.root
+                if root is None or not (current_dir == root or
+                                        current_dir.startswith(root.rstrip(os.sep) + os.sep)):
+                    self.local_indexer.start(current_dir)
+                indexing = indexing or not self.local_indexer.complete
+                show_local(self.local_index.search(text, current_dir, case_sensitive, limit), current_dir)
+            else:
+                self.local_nav.request(
+                    lambda: [(current_dir,) + entry for entry in self._scan_local_dir(current_dir)
+                             if matches_search(entry[0])],
+                    lambda results: show_local(results, current_dir),
+                    lambda e: self.status_bar.set_status(f"Ошибка поиска в локальных файлах: {e}", error=True))
 
         if scope in ["remote", "both"] and self.ftp_client.ftp:
-            try:
-                items = self.ftp_client.list_files()
-                filtered_items = []
-                
-                for item in items:
-                    name, size, type_, modified = item
-                    is_dir = type_ == "Папка"
-                    
-                    if matches_search(name) or (is_dir and search_in_folders):
-                        filtered_items.append({
-                            'name': name,
-                            'size': size,
-                            'type': type_,
-                            'modified': modified
-                        })
-
-                filtered_items = filter_hidden_files(filtered_items, self.settings.get('show_hidden_files'))
-                filtered_items = sort_items(filtered_items, self.settings.get('sort_folders_first'))
-
-                filtered_items = [(item['name'], item['size'], item['type'], item['modified']) 
-                                for item in filtered_items]
-                
-                self.remote_files.set_items(filtered_items)
-            except Exception as e:
-                self.status_bar.set_status(f"Ошибка поиска в удаленных файлах: {e}", error=True)
-
-        total_found = len(self.local_files.get_children()) + len(self.remote_files.get_children())
-        self.status_bar.set_status(f"Найдено элементов: {total_found}")
+            remote_dir = self._remote_dir
+            if search_in_folders:
+                indexer = self.ftp_client.indexer
+                indexing = indexing or (indexer is not None and not indexer.complete)
+                show_remote(self.ftp_client.search_files(text, remote_dir, case_sensitive, limit), remote_dir)
+            else:
+                self.remote_nav.request(
+                    lambda: [(remote_dir, item[0], item[2] == "Папка", item[4], item[5])
+                             for item in self.ftp_client.list_files(path=remote_dir)
+                             if matches_search(item[0])],
+                    lambda results: show_remote(results, remote_dir),
+                    lambda e: self.status_bar.set_status(f"Ошибка поиска в удаленных файлах: {e}", error=True))
+
+    def _search_rows(self, results: List[Tuple], root: str, pathmod) -> List[Tuple]:
+        # Имена найденных элементов показываем относительно текущей папки
+        date_format = self.settings.get('date_format', "%Y-%m-%d %H:%M")
+        show_hidden = self.settings.get('show_hidden_files')
+        items = []
+        for directory, name, is_dir, size, mtime in results:
+            relative = pathmod.relpath(pathmod.join(directory, name), root)
+            if not show_hidden and any(part.startswith('.') for part in relative.split(pathmod.sep)):
+                continue
+            if is_dir:
+                text = ""
+            else:
+                text = humanize.naturalsize(size) if size >= 0 else ""
+            items.append({
+                'name': relative,
+                'size': text,
+                'type': "Папка" if is_dir else "Файл",
+                'modified': datetime.fromtimestamp(mtime).strftime(date_format) if mtime else "",
+                'bytes': size,
+                'mtime': mtime
+            })
+
+        items = sort_items(items, self.settings.get('sort_folders_first'))
+        return [(item['name'], item['size'], item['type'], item['modified'], item['bytes'], item['mtime'])
+                for item in items]
+
+    @staticmethod
+    def _scan_local_dir(path: str) -> List[Tuple[str, bool, int, float]]:
+        # Ссылки на папки индексу не отдаем как папки: обход по ним может зациклиться
+        return [(entry.name, entry.is_dir and not entry.is_link, entry.size, entry.modified)
+                for entry in list_entries(path) if not entry.error]
 
     def _show_quick_connect(self):
         QuickConnectDialog(self, self._connect)
@@ -1117,6 +1426,9 @@ class Application(tk.Tk):
 
     def _connect_from_history(self, values):
         host, port, user, _ = values
+        connection = next((c for c in self.connection_history
+                           if c['host'] == host and str(c['port']) == str(port) and c['user'] == user), {})
+        self.connection_panel.set_tls_mode(connection.get('tls', 'none'))
         self.connection_panel.entries["host"].delete(0, tk.END)
         self.connection_panel.entries["host"].insert(0, host)
         
@@ -1126,7 +1438,7 @@ class Application(tk.Tk):
         self.connection_panel.entries["user"].delete(0, tk.END)
         self.connection_panel.entries["user"].insert(0, user)
         
-        self._connect(host, port, user, "")
+        self._connect(host, port, user, "", connection.get('tls', 'none'))
 
     def _show_bookmarks(self):
         BookmarksDialog(self, self.bookmarks, 
@@ -1152,8 +1464,9 @@ class Application(tk.Tk):
         password = self.crypto.decrypt(bookmark.get('password', ''))
         self.connection_panel.password_entry.delete(0, tk.END)
         self.connection_panel.password_entry.insert(0, password)
+        self.connection_panel.set_tls_mode(bookmark.get('tls', 'none'))
         
-        self._connect(host, port, user, password)
+        self._connect(host, port, user, password, bookmark.get('tls', 'none'))
 
     def _add_bookmark(self):
         if not self.ftp_client.ftp:
@@ -1170,7 +1483,8 @@ class Application(tk.Tk):
                 'host': self.connection_panel.entries["host"].get(),
                 'port': int(self.connection_panel.entries["port"].get()),
                 'user': self.connection_panel.entries["user"].get(),
-                'password': encrypted_password
+                'password': encrypted_password,
+                'tls': self.connection_panel.get_tls_mode()
             }
             self.bookmarks.append(bookmark)
             self._save_bookmarks()
@@ -1230,6 +1544,14 @@ class Application(tk.Tk):
         reconnect_attempts.set(self.settings.get('reconnect_attempts', 3))
         reconnect_attempts.pack(side=tk.LEFT, padx=5)
 
+        resume_var = tk.BooleanVar(value=self.settings.get('resume_transfers', True))
+        ttk.Checkbutton(connection_frame, text="Докачивать прерванные передачи",
+                       variable=resume_var).pack(anchor="w", padx=5, pady=2)
+
+        tls_verify_var = tk.BooleanVar(value=self.settings.get('tls_verify', True))
+        ttk.Checkbutton(connection_frame, text="Проверять сертификат FTPS-сервера",
+                       variable=tls_verify_var).pack(anchor="w", padx=5, pady=2)
+
         interface_frame = ttk.LabelFrame(general_frame, text="Интерфейс")
         interface_frame.pack(fill=tk.X, padx=5, pady=5)
 
@@ -1241,6 +1563,19 @@ class Application(tk.Tk):
         ttk.Checkbutton(interface_frame, text="Показывать скрытые файлы",
                        variable=show_hidden_var).pack(anchor="w", padx=5, pady=2)
 
+        item_count_modes = {
+            'lazy': "В фоне после открытия папки",
+            'on_demand': "При выделении папки"
+        }
+        item_count_frame = ttk.Frame(interface_frame)
+        item_count_frame.pack(fill=tk.X, padx=5, pady=2)
+        ttk.Label(item_count_frame, text="Подсчет элементов в папках:").pack(side=tk.LEFT)
+        item_count_var = tk.StringVar(
+            value=item_count_modes.get(self.settings.get('folder_item_count', 'lazy'),
+                                       item_count_modes['lazy']))
+        ttk.Combobox(item_count_frame, textvariable=item_count_var, state="readonly",
+                     values=list(item_count_modes.values()), width=30).pack(side=tk.LEFT, padx=5)
+
         confirm_frame = ttk.Frame(notebook)
         notebook.add(confirm_frame, text="Подтверждения")
 
@@ -1260,11 +1595,20 @@ class Application(tk.Tk):
         buffer_size.insert(0, str(self.settings.get('buffer_size', 8192)))
         buffer_size.pack(anchor="w", padx=5, pady=2)
 
+        adaptive_buffer_var = tk.BooleanVar(value=self.settings.get('adaptive_buffer', True))
+        ttk.Checkbutton(performance_frame, text="Подбирать размер буфера автоматически",
+                       variable=adaptive_buffer_var).pack(anchor="w", padx=5, pady=2)
+
         ttk.Label(performance_frame, text="Время жизни кэша (сек):").pack(anchor="w", padx=5, pady=2)
         cache_ttl = ttk.Entry(performance_frame)
         cache_ttl.insert(0, str(self.settings.get('cache_ttl', 30)))
         cache_ttl.pack(anchor="w", padx=5, pady=2)
 
+        ttk.Label(performance_frame, text="Соединений в пуле:").pack(anchor="w", padx=5, pady=2)
+        pool_size = ttk.Spinbox(performance_frame, from_=1, to=16, width=5)
+        pool_size.set(self.settings.get('pool_size', 4))
+        pool_size.pack(anchor="w", padx=5, pady=2)
+
         btn_frame = ttk.Frame(settings_window)
         btn_frame.pack(fill=tk.X, padx=5, pady=5)
 
@@ -1273,13 +1617,19 @@ class Application(tk.Tk):
                 new_settings = {
                     'default_local_dir': local_dir_entry.get(),
                     'buffer_size': int(buffer_size.get()),
+                    'adaptive_buffer': adaptive_buffer_var.get(),
                     'auto_reconnect': auto_reconnect_var.get(),
                     'reconnect_attempts': int(reconnect_attempts.get()),
+                    'resume_transfers': resume_var.get(),
+                    'tls_verify': tls_verify_var.get(),
                     'cache_ttl': int(cache_ttl.get()),
+                    'pool_size': int(pool_size.get()),
                     'show_hidden_files': show_hidden_var.get(),
                     'confirm_delete': confirm_delete_var.get(),
                     'confirm_overwrite': confirm_overwrite_var.get(),
                     'sort_folders_first': sort_folders_var.get(),
+                    'folder_item_count': next(mode for mode, label in item_count_modes.items()
+                                              if label == item_count_var.get()),
                     'date_format': self.settings.get('date_format', "%Y-%m-%d %H:%M")
                 }
                 self._save_settings(new_settings)
@@ -1296,6 +1646,7 @@ class Application(tk.Tk):
     def _save_settings(self, new_settings: Dict):
         self.settings.update(new_settings)
         self.settings.save_settings()
+        self.ftp_client.update_settings(new_settings)
         self._refresh_lists()
 
     def _show_about(self):
@@ -1359,13 +1710,21 @@ class Application(tk.Tk):
                     self.status_bar.set_status(f"Ошибка создания локальной папки: {e}", error=True)
 
             if loc in ("remote", "both") and self.ftp_client.ftp:
-                try:
-                    self.ftp_client.ftp.mkd(dirname)
+                def on_result(result):
+                    success, message = result
+                    if not success:
+                        on_error(message)
+                        return
                     self._refresh_remote_list()
                     self.status_bar.set_status(f"Создана удаленная папка: {dirname}")
-                except Exception as e:
+
+                def on_error(e):
                     self.status_bar.set_status(f"Ошибка создания удаленной папки: {e}", error=True)
 
+                path = posixpath.join(self._remote_dir, dirname)
+                self.remote_nav.request(lambda: self.ftp_client.create_directory(path),
+                                        on_result, on_error, supersede=False)
+
             dialog.destroy()
 
         btn_frame = ttk.Frame(main_frame)
@@ -1384,161 +1743,22 @@ class Application(tk.Tk):
             messagebox.showwarning("Ошибка", "Сначала подключитесь к серверу")
             return
 
-        selected = self.local_files.selection()
-        if not selected:
+        if not self.local_files.selection():
             messagebox.showwarning("Ошибка", "Выберите файлы для загрузки")
             return
 
-        try:
-            total = len(selected)
-            for i, item_id in enumerate(selected, 1):
-                values = self.local_files.item(item_id)['values']
-                filename = str(values[0])
-                is_dir = values[2] == "Папка"
-                local_path = os.path.join(self.settings.get('default_local_dir'), filename)
-
-                if not is_dir:
-                    try:
-                        self.ftp_client.ftp.size(filename)
-                        if self.settings.get('confirm_overwrite', True):
-                            if not messagebox.askyesno("Подтверждение", 
-                                                     f"Файл {filename} уже существует. Перезаписать?"):
-                                continue
-                    except:
-                        pass
-
-                if is_dir:
-                    initial_remote_dir = self.ftp_client.ftp.pwd()
-                    
-                    try:
-                        try:
-                            self.ftp_client.ftp.mkd(filename)
-                        except:
-                            pass
-                        self.ftp_client.ftp.cwd(filename)
-
-                        for root, dirs, files in os.walk(local_path):
-                            rel_path = os.path.relpath(root, local_path)
-                            
-                            if rel_path != '.':
-                                remote_path_parts = [str(part) for part in rel_path.split(os.sep)]
-                                for part in remote_path_parts:
-                                    try:
-                                        self.ftp_client.ftp.mkd(part)
-                                    except:
-                                        pass
-                                    self.ftp_client.ftp.cwd(part)
-
-                            for file in files:
-                                local_file = os.path.join(root, file)
-                                try:
-                                    self.ftp_client.ftp.size(str(file))
-                                    if self.settings.get('confirm_overwrite', True):
-                                        if not messagebox.askyesno("Подтверждение", 
-                                                                 f"Файл {file} уже существует. Перезаписать?"):
-                                            continue
-                                except:
-                                    pass
-
-                                with open(local_file, 'rb') as f:
-                                    self.ftp_client.ftp.storbinary(f'STOR {str(file)}', f)
-                                    
-                                progress = (i / total) * 100
-                                self.status_bar.set_progress(progress)
-                                self.status_bar.set_status(f"Загружен файл: {file}")
-
-                            if rel_path != '.':
-                                for _ in remote_path_parts:
-                                    self.ftp_client.ftp.cwd('..')
-
-                        self.ftp_client.ftp.cwd(initial_remote_dir)
-                        
-                    except Exception as e:
-                        self.ftp_client.ftp.cwd(initial_remote_dir)
-                        raise e
-                        
-                else:
-                    with open(local_path, 'rb') as f:
-                        self.ftp_client.ftp.storbinary(f'STOR {str(filename)}', f)
-                        progress = (i / total) * 100
-                        self.status_bar.set_progress(progress)
-                        self.status_bar.set_status(f"Загружен файл: {filename}")
-
-            self._refresh_remote_list()
-            self.status_bar.set_status("Загрузка завершена")
-            self.status_bar.set_progress(100)
-
-        except Exception as e:
-            self.status_bar.set_status(f"Ошибка загрузки: {str(e)}", error=True)
-            messagebox.showerror("Ошибка", f"Ошибка загрузки: {str(e)}")
+        self._upload_selected()
 
     def _download_files(self):
         if not self.ftp_client.ftp:
             messagebox.showwarning("Ошибка", "Сначала подключитесь к серверу")
             return
 
-        selected = self.remote_files.selection()
-        if not selected:
+        if not self.remote_files.selection():
             messagebox.showwarning("Ошибка", "Выберите файлы для скачивания")
             return
 
-        try:
-            total = len(selected)
-            for i, item_id in enumerate(selected, 1):
-                values = self.remote_files.item(item_id)['values']
-                filename = str(values[0])
-                is_dir = values[2] == "Папка"
-                local_path = os.path.join(self.settings.get('default_local_dir'), filename)
-                
-                if os.path.exists(local_path):
-                    if self.settings.get('confirm_overwrite', True):
-                        if not messagebox.askyesno("Подтверждение", 
-                                                 f"Файл {filename} уже существует. Перезаписать?"):
-                            continue
-
-                if is_dir:
-                    os.makedirs(local_path, exist_ok=True)
-                    current_remote = self.ftp_client.ftp.pwd()
-                    try:
-                        self.ftp_client.ftp.cwd(filename)
-                        for item in self.ftp_client.list_files():
-                            name = str(item[0])
-                            item_type = item[2]
-                            item_path = os.path.join(local_path, name)
-                            
-                            if item_type == "Папка":
-                                os.makedirs(item_path, exist_ok=True)
-                                sub_remote = self.ftp_client.ftp.pwd()
-                                try:
-                                    self.ftp_client.ftp.cwd(name)
-                                    for sub_item in self.ftp_client.list_files():
-                                        sub_name = str(sub_item[0])
-                                        if sub_item[2] == "Файл":
-                                            sub_path = os.path.join(item_path, sub_name)
-                                            with open(sub_path, 'wb') as f:
-                                                self.ftp_client.ftp.retrbinary(f'RETR {sub_name}', f.write)
-                                finally:
-                                    self.ftp_client.ftp.cwd(sub_remote)
-                            else:
-                                with open(item_path, 'wb') as f:
-                                    self.ftp_client.ftp.retrbinary(f'RETR {name}', f.write)
-                    finally:
-                        self.ftp_client.ftp.cwd(current_remote)
-                else:
-                    with open(local_path, 'wb') as f:
-                        self.ftp_client.ftp.retrbinary(f'RETR {str(filename)}', f.write)
-
-                progress = (i / total) * 100
-                self.status_bar.set_progress(progress)
-                self.status_bar.set_status(f"Скачано {i}/{total}: {filename}")
-
-            self._refresh_local_list()
-            self.status_bar.set_status("Скачивание завершено")
-            self.status_bar.set_progress(100)
-
-        except Exception as e:
-            self.status_bar.set_status(f"Ошибка скачивания: {str(e)}", error=True)
-            messagebox.showerror("Ошибка", f"Ошибка скачивания: {str(e)}")
+        self._download_selected()
 
     def _delete_selected(self):
         if self.local_files.focus():
@@ -1598,11 +1818,8 @@ class Application(tk.Tk):
         is_dir = values[2] == "Папка"
 
         if is_dir:
-            try:
-                self.ftp_client.ftp.cwd(filename)
-                self._refresh_remote_list()
-            except Exception as e:
-                self.status_bar.set_status(f"Ошибка перехода в папку: {e}", error=True)
+            # Абсолютный путь: быстрые двойные клики не зависят от порядка выполнения CWD
+            self._refresh_remote_list(path=posixpath.join(self._remote_dir, filename))
 
     def _toggle_fullscreen(self, event=None):
         if sys.platform == 'darwin':
@@ -1630,13 +1847,7 @@ class Application(tk.Tk):
 
     def _navigate_up_remote(self):
         if self.ftp_client.ftp:
-            try:
-                self.ftp_client.ftp.cwd('..')
-                current_dir = self.ftp_client.ftp.pwd()
-                self._refresh_remote_list()
-                self.status_bar.set_status(f"Текущая удаленная директория: {current_dir}")
-            except Exception as e:
-                self.status_bar.set_status(f"Ошибка перехода: {str(e)}", error=True)
+            self._refresh_remote_list(path=posixpath.dirname(self._remote_dir.rstrip('/')) or '/')
 
     def _navigate_up(self):
         if self.local_files.focus():
@@ -1682,57 +1893,34 @@ class Application(tk.Tk):
         if not selected:
             return
 
+        entries = []
+        for item_id in selected:
+            values = self.local_files.item(item_id)['values']
+            entries.append((str(values[0]), values[2] == "Папка"))
+        local_dir = self.settings.get('default_local_dir')
+        remote_dir = self._remote_dir
+        # Удаленная панель показывает remote_dir, проверяем существование по ней без запросов к серверу
+        existing = {str(self.remote_files.item(item_id)['values'][0])
+                    for item_id in self.remote_files.get_children()}
+
         def upload_thread():
             try:
-                total = len(selected)
-                for i, item_id in enumerate(selected, 1):
-                    values = self.local_files.item(item_id)['values']
-                    filename = str(values[0])
-                    is_dir = values[2] == "Папка"
-                    local_path = os.path.join(self.settings.get('default_local_dir'), filename)
-                    try:
-                        if is_dir:
-                            self.ftp_client.ftp.cwd(filename)
-                            self.ftp_client.ftp.cwd('..')
-                        else:
-                            self.ftp_client.ftp.size(filename)
-                            
-                        if self.settings.get('confirm_overwrite', True):
-                            confirm_event = threading.Event()
-                            self.schedule_update(lambda: [
-                                setattr(confirm_event, 'result',
-                                       messagebox.askyesno("Подтверждение",
-                                                         f"Файл {filename} уже существует. Перезаписать?"))
-                            ])
-                            confirm_event.wait()
-                            if not confirm_event.result:
-                                continue
-                    except:
-                        pass
-
-                    progress = (i - 1) / total * 100
-                    self.schedule_update(lambda p=progress, f=filename: [
-                        self.status_bar.set_progress(p),
-                        self.status_bar.set_status(f"Загрузка {i}/{total}: {f}")
-                    ])
-
-                    if is_dir:
-                        success, message = self.ftp_client.upload_folder(local_path, filename)
-                    else:
-                        success, message = self.ftp_client.upload_file(local_path, filename)
+                jobs = []
+                for filename, is_dir in entries:
+                    local_path = os.path.join(local_dir, filename)
+                    # Результат поиска может быть путем внутри папки - загружаем под своим именем
+                    filename = os.path.basename(filename)
+                    if filename in existing and self.settings.get('confirm_overwrite', True):
+                        if not self._ask_from_thread("Подтверждение",
+                                                     f"Файл {filename} уже существует. Перезаписать?"):
+                            continue
 
-                    if not success:
-                        self.schedule_update(lambda: [
-                            messagebox.showerror("Ошибка", f"Ошибка загрузки {filename}: {message}"),
-                            self.status_bar.set_status(f"Ошибка загрузки: {message}", error=True)
-                        ])
-                        return
+                    size = 0 if is_dir else os.path.getsize(local_path)
+                    jobs.append(self.transfer_queue.submit(
+                        'upload', local_path, posixpath.join(remote_dir, filename),
+                        size=size, is_dir=is_dir))
 
-                self.schedule_update(lambda: [
-                    self._refresh_remote_list(),
-                    self.status_bar.set_status("Загрузка завершена"),
-                    self.status_bar.set_progress(100)
-                ])
+                self._wait_transfers(jobs, "Загрузка", self._refresh_remote_list)
 
             except Exception as e:
                 self.schedule_update(lambda: [
@@ -1750,61 +1938,31 @@ class Application(tk.Tk):
         selected = self.remote_files.selection()
         if not selected:
             return
-            
+
+        entries = []
+        for item_id in selected:
+            values = self.remote_files.item(item_id)['values']
+            entries.append((str(values[0]), values[2] == "Папка"))
+        local_dir = self.settings.get('default_local_dir')
+        remote_dir = self._remote_dir
+
         def download_thread():
             try:
-                total = len(selected)
-                for i, item_id in enumerate(selected, 1):
-                    values = self.remote_files.item(item_id)['values']
-                    filename = str(values[0])
-                    is_dir = values[2] == "Папка"
-                    local_path = os.path.join(self.settings.get('default_local_dir'), filename)
+                jobs = []
+                for filename, is_dir in entries:
+                    # Результат поиска может быть путем внутри папки - сохраняем под своим именем
+                    local_path = os.path.join(local_dir, posixpath.basename(filename))
+                    remote_path = posixpath.join(remote_dir, filename)
                     if os.path.exists(local_path):
                         if self.settings.get('confirm_overwrite', True):
-                            confirm_event = threading.Event()
-                            self.schedule_update(lambda: [
-                                setattr(confirm_event, 'result',
-                                       messagebox.askyesno("Подтверждение",
-                                                         f"Файл {filename} уже существует. Перезаписать?"))
-                            ])
-                            confirm_event.wait()
-                            if not confirm_event.result:
+                            if not self._ask_from_thread("Подтверждение",
+                                                         f"Файл {filename} уже существует. Перезаписать?"):
                                 continue
 
-                    progress = (i - 1) / total * 100
-                    self.schedule_update(lambda p=progress, f=filename: [
-                        self.status_bar.set_progress(p),
-                        self.status_bar.set_status(f"Скачивание {i}/{total}: {f}")
-                    ])
+                    jobs.append(self.transfer_queue.submit('download', remote_path, local_path,
+                                                           is_dir=is_dir))
 
-                    if is_dir:
-                        os.makedirs(local_path, exist_ok=True)
-                        current_remote = self.ftp_client.ftp.pwd()
-                        try:
-                            self.ftp_client.ftp.cwd(filename)
-                            for item in self.ftp_client.list_files():
-                                name = str(item[0])
-                                item_type = item[2]
-                                if item_type == "Файл":
-                                    local_file = os.path.join(local_path, name)
-                                    with open(local_file, 'wb') as f:
-                                        self.ftp_client.ftp.retrbinary(f'RETR {name}', f.write)
-                        finally:
-                            self.ftp_client.ftp.cwd(current_remote)
-                    else:
-                        success, message = self.ftp_client.download_file(filename, local_path)
-                        if not success:
-                            self.schedule_update(lambda: [
-                                messagebox.showerror("Ошибка", f"Ошибка скачивания {filename}: {message}"),
-                                self.status_bar.set_status(f"Ошибка скачивания: {message}", error=True)
-                            ])
-                            return
-
-                self.schedule_update(lambda: [
-                    self._refresh_local_list(),
-                    self.status_bar.set_status("Скачивание завершено"),
-                    self.status_bar.set_progress(100)
-                ])
+                self._wait_transfers(jobs, "Скачивание", self._refresh_local_list)
 
             except Exception as e:
                 self.schedule_update(lambda: [
@@ -1814,6 +1972,178 @@ class Application(tk.Tk):
 
         Thread(target=download_thread, daemon=True).start()
 
+    def _ask_from_thread(self, title: str, message: str) -> bool:
+        confirm_event = threading.Event()
+        result = {}
+
+        def ask():
+            result['value'] = messagebox.askyesno(title, message)
+            confirm_event.set()
+
+        self.schedule_update(ask)
+        confirm_event.wait()
+        return result['value']
+
+    def _wait_transfers(self, jobs: List, action: str, on_complete) -> None:
+        if not jobs:
+            return
+
+        futures = {job.future: job for job in jobs}
+        errors = []
+        cancelled = 0
+        for future in as_completed(futures):
+            job = futures[future]
+            success, message = future.result()
+            if job.status == 'cancelled':
+                cancelled += 1
+            elif not success:
+                errors.append(f"{job.name}: {message}")
+
+        if errors:
+            error_text = "\n".join(errors[:10])
+            if len(errors) > 10:
+                error_text += f"\n... и ещё {len(errors) - 10}"
+            self.schedule_update(lambda: [
+                on_complete(),
+                self.status_bar.set_status(f"{action}: ошибок {len(errors)} из {len(jobs)}", error=True),
+                messagebox.showerror("Ошибка", f"{action} завершилось с ошибками:\n{error_text}")
+            ])
+        elif cancelled:
+            self.schedule_update(lambda: [
+                on_complete(),
+                self.status_bar.set_status(f"{action} отменено")
+            ])
+        else:
+            self.schedule_update(lambda: [
+                on_complete(),
+                self.status_bar.set_status(f"{action} завершено"),
+                self.status_bar.set_progress(100)
+            ])
+
+    def _on_transfer_progress(self, stats: Dict):
+        self.schedule_update(lambda: self._show_transfer_progress(stats))
+
+    def _show_transfer_progress(self, stats: Dict):
+        self.status_bar.set_transfer_stats(stats)
+        finished = stats['done'] + stats['failed'] + stats['cancelled']
+        if stats['current'] and finished < stats['total']:
+            self.status_bar.set_status(f"Передача {finished}/{stats['total']}: {stats['current']}")
+
+    def _pause_transfers(self):
+        if self.transfer_queue:
+            self.transfer_queue.pause()
+
+    def _resume_transfers(self):
+        if self.transfer_queue:
+            self.transfer_queue.resume()
+
+    def _cancel_transfers(self):
+        if self.transfer_queue:
+            self.transfer_queue.cancel()
+
+    def _sync_folders(self):
+        if not self.ftp_client.ftp:
+            messagebox.showwarning("Ошибка", "Сначала подключитесь к серверу")
+            return
+
+        def make_plan(options):
+            return self.ftp_client.plan_sync(options['local_dir'], options['remote_dir'],
+                                             options['direction'], options['delete'],
+                                             options['compare_hash'])
+
+        def on_check(options):
+            dialog.set_busy(True)
+            dialog.show_report("Сравнение папок...")
+
+            def check_thread():
+                try:
+                    text = make_plan(options).report()
+                except Exception as e:
+                    text = f"Ошибка сравнения: {str(e)}"
+                self.schedule_update(lambda: [dialog.show_report(text), dialog.set_busy(False)])
+
+            Thread(target=check_thread, daemon=True).start()
+
+        def on_sync(options):
+            # Перед выполнением план всегда строится заново и показывается пользователю:
+            # папки могли измениться после "Проверить", а удаления надо подтвердить
+            dialog.set_busy(True)
+            dialog.show_report("Сравнение папок...")
+
+            def plan_thread():
+                try:
+                    plan = make_plan(options)
+                except Exception as e:
+                    message = f"Ошибка сравнения: {str(e)}"
+                    self.schedule_update(lambda: [dialog.show_report(message), dialog.set_busy(False)])
+                    return
+                self.schedule_update(lambda: confirm(plan))
+
+            Thread(target=plan_thread, daemon=True).start()
+
+        def confirm(plan):
+            if not dialog.dialog.winfo_exists():
+                return
+            dialog.show_report(plan.report())
+            dialog.set_busy(False)
+            if not plan:
+                messagebox.showinfo("Синхронизация", "Папки синхронизированы, изменений нет",
+                                    parent=dialog.dialog)
+                return
+
+            transfers = plan.count('upload') + plan.count('download')
+            deletes = plan.count('delete_remote') + plan.count('delete_local')
+            question = (f"Передать файлов: {transfers} ({humanize.naturalsize(plan.transfer_bytes)})\n"
+                        f"Создать папок: {plan.count('mkdir_remote') + plan.count('mkdir_local')}")
+            if deletes:
+                question += f"\nУДАЛИТЬ: {deletes} (на сервере {plan.count('delete_remote')}, " \
+                            f"локально {plan.count('delete_local')})"
+            question += "\n\nВыполнить синхронизацию?"
+            if not messagebox.askyesno("Подтверждение синхронизации", question,
+                                       icon=messagebox.WARNING if deletes else messagebox.QUESTION,
+                                       parent=dialog.dialog):
+                return
+            run(plan)
+
+        def run(plan):
+            dialog.dialog.destroy()
+            self.status_bar.set_status("Синхронизация...")
+            last_update = 0.0
+
+            def progress(done, total):
+                nonlocal last_update
+                now = time.monotonic()
+                if now - last_update < 0.2 and done < total:
+                    return
+                last_update = now
+                percent = done * 100 / total if total else 100
+                self.schedule_update(lambda: [
+                    self.status_bar.set_progress(percent),
+                    self.status_bar.set_status(f"Синхронизация: {humanize.naturalsize(done)} "
+                                               f"из {humanize.naturalsize(total)}")
+                ])
+
+            def sync_thread():
+                try:
+                    success, message = self.ftp_client.sync_directories(plan, progress)
+                except Exception as e:
+                    success, message = False, f"Ошибка синхронизации: {str(e)}"
+
+                def finish():
+                    self._refresh_local_list()
+                    self._refresh_remote_list(force=True)
+                    self.status_bar.set_status(message.splitlines()[0], error=not success)
+                    if success:
+                        self.status_bar.set_progress(100)
+                    else:
+                        messagebox.showerror("Ошибка", message)
+                self.schedule_update(finish)
+
+            Thread(target=sync_thread, daemon=True).start()
+
+        dialog = SyncDialog(self, self.settings.get('default_local_dir'), self._remote_dir,
+                            on_check, on_sync)
+
     def _delete_local(self):
         selected = self.local_files.selection()
         if not selected:
@@ -1855,31 +2185,58 @@ class Application(tk.Tk):
         )
         if not confirm:
             return
-            
-        try:
-            for item_id in selected:
-                values = self.remote_files.item(item_id)['values']
-                filename = str(values[0])
-                is_dir = values[2] == "Папка"
-                
-                if is_dir:
-                    success, message = self.ftp_client.delete_directory_recursive(filename)
-                else:
-                    success, message = self.ftp_client.delete_item(filename)
-                    
-                if not success:
-                    if message == "NOT_EMPTY_DIR":
-                        if messagebox.askyesno("Подтверждение", 
-                                             f"Папка '{filename}' не пуста. Удалить её содержимое?"):
-                            success, message = self.ftp_client.delete_directory_recursive(filename)
+
+        # Пути фиксируем сейчас: пока идет удаление, пользователь может перейти в другую папку
+        entries = []
+        for item_id in selected:
+            values = self.remote_files.item(item_id)['values']
+            entries.append((str(values[0]), posixpath.join(self._remote_dir, str(values[0])),
+                            values[2] == "Папка"))
+
+        last_update = 0.0
+
+        def progress(done, total):
+            nonlocal last_update
+            now = time.monotonic()
+            if now - last_update < 0.2 and done < total:
+                return
+            last_update = now
+            self.schedule_update(lambda: [
+                self.status_bar.set_progress(done * 100 / total if total else 100),
+                self.status_bar.set_status(f"Удаление: {done} из {total}")
+            ])
+
+        def delete_thread():
+            errors = []
+            try:
+                for filename, remote_path, is_dir in entries:
+                    if is_dir:
+                        success, message = self.ftp_client.delete_directory_recursive(remote_path, progress)
+                    else:
+                        success, message = self.ftp_client.delete_item(remote_path)
+
                     if not success:
-                        messagebox.showerror("Ошибка", f"Не удалось удалить {filename}: {message}")
-                    
-            self._refresh_remote_list()
-            self.status_bar.set_status("Удаление завершено")
-        except Exception as e:
-            self.status_bar.set_status(f"Ошибка удаления: {str(e)}", error=True)
-            messagebox.showerror("Ошибка", f"Не удалось удалить файл(ы): {str(e)}")
+                        if message == "NOT_EMPTY_DIR":
+                            if self._ask_from_thread("Подтверждение",
+                                                     f"Папка '{filename}' не пуста. Удалить её содержимое?"):
+                                success, message = self.ftp_client.delete_directory_recursive(remote_path, progress)
+                            else:
+                                continue
+                        if not success:
+                            errors.append(f"{filename}: {message}")
+            except Exception as e:
+                errors.append(str(e))
+
+            def finish():
+                self._refresh_remote_list(force=True)
+                if errors:
+                    self.status_bar.set_status(f"Ошибка удаления: {errors[0].splitlines()[0]}", error=True)
+                    messagebox.showerror("Ошибка", "Не удалось удалить файл(ы):\n" + "\n".join(errors)[:2000])
+                else:
+                    self.status_bar.set_status("Удаление завершено")
+            self.schedule_update(finish)
+
+        Thread(target=delete_thread, daemon=True).start()
 
     def _on_closing(self):
         if not messagebox.askyesno("Подтверждение", "Вы действительно хотите выйти из программы?"):
@@ -1891,6 +2248,14 @@ class Application(tk.Tk):
             debug_log("DEBUG: Останавливаем мониторинг статистики")
             self.stats_panel.stop_monitoring()
             
+            debug_log("DEBUG: Останавливаем очередь передач")
+            if self.transfer_queue:
+                self.transfer_queue.shutdown()
+            self.remote_nav.shutdown()
+            self.local_nav.shutdown()
+            self.local_watcher.stop()
+            self.local_indexer.stop()
+
             debug_log("DEBUG: Отключаемся от FTP сервера")
             self.ftp_client.disconnect()
             
@@ -0,0 +1,5 @@
+import sys
+
+
+def debug_log(message: str):
+    print(message, file=sys.stderr, flush=True)
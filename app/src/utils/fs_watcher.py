@@ -0,0 +1,210 @@
+from threading import Event, Thread
+from typing import Callable, Dict, Optional, Set, Tuple
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import time
+from src.utils.debug import debug_log
+
+
+IN_MODIFY = 0x00000002
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_MODIFY | IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO |
+              IN_CREATE | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+# После этих событий отдельные имена ничего не значат - нужен полный перечитанный список
+RESCAN_MASK = IN_Q_OVERFLOW | IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED
+
+_EVENT = struct.Struct('iIII')
+
+
+def _load_libc():
+    if not sys.platform.startswith('linux'):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        libc.inotify_init1
+        libc.inotify_add_watch
+    except (OSError, AttributeError):
+        return None
+    return libc
+
+
+class _InotifySource:
+    def __init__(self, libc, path: str):
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1")
+        if libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK) < 0:
+            errno = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(errno, f"inotify_add_watch {path}")
+
+    def read(self, timeout: float) -> Tuple[Set[str], bool]:
+        names: Set[str] = set()
+        rescan = False
+        if not select.select([self._fd], [], [], timeout)[0]:
+            return names, rescan
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return names, rescan
+
+        offset = 0
+        while offset + _EVENT.size <= len(data):
+            _, mask, _, length = _EVENT.unpack_from(data, offset)
+            offset += _EVENT.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+            if mask & RESCAN_MASK:
+                rescan = True
+            elif name:
+                names.add(os.fsdecode(name))
+        return names, rescan
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class _PollingSource:
+    def __init__(self, path: str, interval: float, stop: Event):
+        self.path = path
+        self.interval = interval
+        self._stop = stop
+        self._snapshot = self._scan()
+        self._next = time.monotonic() + interval
+
+    def read(self, timeout: float) -> Tuple[Set[str], bool]:
+        wait = self._next - time.monotonic()
+        if wait > timeout:
+            self._stop.wait(timeout)
+            return set(), False
+        self._stop.wait(max(wait, 0))
+        self._next = time.monotonic() + self.interval
+
+        try:
+            snapshot = self._scan()
+        except OSError:
+            # Папка пропала: сообщаем один раз, пока она снова не станет доступна
+            missing = self._snapshot is not None
+            self._snapshot = None
+            return set(), missing
+        old, self._snapshot = self._snapshot, snapshot
+        if old is None:
+            # Папка появилась снова
+            return set(), True
+        names = {name for name in snapshot.keys() | old.keys() if snapshot.get(name) != old.get(name)}
+        return names, False
+
+    def _scan(self) -> Dict[str, Tuple[bool, int, int]]:
+        snapshot = {}
+        with os.scandir(self.path) as it:
+            for entry in it:
+                try:
+                    info = entry.stat()
+                    snapshot[entry.name] = (entry.is_dir(), info.st_size, info.st_mtime_ns)
+                except OSError:
+                    snapshot[entry.name] = (False, -1, 0)
+        return snapshot
+
+    def close(self) -> None:
+        pass
+
+
+class DirectoryWatcher:
+    # События копятся, пока идут чаще DEBOUNCE, но не дольше MAX_DELAY: копирование
+    # тысяч файлов дает одно обновление панели в пару секунд, а не тысячу
+    DEBOUNCE = 0.3
+    MAX_DELAY = 2.0
+
+    def __init__(self, on_change: Callable[[str, Set[str], bool], None],
+                 poll_interval: float = 2.0, use_inotify: bool = True):
+        # on_change(папка, измененные имена, нужно ли перечитать папку целиком) -
+        # вызывается в потоке наблюдателя
+        self.on_change = on_change
+        self.poll_interval = poll_interval
+        self._libc = _load_libc() if use_inotify else None
+        self.path: Optional[str] = None
+        self._stop = Event()
+        self._thread: Optional[Thread] = None
+
+    @property
+    def backend(self) -> str:
+        return 'inotify' if self._libc is not None else 'polling'
+
+    def watch(self, path: str) -> None:
+        if path == self.path and self._thread is not None and self._thread.is_alive():
+            return
+        self.stop()
+        self.path = path
+        self._stop = Event()
+        self._thread = Thread(target=self._run, args=(path, self._stop), daemon=True,
+                              name='dir-watcher')
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self.path = None
+
+    def _open(self, path: str, stop: Event):
+        if self._libc is not None:
+            try:
+                return _InotifySource(self._libc, path)
+            except OSError as e:
+                # Например, исчерпан fs.inotify.max_user_watches
+                debug_log(f"DEBUG: DirectoryWatcher: inotify недоступен для {path}: {str(e)}")
+        return _PollingSource(path, self.poll_interval, stop)
+
+    def _run(self, path: str, stop: Event) -> None:
+        try:
+            source = self._open(path, stop)
+        except OSError as e:
+            debug_log(f"DEBUG: DirectoryWatcher: Не удалось следить за {path}: {str(e)}")
+            return
+        debug_log(f"DEBUG: DirectoryWatcher: Наблюдение за {path} ({type(source).__name__})")
+
+        pending: Set[str] = set()
+        rescan = False
+        first = last = 0.0
+        try:
+            while not stop.is_set():
+                now = time.monotonic()
+                if pending or rescan:
+                    timeout = max(0.0, min(last + self.DEBOUNCE, first + self.MAX_DELAY) - now)
+                else:
+                    timeout = 0.5
+                names, overflow = source.read(timeout)
+
+                now = time.monotonic()
+                if names or overflow:
+                    if not pending and not rescan:
+                        first = now
+                    last = now
+                    pending |= names
+                    rescan = rescan or overflow
+
+                if (pending or rescan) and (now - last >= self.DEBOUNCE or now - first >= self.MAX_DELAY):
+                    if stop.is_set():
+                        break
+                    try:
+                        self.on_change(path, pending, rescan)
+                    except Exception as e:
+                        debug_log(f"DEBUG: DirectoryWatcher: Ошибка обработчика: {str(e)}")
+                    pending, rescan = set(), False
+        finally:
+            source.close()
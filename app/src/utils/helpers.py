@@ -3,21 +3,23 @@ from datetime import datetime
 from typing import List, Dict, Any
 import humanize
 
+from src.utils.local_listing import list_entries
+
 
 def list_directory(path: str) -> List[Dict[str, Any]]:
     items = []
     try:
-        for name in os.listdir(path):
-            full_path = os.path.join(path, name)
-            stat = os.stat(full_path)
-            
+        for entry in list_entries(path):
+            if entry.error:
+                continue
+
             item = {
-                'name': name,
-                'path': full_path,
-                'size': stat.st_size,
-                'type': 'folder' if os.path.isdir(full_path) else 'file',
-                'modified': datetime.fromtimestamp(stat.st_mtime),
-                'permissions': stat.st_mode
+                'name': entry.name,
+                'path': os.path.join(path, entry.name),
+                'size': max(entry.size, 0),
+                'type': 'folder' if entry.is_dir else 'file',
+                'modified': datetime.fromtimestamp(entry.modified),
+                'permissions': entry.mode
             }
 
             if item['type'] == 'file':
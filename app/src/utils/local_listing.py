@@ -0,0 +1,125 @@
+from threading import Event, Lock, Thread
+from typing import NamedTuple, Optional, List, Dict, Tuple, Callable, Iterator
+import os
+import stat
+import time
+
+
+class LocalEntry(NamedTuple):
+    name: str
+    is_dir: bool
+    size: int = -1
+    modified: float = 0.0
+    mode: int = 0
+    is_link: bool = False
+    error: str = ''
+
+
+def _entry(entry: os.DirEntry) -> LocalEntry:
+    # Тип берется из d_type, который scandir уже получил; stat - один системный вызов,
+    # результат DirEntry кэширует (в Windows он приходит вместе со списком бесплатно)
+    try:
+        is_link = entry.is_symlink()
+        try:
+            info = entry.stat()
+        except OSError:
+            if not is_link:
+                raise
+            # Битая ссылка: показываем саму ссылку
+            info = entry.stat(follow_symlinks=False)
+        is_dir = stat.S_ISDIR(info.st_mode)
+        return LocalEntry(entry.name, is_dir, -1 if is_dir else info.st_size,
+                          info.st_mtime, info.st_mode, is_link)
+    except OSError as e:
+        return LocalEntry(entry.name, False, error=e.strerror or str(e))
+
+
+def stat_entry(directory: str, name: str) -> Optional[LocalEntry]:
+    # Одна запись без чтения всей папки; None - записи больше нет
+    path = os.path.join(directory, name)
+    try:
+        info = os.lstat(path)
+    except FileNotFoundError:
+        return None
+    except OSError as e:
+        return LocalEntry(name, False, error=e.strerror or str(e))
+    is_link = stat.S_ISLNK(info.st_mode)
+    if is_link:
+        try:
+            info = os.stat(path)
+        except OSError:
+            pass
+    is_dir = stat.S_ISDIR(info.st_mode)
+    return LocalEntry(name, is_dir, -1 if is_dir else info.st_size, info.st_mtime, info.st_mode, is_link)
+
+
+def scan_directory(path: str, chunk_size: int = 500,
+                   interval: float = 0.2) -> Iterator[List[LocalEntry]]:
+    # Части по chunk_size записей или не реже interval секунд: медленный сетевой
+    # диск отдает большую папку долго, панель заполняется по мере чтения
+    chunk: List[LocalEntry] = []
+    started = time.monotonic()
+    with os.scandir(path) as it:
+        for entry in it:
+            chunk.append(_entry(entry))
+            if len(chunk) >= chunk_size or time.monotonic() - started >= interval:
+                yield chunk
+                chunk = []
+                started = time.monotonic()
+    if chunk:
+        yield chunk
+
+
+def list_entries(path: str) -> List[LocalEntry]:
+    entries: List[LocalEntry] = []
+    for chunk in scan_directory(path):
+        entries.extend(chunk)
+    return entries
+
+
+class ChildCounter:
+    # Число элементов папки меняется только вместе с ее mtime, поэтому подсчет
+    # кэшируется по (путь, mtime) и повторно scandir не выполняется
+    MAX_ENTRIES = 10000
+
+    def __init__(self):
+        self._lock = Lock()
+        self._counts: Dict[str, Tuple[float, Optional[int]]] = {}
+
+    def cached(self, path: str, modified: float) -> Tuple[bool, Optional[int]]:
+        with self._lock:
+            cached = self._counts.get(path)
+        if cached is not None and cached[0] == modified:
+            return True, cached[1]
+        return False, None
+
+    def count(self, path: str, modified: float) -> Optional[int]:
+        found, count = self.cached(path, modified)
+        if found:
+            return count
+        try:
+            with os.scandir(path) as it:
+                count = sum(1 for _ in it)
+        except OSError:
+            count = None
+        with self._lock:
+            if len(self._counts) >= self.MAX_ENTRIES:
+                self._counts.clear()
+            self._counts[path] = (modified, count)
+        return count
+
+    def count_in_background(self, folders: List[Tuple[str, float]],
+                            callback: Callable[[str, Optional[int]], None],
+                            cancel_event: Optional[Event] = None) -> Optional[Thread]:
+        if not folders:
+            return None
+
+        def worker():
+            for path, modified in folders:
+                if cancel_event is not None and cancel_event.is_set():
+                    return
+                callback(path, self.count(path, modified))
+
+        thread = Thread(target=worker, daemon=True)
+        thread.start()
+        return thread
@@ -0,0 +1,92 @@
+from ftplib import error_perm
+
+import pytest
+
+from src.core.connection_pool import ConnectionPool, PoolTimeout
+
+
+class FakeFTP:
+    def __init__(self, alive=True):
+        self.alive = alive
+        self.closed = False
+
+    def voidcmd(self, command):
+        if not self.alive:
+            raise EOFError()
+        return '200 OK'
+
+    def quit(self):
+        self.closed = True
+
+
+def make_pool(size=2, **kwargs):
+    created = []
+
+    def factory():
+        created.append(FakeFTP())
+        return created[-1]
+    return ConnectionPool(factory, size, **kwargs), created
+
+
+def test_reuse_and_stats():
+    pool, created = make_pool()
+    with pool.connection() as first:
+        pass
+    with pool.connection() as second:
+        assert pool.stats()['in_use'] == 1
+    assert first is second and len(created) == 1
+    stats = pool.stats()
+    assert (stats['created'], stats['reused'], stats['idle'], stats['in_use']) == (1, 1, 1, 0)
+
+
+def test_acquire_timeout_when_exhausted():
+    pool, _ = make_pool(size=1)
+    conn = pool.acquire()
+    with pytest.raises(PoolTimeout):
+        pool.acquire(timeout=0.05)
+    pool.release(conn)
+    assert pool.acquire(timeout=0.05) is conn
+
+
+def test_broken_connection_is_discarded():
+    pool, created = make_pool(size=1)
+    with pytest.raises(OSError):
+        with pool.connection():
+            raise OSError("обрыв")
+    # Отказ сервера (5xx) не портит соединение
+    with pytest.raises(error_perm):
+        with pool.connection():
+            raise error_perm("550 нет файла")
+    assert created[0].closed and not created[1].closed
+    assert pool.stats()['discarded'] == 1
+    assert pool.stats()['in_use'] == 0
+
+
+def test_stale_connection_is_replaced():
+    pool, created = make_pool(size=1, health_check_interval=0)
+    with pool.connection():
+        pass
+    created[0].alive = False
+    with pool.connection() as conn:
+        assert conn is created[1]
+    assert created[0].closed
+
+
+def test_factory_error_frees_slot():
+    def factory():
+        raise OSError("нет сети")
+    pool = ConnectionPool(factory, 1)
+    for _ in range(2):
+        with pytest.raises(OSError):
+            pool.acquire(timeout=0.05)
+    assert pool.stats()['in_use'] == 0
+
+
+def test_closed_pool():
+    pool, created = make_pool()
+    conn = pool.acquire()
+    pool.close()
+    pool.release(conn)
+    assert conn.closed
+    with pytest.raises(ConnectionError):
+        pool.acquire()
@@ -0,0 +1,127 @@
+import calendar
+
+from src.core.listing import (RemoteEntry, parse_features, parse_mlsd, parse_mlsd_line,
+                              parse_mlsd_time, parse_list)
+
+
+# 15 июня 2024 12:00 UTC
+NOW = float(calendar.timegm((2024, 6, 15, 12, 0, 0, 0, 0, 0)))
+
+
+def test_parse_features():
+    response = "211-Features:\n MLST type*;size*;modify*;\n REST STREAM\n HASH SHA-256*;MD5\n211 End"
+    features = parse_features(response)
+    assert features == {'MLST': 'type*;size*;modify*;', 'REST': 'STREAM', 'HASH': 'SHA-256*;MD5'}
+
+
+def test_mlsd_file_and_dir():
+    entries = parse_mlsd([
+        "type=cdir;modify=20240101000000; .",
+        "type=pdir;modify=20240101000000; ..",
+        "type=file;size=1024;modify=20240102030405;UNIX.mode=0644; report.txt",
+        "Type=DIR;Modify=20240102030405; docs",
+    ])
+    assert entries == [
+        RemoteEntry('report.txt', False, 1024, calendar.timegm((2024, 1, 2, 3, 4, 5)), '0644'),
+        RemoteEntry('docs', True, -1, calendar.timegm((2024, 1, 2, 3, 4, 5))),
+    ]
+
+
+def test_mlsd_name_with_spaces_and_semicolons():
+    entry = parse_mlsd_line("type=file;size=1; my file;v2.txt")
+    assert entry.name == "my file;v2.txt"
+    assert entry.size == 1
+
+
+def test_mlsd_missing_size_and_bad_line():
+    assert parse_mlsd_line("type=file; nosize").size == -1
+    assert parse_mlsd_line("type=file;size=x; bad").size == -1
+    assert parse_mlsd_line("no-facts-separator") is None
+
+
+def test_mlsd_symlink_keeps_target_case():
+    entry = parse_mlsd_line("type=OS.unix=slink:/Home/User/Data;size=4; data")
+    assert entry.is_link
+    assert entry.target == "/Home/User/Data"
+    # Без '/' на конце тип цели неизвестен, его проверяет FTPClient через CWD
+    assert not entry.is_dir
+
+
+def test_mlsd_symlink_to_dir_by_trailing_slash():
+    entry = parse_mlsd_line("type=OS.unix=symlink:/srv/Share/;size=4; share")
+    assert entry.is_link and entry.is_dir
+    assert entry.target == "/srv/Share/"
+
+
+def test_mlsd_symlink_reported_as_dir_by_mode():
+    # Некоторые серверы отдают ссылку как type=dir, ее выдает только unix.mode
+    entry = parse_mlsd_line("type=dir;unix.mode=0120777; loop")
+    assert entry.is_dir and entry.is_link
+    assert not parse_mlsd_line("type=dir;unix.mode=0755; real").is_link
+    assert not parse_mlsd_line("type=file;unix.mode=rw-; odd").is_link
+
+
+def test_mlsd_time():
+    assert parse_mlsd_time("20240102030405") == calendar.timegm((2024, 1, 2, 3, 4, 5))
+    assert parse_mlsd_time("20240102030405.250") == calendar.timegm((2024, 1, 2, 3, 4, 5)) + 0.25
+    assert parse_mlsd_time("2024") == 0.0
+    assert parse_mlsd_time("2024xx02030405") == 0.0
+
+
+def test_list_unix_variants():
+    entries = parse_list([
+        "total 12",
+        "drwxr-xr-x   2 user group     4096 Jan 10 09:30 docs",
+        "-rw-r--r--   1 user group      512 Mar  5  2021 old.txt",
+        "-rw-r--r--+  1 user group       10 Jun 14 08:00 acl.txt",
+        "-rw-r--r--   1 ftp         20 Jun 14 08:00 nogroup.txt",
+        "-rw-r--r--   1 user group        3 Jun 14 08:00   spaced.txt",
+        "drwxr-xr-x   2 user group     4096 Jun 14 08:00 .",
+    ], now=NOW)
+    by_name = {entry.name: entry for entry in entries}
+    assert set(by_name) == {'docs', 'old.txt', 'acl.txt', 'nogroup.txt', '  spaced.txt'}
+    assert by_name['docs'].is_dir
+    assert by_name['docs'].modified == calendar.timegm((2024, 1, 10, 9, 30, 0))
+    assert by_name['old.txt'].modified == calendar.timegm((2021, 3, 5, 0, 0, 0))
+    assert by_name['old.txt'].size == 512
+    assert by_name['nogroup.txt'].size == 20
+    assert by_name['acl.txt'].permissions == '-rw-r--r--+'
+
+
+def test_list_future_date_is_last_year():
+    entry = parse_list(["-rw-r--r-- 1 u g 1 Dec 31 23:00 late.txt"], now=NOW)[0]
+    assert entry.modified == calendar.timegm((2023, 12, 31, 23, 0, 0))
+
+
+def test_list_symlinks():
+    entries = parse_list([
+        "lrwxrwxrwx 1 u g 11 Jun 14 08:00 data -> /Srv/Data",
+        "lrwxrwxrwx 1 u g 11 Jun 14 08:00 share -> ../Share/",
+    ], now=NOW)
+    data, share = entries
+    assert (data.name, data.target, data.is_link, data.is_dir) == ('data', '/Srv/Data', True, False)
+    assert (share.name, share.target, share.is_link, share.is_dir) == ('share', '../Share/', True, True)
+
+
+def test_list_arrow_in_regular_file_name():
+    entry = parse_list(["-rw-r--r-- 1 u g 1 Jun 14 08:00 a -> b.txt"], now=NOW)[0]
+    assert entry.name == 'a -> b.txt'
+    assert not entry.is_link
+
+
+def test_list_dos():
+    entries = parse_list([
+        "01-15-24  10:30AM       <DIR>          Folder One",
+        "12-01-99  12:05PM                 1234 report.doc",
+        "03-02-2023  12:10AM               7 midnight.txt",
+    ], now=NOW)
+    folder, report, midnight = entries
+    assert folder.name == 'Folder One' and folder.is_dir and folder.size == -1
+    assert folder.modified == calendar.timegm((2024, 1, 15, 10, 30, 0))
+    assert report.size == 1234
+    assert report.modified == calendar.timegm((1999, 12, 1, 12, 5, 0))
+    assert midnight.modified == calendar.timegm((2023, 3, 2, 0, 10, 0))
+
+
+def test_list_unknown_format():
+    assert parse_list(["+i8388621.48594,m825718503,r,s280, foo"], now=NOW) == []
@@ -0,0 +1,42 @@
+from src.core.listing import RemoteEntry
+from src.core.metadata_store import MetadataStore
+
+
+ENTRIES = [RemoteEntry('a.txt', False, 10, 1.5, '0644'), RemoteEntry('sub', True)]
+
+
+def test_put_get_and_persist(tmp_path):
+    db_path = str(tmp_path / 'meta.db')
+    store = MetadataStore(db_path)
+    store.put('srv', '/docs', ENTRIES)
+    # До записи на диск список отдается из памяти
+    assert store.get('srv', '/docs')[1] == ENTRIES
+    assert store.get('other', '/docs') is None
+    store.close()
+
+    reopened = MetadataStore(db_path)
+    listed_at, entries = reopened.get('srv', '/docs')
+    assert entries == ENTRIES and listed_at > 0
+    assert dict(reopened.listings('srv')) == {'/docs': ENTRIES}
+    reopened.close()
+
+
+def test_remove_tree(tmp_path):
+    store = MetadataStore(str(tmp_path / 'meta.db'))
+    for path in ('/a', '/a/b', '/a/b/c', '/a_b', '/ab'):
+        store.put('srv', path, ENTRIES)
+    store.flush()
+    store.put('srv', '/a/pending', ENTRIES)
+    store.remove('srv', '/a', tree=True)
+    assert sorted(path for path, _ in store.listings('srv')) == ['/a_b', '/ab']
+    store.remove('srv', '/ab')
+    assert sorted(path for path, _ in store.listings('srv')) == ['/a_b']
+    store.close()
+
+
+def test_old_listings_expire(tmp_path):
+    db_path = str(tmp_path / 'meta.db')
+    store = MetadataStore(db_path)
+    store.put('srv', '/', ENTRIES)
+    store.close()
+    assert MetadataStore(db_path, max_age_days=0).get('srv', '/') is None
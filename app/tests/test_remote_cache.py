@@ -0,0 +1,70 @@
+from src.core.listing import RemoteEntry
+from src.core.remote_cache import DirectoryCache
+
+
+def entries(*names):
+    return [RemoteEntry(name, False, 1) for name in names]
+
+
+def test_get_and_stats():
+    cache = DirectoryCache(ttl=30)
+    assert cache.get('/a') is None
+    cache.put('/a/', entries('x'))
+    assert cache.get('/a') == entries('x')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+    assert stats['hit_rate'] == 50.0
+
+
+def test_ttl_expiry(monkeypatch):
+    now = [100.0]
+    monkeypatch.setattr('src.core.remote_cache.time.monotonic', lambda: now[0])
+    cache = DirectoryCache(ttl=10)
+    cache.put('/a', entries('x'))
+    cache.put_count('/b', 3)
+    now[0] += 10
+    assert cache.peek('/a') == entries('x')
+    assert cache.get_count('/b') == (True, 3)
+    now[0] += 1
+    assert cache.get('/a') is None
+    assert cache.get_count('/b') == (False, None)
+
+
+def test_lru_eviction():
+    cache = DirectoryCache(max_entries=2)
+    cache.put('/a', entries('1'))
+    cache.put('/b', entries('2'))
+    # Обращение делает /a самой свежей записью, вытесняется /b
+    cache.get('/a')
+    cache.put('/c', entries('3'))
+    assert cache.peek('/b') is None
+    assert cache.peek('/a') is not None and cache.peek('/c') is not None
+    assert cache.stats()['evictions'] == 1
+
+
+def test_count_comes_from_listing():
+    cache = DirectoryCache()
+    cache.put_count('/a', 7)
+    cache.put('/a', entries('x', 'y'))
+    assert cache.get_count('/a') == (True, 2)
+
+
+def test_invalidate_tree_drops_children_and_parent():
+    cache = DirectoryCache()
+    for path in ('/', '/a', '/a/b', '/ab'):
+        cache.put(path, entries('x'))
+    cache.invalidate_tree('/a')
+    assert cache.peek('/a') is None and cache.peek('/a/b') is None
+    assert cache.peek('/') is None
+    assert cache.peek('/ab') is not None
+
+
+def test_add_and_remove_entry():
+    cache = DirectoryCache()
+    cache.put('/a', entries('x', 'y'))
+    cache.add_entry('/a', RemoteEntry('x', False, 5))
+    cache.remove_entry('/a', 'y')
+    assert cache.peek('/a') == [RemoteEntry('x', False, 5)]
+    # В непрочитанную папку запись не добавляется
+    cache.add_entry('/b', RemoteEntry('z', False, 1))
+    assert cache.peek('/b') is None
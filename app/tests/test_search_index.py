@@ -0,0 +1,85 @@
+from src.core.search_index import SearchIndex, _glob_regex, name_matcher
+
+
+def names(results):
+    return sorted((directory, name) for directory, name, _, _, _ in results)
+
+
+def make_index():
+    index = SearchIndex()
+    index.update_directory('/', [('docs', True, 0, 0), ('readme.txt', False, 10, 0)])
+    index.update_directory('/docs', [('Report.TXT', False, 5, 0), ('notes.md', False, 3, 0),
+                                     ('old', True, 0, 0)])
+    index.update_directory('/docs/old', [('report-2020.txt', False, 1, 0)])
+    return index
+
+
+def test_substring_search_and_root():
+    index = make_index()
+    assert names(index.search('report')) == [('/docs', 'Report.TXT'), ('/docs/old', 'report-2020.txt')]
+    assert names(index.search('report', case_sensitive=True)) == [('/docs/old', 'report-2020.txt')]
+    assert names(index.search('re', root='/docs/old')) == [('/docs/old', 'report-2020.txt')]
+    assert len(index.search('e', limit=2)) == 2
+
+
+def test_glob_search():
+    index = make_index()
+    assert names(index.search('*.txt')) == [('/', 'readme.txt'), ('/docs', 'Report.TXT'),
+                                            ('/docs/old', 'report-2020.txt')]
+    assert names(index.search('r??dme.*')) == [('/', 'readme.txt')]
+    assert names(index.search('[!r]*')) == [('/', 'docs'), ('/docs', 'notes.md'), ('/docs', 'old')]
+
+
+def test_update_directory_drops_vanished_subtrees():
+    index = make_index()
+    index.update_directory('/docs', [('notes.md', False, 3, 0)])
+    assert not index.has_directory('/docs/old')
+    assert names(index.search('report')) == []
+    assert len(index) == 3
+
+
+def test_update_entries_keeps_other_entries():
+    index = make_index()
+    index.update_entries('/docs', [('notes.md', False, 30, 0), ('new.md', False, 1, 0)],
+                         removed=['Report.TXT'])
+    assert names(index.search('.md')) == [('/docs', 'new.md'), ('/docs', 'notes.md')]
+    assert [size for _, name, _, size, _ in index.search('notes')] == [30]
+    assert names(index.search('report')) == [('/docs/old', 'report-2020.txt')]
+    # Непроиндексированная папка не становится известной по частичному списку
+    index.update_entries('/other', [('x', False, 1, 0)])
+    assert not index.has_directory('/other')
+
+
+def test_compact_keeps_results():
+    index = SearchIndex()
+    for round_number in range(3):
+        index.update_directory('/big', [(f'file{i}-{round_number}', False, i, 0) for i in range(1500)])
+        index.search('file')
+    assert len(index) == 1500
+    assert len(index._names) < 4500
+    assert names(index.search('file7-2')) == [('/big', 'file7-2')]
+    assert index.search('file7-1') == []
+
+
+def test_remove_tree_and_clear():
+    index = make_index()
+    index.remove_tree('/docs')
+    assert names(index.search('*')) == [('/', 'docs'), ('/', 'readme.txt')]
+    index.clear()
+    assert len(index) == 0 and index.search('docs') == []
+
+
+def test_glob_regex_anchors():
+    assert _glob_regex('*.txt').search('\na.txt\n')
+    assert not _glob_regex('*.txt').search('\na.txt.bak\n')
+    assert not _glob_regex('a*').search('\nba\n')
+    assert _glob_regex('[a-c]?').search('\nbx\n')
+    assert _glob_regex('[x').search('\n[x\n')
+    assert _glob_regex('**').search('\nanything\n')
+
+
+def test_name_matcher():
+    match = name_matcher('*.TXT')
+    assert match('a.txt') and not match('a.txt~')
+    assert name_matcher('Rep')('my report')
+    assert not name_matcher('Rep', case_sensitive=True)('my report')
@@ -0,0 +1,152 @@
+import os
+from contextlib import contextmanager
+
+from src.core.listing import RemoteEntry
+from src.core.sync import DirectorySync
+
+
+class FakePool:
+    @contextmanager
+    def connection(self):
+        yield None
+
+
+class FakeClient:
+    hash_command = None
+
+    def __init__(self, tree, mlst=True):
+        # {удаленная папка: [RemoteEntry]}
+        self.tree = tree
+        self.mlst = mlst
+        self.pool = FakePool()
+
+    def supports(self, command):
+        return command == 'MLST' and self.mlst
+
+    def _list_dir_strict(self, conn, path):
+        return self.tree.get(path, [])
+
+
+def make_local(root, files):
+    for path, (data, mtime) in files.items():
+        full = os.path.join(str(root), *path.split('/'))
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        with open(full, 'w') as f:
+            f.write(data)
+        os.utime(full, (mtime, mtime))
+
+
+def actions(plan):
+    return sorted((action.kind, action.path, action.reason) for action in plan.actions)
+
+
+def test_upload_plan(tmp_path):
+    make_local(tmp_path, {
+        'same.txt': ('abc', 1000),
+        'bigger.txt': ('abcdef', 1000),
+        'newer.txt': ('abc', 5000),
+        'new.txt': ('x', 1000),
+        'sub/inner.txt': ('x', 1000),
+    })
+    client = FakeClient({'/r': [
+        RemoteEntry('same.txt', False, 3, 1000.0),
+        RemoteEntry('bigger.txt', False, 3, 1000.0),
+        RemoteEntry('newer.txt', False, 3, 1000.0),
+        RemoteEntry('extra.txt', False, 1, 1000.0),
+    ]})
+    plan = DirectorySync(client, workers=2).plan(str(tmp_path), '/r', 'upload')
+
+    assert actions(plan) == [
+        ('mkdir_remote', 'sub', ''),
+        ('upload', 'bigger.txt', 'размер'),
+        ('upload', 'new.txt', 'новый'),
+        ('upload', 'newer.txt', 'новее'),
+        ('upload', 'sub/inner.txt', 'новый'),
+    ]
+    assert plan.unchanged == 1
+    assert plan.transfer_bytes == 6 + 1 + 3 + 1
+    assert plan.count('delete_remote') == 0
+
+
+def test_delete_removes_only_top_extra_dir(tmp_path):
+    make_local(tmp_path, {'keep.txt': ('abc', 1000)})
+    client = FakeClient({
+        '/r': [RemoteEntry('keep.txt', False, 3, 1000.0),
+               RemoteEntry('old', True),
+               RemoteEntry('stale.txt', False, 1, 1000.0)],
+        '/r/old': [RemoteEntry('deep.txt', False, 1, 1000.0)],
+    })
+    plan = DirectorySync(client, delete=True).plan(str(tmp_path), '/r', 'upload')
+
+    assert actions(plan) == [('delete_remote', 'old', 'лишний'), ('delete_remote', 'stale.txt', 'лишний')]
+    assert [action.is_dir for action in sorted(plan.actions, key=lambda a: a.path)] == [True, False]
+
+
+def test_remote_dir_links_are_not_followed(tmp_path):
+    make_local(tmp_path, {'a.txt': ('abc', 1000)})
+    client = FakeClient({
+        '/r': [RemoteEntry('a.txt', False, 3, 1000.0),
+               RemoteEntry('loop', True, is_link=True, target='/r/')],
+        '/r/loop': [RemoteEntry('a.txt', False, 3, 1000.0)],
+    })
+    plan = DirectorySync(client, delete=True).plan(str(tmp_path), '/r', 'upload')
+
+    assert not plan
+    assert plan.unchanged == 1
+
+
+def test_local_dir_behind_remote_link_is_skipped(tmp_path):
+    make_local(tmp_path, {'a.txt': ('abc', 1000), 'shared/inner.txt': ('x', 1000)})
+    client = FakeClient({
+        '/r': [RemoteEntry('a.txt', False, 3, 1000.0),
+               RemoteEntry('shared', True, is_link=True, target='/elsewhere')],
+    })
+    upload = DirectorySync(client).plan(str(tmp_path), '/r', 'upload')
+    download = DirectorySync(client, delete=True).plan(str(tmp_path), '/r', 'download')
+
+    # Ни загрузки через ссылку, ни удаления локальной папки по непрочитанному списку
+    for plan in (upload, download):
+        assert actions(plan) == []
+        assert plan.conflicts == ["shared: на сервере ссылка на папку, пропущено"]
+
+
+def test_download_conflict_between_file_and_dir(tmp_path):
+    make_local(tmp_path, {'name/inner.txt': ('x', 1000)})
+    client = FakeClient({'/r': [RemoteEntry('name', False, 5, 1000.0)]})
+    plan = DirectorySync(client, delete=True).plan(str(tmp_path), '/r', 'download')
+
+    assert plan.conflicts == ["name: папка и файл с одним именем"]
+    # Содержимое локальной папки не удаляется: его родитель есть в источнике как файл
+    assert actions(plan) == []
+
+
+def test_both_directions_never_delete(tmp_path):
+    make_local(tmp_path, {'local.txt': ('abc', 1000), 'shared.txt': ('abc', 1000)})
+    client = FakeClient({'/r': [RemoteEntry('remote.txt', False, 4, 1000.0),
+                                RemoteEntry('shared.txt', False, 3, 9000.0)]})
+    plan = DirectorySync(client, delete=True).plan(str(tmp_path), '/r', 'both')
+
+    assert actions(plan) == [
+        ('download', 'remote.txt', 'новый'),
+        ('download', 'shared.txt', 'новее'),
+        ('upload', 'local.txt', 'новый'),
+    ]
+    assert plan.count('delete_local') == plan.count('delete_remote') == 0
+
+
+def test_list_servers_get_minute_tolerance(tmp_path):
+    make_local(tmp_path, {'a.txt': ('abc', 1030)})
+    remote = {'/r': [RemoteEntry('a.txt', False, 3, 1000.0)]}
+
+    assert DirectorySync(FakeClient(remote, mlst=False)).plan(str(tmp_path), '/r').unchanged == 1
+    assert actions(DirectorySync(FakeClient(remote)).plan(str(tmp_path), '/r')) == [('upload', 'a.txt', 'новее')]
+
+
+def test_report_lists_counts_and_actions(tmp_path):
+    make_local(tmp_path, {'new.txt': ('x', 1000)})
+    plan = DirectorySync(FakeClient({})).plan(str(tmp_path), '/r', 'upload')
+    report = plan.report()
+
+    assert "Загрузить: 1" in report
+    assert "Загрузить: new.txt (новый)" in report
+    assert "Папки синхронизированы" not in report
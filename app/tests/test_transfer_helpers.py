@@ -0,0 +1,126 @@
+import os
+from threading import Thread
+
+import pytest
+
+from src.core.integrity import select_hash, same_hash, file_digest
+from src.core.remote_copy import RingBuffer
+from src.core.resume import (UploadStateStore, download_offset, part_path,
+                             save_download_state, clear_download_state)
+from src.core.transfer_tuner import TransferTuner
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_tuner_grows_until_rate_drops(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr('src.core.transfer_tuner.time.monotonic', clock)
+    tuner = TransferTuner(64 * 1024)
+    for rate in (1000, 2000, 4000):
+        clock.now += 1
+        tuner.record(rate)
+    assert tuner.block_size == 512 * 1024
+    assert tuner.best_size == 256 * 1024
+    # Скорость упала - возвращаемся к лучшему блоку и больше не растем
+    clock.now += 1
+    tuner.record(1000)
+    assert tuner.block_size == 256 * 1024
+    clock.now += 1
+    tuner.record(10000)
+    assert tuner.block_size == 256 * 1024 and tuner.measured()
+
+
+def test_tuner_limits_and_fixed_mode():
+    assert TransferTuner(1).block_size == TransferTuner.MIN_BLOCK
+    assert TransferTuner(10 ** 9).block_size == TransferTuner.MAX_BLOCK
+    tuner = TransferTuner(64 * 1024, adaptive=False)
+    tuner.record(10 ** 9)
+    assert tuner.block_size == 64 * 1024 and not tuner.measured()
+
+
+def test_ring_buffer_wraps_and_blocks():
+    buffer = RingBuffer(7)
+    data = bytes(range(256)) * 40
+    received = []
+
+    def reader():
+        while True:
+            chunk = buffer.read(5)
+            if not chunk:
+                return
+            received.append(chunk)
+
+    thread = Thread(target=reader)
+    thread.start()
+    for i in range(0, len(data), 13):
+        buffer.write(data[i:i + 13])
+    buffer.close()
+    thread.join(5)
+    assert b''.join(received) == data
+
+
+def test_ring_buffer_error_propagates():
+    buffer = RingBuffer(4)
+    buffer.write(b'ab')
+    buffer.close(OSError("обрыв"))
+    # Уже записанные данные дочитываются, затем поднимается ошибка
+    assert buffer.read(10) == b'ab'
+    with pytest.raises(OSError):
+        buffer.read(10)
+    with pytest.raises(OSError):
+        buffer.write(b'x')
+
+
+def test_download_offset(tmp_path):
+    local = str(tmp_path / 'file.bin')
+    assert download_offset(local, '/file.bin', 100, 1.0) == 0
+    with open(part_path(local), 'wb') as f:
+        f.write(b'x' * 40)
+    save_download_state(local, '/file.bin', 100, 1.0)
+    assert download_offset(local, '/file.bin', 100, 1.0) == 40
+    # Файл на сервере изменился или время изменения неизвестно
+    assert download_offset(local, '/file.bin', 100, 2.0) == 0
+    assert download_offset(local, '/file.bin', 120, 1.0) == 0
+    assert download_offset(local, '/file.bin', 100, 0) == 0
+    clear_download_state(local)
+    assert not os.path.exists(part_path(local))
+    assert download_offset(local, '/file.bin', 100, 1.0) == 0
+
+
+def test_upload_state_store(tmp_path):
+    local = str(tmp_path / 'file.bin')
+    with open(local, 'wb') as f:
+        f.write(b'x' * 100)
+    store = UploadStateStore(str(tmp_path / 'uploads.json'))
+    store.put('srv:/file.bin', local)
+    store.flush()
+    assert UploadStateStore(store.state_file).offset('srv:/file.bin', local, 30) == 30
+    assert store.offset('srv:/file.bin', local, 100) == 0
+    assert store.offset('srv:/file.bin', str(tmp_path / 'other'), 30) == 0
+    with open(local, 'ab') as f:
+        f.write(b'y')
+    assert store.offset('srv:/file.bin', local, 30) == 0
+    store.remove('srv:/file.bin')
+    store.flush()
+    assert UploadStateStore(store.state_file).offset('srv:/file.bin', local, 30) == 0
+
+
+def test_select_hash():
+    assert select_hash({'HASH': 'SHA-1;SHA-256*;MD5'}) == ('HASH', 'sha1')
+    assert select_hash({'HASH': 'BLAKE3;MD5*', 'XSHA256': ''}) == ('HASH', 'md5')
+    assert select_hash({'XMD5': '', 'XCRC': ''}) == ('XMD5', 'md5')
+    assert select_hash({'MLST': ''}) is None
+
+
+def test_file_digest(tmp_path):
+    path = str(tmp_path / 'data')
+    with open(path, 'wb') as f:
+        f.write(b'hello world')
+    assert file_digest(path, 'crc32').hexdigest() == '0d4a1185'
+    assert same_hash(file_digest(path, 'md5', limit=5).hexdigest(), '5D41402ABC4B2A76B9719D911017C592')